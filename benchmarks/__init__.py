@@ -0,0 +1,5 @@
+"""Bancs d'essai de performance (hors suite de tests).
+
+    python -m benchmarks.loopback --output benchmarks/results/courant.json
+    python -m benchmarks.compare benchmarks/results/reference.json benchmarks/results/courant.json
+"""
@@ -0,0 +1,86 @@
+"""Compare deux résultats de `benchmarks.loopback` et signale les régressions.
+
+    python -m benchmarks.compare reference.json courant.json --tolerance 10 --require-mbps 120
+
+Code de sortie 1 si une régression dépasse la tolérance ou si aucun cas
+n'atteint `--require-mbps`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+# métrique -> True si "plus haut = meilleur"
+METRICS = {
+    "max_mbps": True,
+    "max_pps": True,
+    "cpu_pct_per_mbps": False,
+}
+# Perte en points de pourcentage absolus (les valeurs de référence sont souvent 0)
+LOSS_TOLERANCE_PTS = 0.5
+KEY_FIELDS = ("loop_backend", "protocol", "packet_size", "connections")
+
+
+def _key(r: dict) -> tuple:
+    return tuple(r.get(k, "-") for k in KEY_FIELDS)
+
+
+def load(path: str | Path) -> dict[tuple, dict]:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {_key(r): r for r in doc.get("results", [])}
+
+
+def find_regressions(baseline: dict[tuple, dict], current: dict[tuple, dict], tolerance_pct: float) -> list[str]:
+    problems = []
+    for key, base in baseline.items():
+        cur = current.get(key)
+        if cur is None:
+            continue
+        label = "/".join(str(k) for k in key)
+        for metric, higher_is_better in METRICS.items():
+            b, c = base.get(metric, 0.0), cur.get(metric, 0.0)
+            if b <= 0:
+                continue
+            change = (c - b) / b * 100
+            worse = -change if higher_is_better else change
+            if worse > tolerance_pct:
+                problems.append(f"{label}: {metric} {b:.2f} -> {c:.2f} ({change:+.1f}%)")
+        if cur.get("loss_pct", 0.0) - base.get("loss_pct", 0.0) > LOSS_TOLERANCE_PTS:
+            problems.append(f"{label}: loss_pct {base['loss_pct']:.2f} -> {cur['loss_pct']:.2f}")
+    return problems
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Compare un benchmark à une référence")
+    p.add_argument("baseline", help="JSON de référence")
+    p.add_argument("current", help="JSON à évaluer")
+    p.add_argument("--tolerance", type=float, default=10.0, help="Dégradation tolérée (%%)")
+    p.add_argument("--require-mbps", type=float, help="Débit soutenable minimal attendu sur au moins un cas")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = load(args.baseline)
+    current = load(args.current)
+    problems = find_regressions(baseline, current, args.tolerance)
+    missing = sorted(set(baseline) - set(current))
+    for key in missing:
+        print(f"(absent du courant) {'/'.join(str(k) for k in key)}")
+    if args.require_mbps is not None:
+        best = max((r.get("max_mbps", 0.0) for r in current.values()), default=0.0)
+        if best < args.require_mbps:
+            problems.append(f"débit max soutenable {best:.1f} Mbps < {args.require_mbps:.1f} Mbps requis")
+    if problems:
+        print("RÉGRESSIONS:")
+        for p in problems:
+            print(f"  - {p}")
+        sys.exit(1)
+    print(f"OK: {len(current)} cas, aucune régression au-delà de {args.tolerance:.0f}%")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,170 @@
+"""Banc d'essai boucle locale: `generate_traffic` -> `Receiver` dans le même processus.
+
+Pour chaque combinaison protocole / taille de paquet / nombre de connexions,
+le débit maximal soutenable est cherché par dichotomie: un premier envoi sans
+limite réaliste donne la borne haute, puis on garde le plus haut débit reçu
+avec une perte récepteur <= `--max-loss` et au moins 95 % de la cible atteinte.
+
+    python -m benchmarks.loopback --loops asyncio,uvloop --output benchmarks/results/mini_pc.json
+
+Chaque boucle d'événements demandée (`--loops`) refait toute la matrice; les
+résultats portent le nom de la boucle effectivement utilisée. Le CPU mesuré est celui du processus complet (émetteur + récepteur).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import psutil
+
+from loadtester import eventloop
+from loadtester.generator import generate_traffic
+from loadtester.receiver import Receiver
+
+
+# Cible "illimitée" du premier passage (au-delà de ce que la boucle locale peut tenir)
+BLAST_MBPS = 5000.0
+MIN_TARGET_RATIO = 0.95
+
+
+async def run_once(protocol: str, packet_size: int, connections: int, target_mbps: float, duration: float) -> dict:
+    recv = Receiver(0, 0, interval=3600, output=None, host="127.0.0.1", verbose=False)
+    recv_task = asyncio.create_task(recv.start())
+    await asyncio.sleep(0.05)
+    port = recv.tcp_port if protocol == "TCP" else recv.udp_port
+    proc = psutil.Process()
+    cpu0 = proc.cpu_times()
+    t0 = time.perf_counter()
+    stats = await generate_traffic(protocol, "127.0.0.1", port, packet_size, target_mbps, connections, duration)
+    await asyncio.sleep(0.1)  # laisser le récepteur vider ses tampons
+    wall = time.perf_counter() - t0
+    cpu1 = proc.cpu_times()
+    recv_task.cancel()
+    await asyncio.gather(recv_task, return_exceptions=True)
+
+    cpu_s = (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)
+    if protocol == "TCP":
+        recv_bytes = recv.tcp_bytes
+        sent_packets = stats.bytes_sent // max(packet_size, 1)
+        recv_packets = recv_bytes // max(packet_size, 1)
+    else:
+        recv_bytes = recv.udp_bytes
+        sent_packets = stats.bytes_sent // max(packet_size, 1)
+        recv_packets = recv.udp_packets
+    duration_s = stats.duration_s or duration
+    recv_mbps = recv_bytes * 8 / 1_000_000 / duration_s
+    loss_pct = (1 - recv_packets / sent_packets) * 100 if sent_packets else 0.0
+    return {
+        "target_mbps": target_mbps,
+        "sent_mbps": stats.mbps,
+        "sent_pps": sent_packets / duration_s,
+        "recv_mbps": recv_mbps,
+        "recv_pps": recv_packets / duration_s,
+        "loss_pct": max(loss_pct, 0.0),
+        "cpu_pct": cpu_s / wall * 100,
+        "cpu_pct_per_mbps": (cpu_s / wall * 100) / recv_mbps if recv_mbps > 0 else 0.0,
+    }
+
+
+def _sustainable(run: dict, max_loss: float) -> bool:
+    return run["loss_pct"] <= max_loss and run["recv_mbps"] >= run["target_mbps"] * MIN_TARGET_RATIO
+
+
+async def find_max(protocol: str, packet_size: int, connections: int, duration: float, steps: int, max_loss: float) -> dict:
+    blast = await run_once(protocol, packet_size, connections, BLAST_MBPS, duration)
+    best = None
+    lo, hi = 0.0, blast["recv_mbps"]
+    target = hi
+    for _ in range(steps if hi > 0 else 0):
+        run = await run_once(protocol, packet_size, connections, target, duration)
+        if _sustainable(run, max_loss):
+            best, lo = run, target
+            if target >= hi:
+                break
+        else:
+            hi = target
+        target = (lo + hi) / 2
+    best = best or {"target_mbps": 0.0, "recv_mbps": 0.0, "recv_pps": 0.0, "loss_pct": 0.0, "cpu_pct_per_mbps": 0.0}
+    return {
+        "protocol": protocol,
+        "packet_size": packet_size,
+        "connections": connections,
+        "blast_sent_mbps": blast["sent_mbps"],
+        "blast_recv_mbps": blast["recv_mbps"],
+        "blast_loss_pct": blast["loss_pct"],
+        "max_mbps": best["recv_mbps"],
+        "max_pps": best["recv_pps"],
+        "loss_pct": best["loss_pct"],
+        "cpu_pct_per_mbps": best["cpu_pct_per_mbps"] or blast["cpu_pct_per_mbps"],
+    }
+
+
+async def run_suite(args, backend: str) -> list[dict]:
+    results = []
+    for protocol in args.protocols:
+        for size in args.sizes:
+            for conns in args.connections:
+                r = await find_max(protocol, size, conns, args.duration, args.steps, args.max_loss)
+                r = {"loop_backend": backend, **r}
+                print(
+                    f"{backend:<7} {protocol:<3} size={size:<5} conns={conns:<2} max={r['max_mbps']:8.1f} Mbps "
+                    f"{r['max_pps']:9.0f} pps loss={r['loss_pct']:.2f}% cpu/Mbps={r['cpu_pct_per_mbps']:.2f}"
+                )
+                results.append(r)
+    return results
+
+
+def _csv_ints(text: str) -> list[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark boucle locale générateur -> récepteur")
+    p.add_argument("--protocols", type=lambda t: [x.strip().upper() for x in t.split(",")], default=["UDP", "TCP"])
+    p.add_argument("--sizes", type=_csv_ints, default=[64, 512, 1024, 1472])
+    p.add_argument("--connections", type=_csv_ints, default=[1, 4])
+    p.add_argument("--duration", type=float, default=2.0, help="Durée de chaque essai (s)")
+    p.add_argument("--steps", type=int, default=4, help="Essais de dichotomie après le passage à vide")
+    p.add_argument("--max-loss", type=float, default=1.0, help="Perte récepteur max (%%) pour un débit soutenable")
+    p.add_argument(
+        "--loops",
+        type=lambda t: [x.strip().lower() for x in t.split(",")],
+        default=["auto"],
+        help="Boucles à comparer, ex: asyncio,uvloop (auto = uvloop si installé)",
+    )
+    p.add_argument("--output", help="Fichier JSON de résultats")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+    for name in dict.fromkeys(eventloop.resolve_backend(n) for n in args.loops):
+        results.extend(eventloop.run(run_suite(args, name), name))
+    doc = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": sys.version.split()[0],
+            "cpu_count": psutil.cpu_count(),
+            "duration_s": args.duration,
+            "max_loss_pct": args.max_loss,
+        },
+        "results": results,
+    }
+    output = Path(args.output or f"benchmarks/results/loopback_{datetime.utcnow():%Y%m%d_%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Résultats écrits: {output}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -2,8 +2,56 @@
 
 Les sous-modules principaux sont importables individuellement:
     from loadtester import config, generator, metrics, report, runner
+
+Ils sont chargés à la première utilisation (PEP 562): `loadtester-receiver`
+n'a ainsi pas à importer rich, psutil ni le runner avant d'ouvrir ses sockets.
 """
 
-from . import config, generator, metrics, report, runner  # type: ignore F401
+import importlib
 
 __all__ = ["config", "generator", "metrics", "report", "runner"]
+
+_SUBMODULES = {
+    "analyze",
+    "capacity",
+    "cli",
+    "config",
+    "engine",
+    "envelope",
+    "eventloop",
+    "exporter",
+    "goodput",
+    "guard",
+    "generator",
+    "gui",
+    "histogram",
+    "impair",
+    "instrument",
+    "iperf",
+    "metrics",
+    "plan",
+    "receiver",
+    "report",
+    "responsiveness",
+    "ring",
+    "runner",
+    "scheduler",
+    "session",
+    "soak",
+    "stress",
+    "steady",
+    "sweep",
+    "wire",
+}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,385 @@
+"""Analyse hors ligne: jointure du rapport émetteur et du journal récepteur.
+
+    loadtester-analyze reports/report_20250101_120000.csv receiver_log.csv
+    loadtester-analyze rapport.csv recepteur.csv --offset 0.3        # horloges déjà synchronisées
+    loadtester-analyze rapport.csv recepteur_b.csv --target cellB    # palier multi-cibles
+
+Nécessite numpy (`pip install -e ".[analysis]"`). Les deux fichiers sont lus
+en colonnes, et tout le calcul se fait sur des tableaux: un journal récepteur
+de plusieurs heures est traité en quelques secondes.
+
+Les deux machines n'ont pas la même horloge. Les fenêtres de palier du rapport
+(`timestamp_start` → `timestamp_end`) servent de repères, avec le débit émis
+chaque seconde (`<rapport>.timeline.csv`) quand il est disponible. Elles
+donnent les octets attendus dans chaque intervalle du récepteur, en
+proportion du recouvrement. Le décalage d'horloge (récepteur - émetteur)
+retenu maximise la corrélation entre octets attendus et octets reçus. Il est
+cherché par pas de `min(intervalle, 1 s)` sur ±`--max-offset`, puis affiné
+au vingtième de pas.
+
+Sorties, à côté du rapport:
+- `<rapport>.delivery.csv`: par palier, débits émis et reçu, taux de
+  livraison et perte (estimation par numéros de séquence du récepteur);
+- `<rapport>.delivery_seconds.csv`: la même chose par intervalle du récepteur
+  (`--interval 1` côté récepteur pour une résolution à la seconde).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    np = None
+
+DEFAULT_MAX_OFFSET_S = 120.0
+REFINE_STEPS = 20
+# Débit émis par seconde retenu seulement s'il explique au moins cette part des octets du palier (iperf: rien)
+TIMELINE_MIN_SHARE = 0.5
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("loadtester-analyze nécessite numpy: pip install -e \".[analysis]\"")
+
+
+def _read_columns(path: Path) -> Dict[str, List[str]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = list(reader)
+    cols = list(zip(*rows)) if rows else [()] * len(header)
+    return {name: list(col) for name, col in zip(header, cols)}
+
+
+def _epoch_s(values: List[str]):
+    """Horodatages ISO (UTC) -> secondes, vectorisé."""
+    return np.array(values, dtype="datetime64[us]").astype("int64") / 1e6
+
+
+def _floats(values: List[str]):
+    return np.array([v or "nan" for v in values], dtype=float)
+
+
+@dataclass
+class SenderLog:
+    """Un palier par ligne, horloge émetteur; `seg_*` = débit émis par morceaux (timeline ou palier entier)."""
+    names: List[str]
+    protocols: List[str]
+    start: "np.ndarray"
+    end: "np.ndarray"
+    sent_mbps: "np.ndarray"
+    seg_start: "np.ndarray"
+    seg_end: "np.ndarray"
+    seg_bps: "np.ndarray"  # octets/s
+
+    @property
+    def sent_bytes(self):
+        return self.sent_mbps * 1_000_000 / 8 * (self.end - self.start)
+
+
+@dataclass
+class ReceiverLog:
+    """Un intervalle par ligne, horloge récepteur (horodatage = fin d'intervalle)."""
+    start: "np.ndarray"
+    end: "np.ndarray"
+    bytes: "np.ndarray"
+    packets: "np.ndarray"
+    lost: "np.ndarray"
+
+
+def load_sender(report: Path, target: Optional[str] = None) -> SenderLog:
+    """Fenêtres et débit émis des paliers du rapport.
+
+    Par défaut: ligne principale (TOTAL en multi-cibles) plus flux de classe.
+    Avec `target`: seulement la ligne de cette cible (un récepteur parmi plusieurs).
+    """
+    _require_numpy()
+    cols = _read_columns(report)
+    if "timestamp_end" not in cols:
+        raise ValueError(f"{report}: pas de colonne timestamp_end (rapport antérieur à la fenêtre commune)")
+    n = len(cols["tier_name"])
+    targets = cols.get("target") or [""] * n
+    classes = cols.get("traffic_class") or [""] * n
+    sources = cols.get("source") or [""] * n
+    groups: Dict[Tuple[str, str], dict] = {}
+    for i, key in enumerate(zip(cols["tier_name"], cols["timestamp_start"])):
+        if sources[i]:
+            continue  # détail par interface d'émission, déjà compté dans la ligne principale
+        target_label = targets[i]
+        stream = " " in classes[i]  # flux de classe: "<nom> <classe>"
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {"end": cols["timestamp_end"][i], "protocol": cols["protocol"][i], "mbps": 0.0, "main": False}
+        mbps = float(cols["achieved_mbps"][i] or 0.0)
+        if target is not None:
+            if target_label == target and not stream:
+                g["mbps"] += mbps
+                g["main"] = True
+        elif stream or not g["main"]:
+            g["mbps"] += mbps  # première ligne du groupe = trafic principal, puis flux de classe
+            g["main"] = True
+    tiers = [(name, ts, g) for (name, ts), g in groups.items() if g["main"]]
+    if not tiers:
+        raise ValueError(f"{report}: aucun palier" + (f" pour la cible {target!r}" if target else ""))
+    start = _epoch_s([ts for _, ts, _ in tiers])
+    end = _epoch_s([g["end"] for _, _, g in tiers])
+    sent = np.array([g["mbps"] for _, _, g in tiers])
+    log = SenderLog(
+        [name for name, _, _ in tiers], [g["protocol"] for _, _, g in tiers], start, end, sent,
+        start.copy(), end.copy(), sent * 1_000_000 / 8,
+    )
+    timeline = report.with_suffix(".timeline.csv")
+    if timeline.exists():
+        _apply_timeline(log, _read_columns(timeline))
+    return log
+
+
+def _apply_timeline(log: SenderLog, cols: Dict[str, List[str]]):
+    """Remplace le débit constant d'un palier par son débit émis seconde par seconde, remis à l'échelle du rapport."""
+    names = np.array(cols.get("tier_name", []))
+    t_s = _floats(cols.get("t_s", []))
+    mbps = _floats(cols.get("achieved_mbps", []))
+    seg_start, seg_end, seg_bps = [], [], []
+    seen: Dict[str, int] = {}
+    for i, name in enumerate(log.names):
+        # Un même nom peut revenir (répétitions): k-ième occurrence du rapport = k-ième série de la timeline
+        k = seen[name] = seen.get(name, -1) + 1
+        idx = np.flatnonzero(names == name)
+        runs = np.split(idx, np.flatnonzero(np.diff(t_s[idx]) <= 0) + 1) if idx.size else []
+        total = log.sent_bytes[i]
+        if k < len(runs) and runs[k].size and total > 0:
+            t = t_s[runs[k]]
+            lo = np.concatenate(([0.0], t[:-1]))
+            nbytes = mbps[runs[k]] * 1_000_000 / 8 * (t - lo)
+            if nbytes.sum() >= total * TIMELINE_MIN_SHARE:
+                s = log.start[i]
+                seg_start.append(s + lo)
+                seg_end.append(np.minimum(s + t, log.end[i]))
+                seg_bps.append(nbytes * (total / nbytes.sum()) / np.maximum(t - lo, 1e-9))
+                continue
+        seg_start.append(log.start[i:i + 1])
+        seg_end.append(log.end[i:i + 1])
+        seg_bps.append(log.sent_mbps[i:i + 1] * 1_000_000 / 8)
+    log.seg_start = np.concatenate(seg_start)
+    log.seg_end = np.concatenate(seg_end)
+    log.seg_bps = np.concatenate(seg_bps)
+
+
+def load_receiver(path: Path) -> ReceiverLog:
+    _require_numpy()
+    cols = _read_columns(path)
+    end = _epoch_s(cols["timestamp"])
+    if end.size == 0:
+        raise ValueError(f"{path}: journal récepteur vide")
+    steps = np.diff(end)
+    first = np.median(steps) if steps.size else 1.0
+    start = end - np.concatenate(([first], steps))
+    nbytes = _floats(cols["udp_bytes"]) + _floats(cols.get("tcp_bytes", ["0"] * end.size))
+    return ReceiverLog(start, end, nbytes, _floats(cols["udp_packets"]), _floats(cols["udp_loss_est"]))
+
+
+def _overlap(a0, a1, b0, b1):
+    """Recouvrement (N, M) des intervalles [a0, a1] (N) et [b0, b1] (M)."""
+    return np.clip(np.minimum(a1[:, None], b1[None, :]) - np.maximum(a0[:, None], b0[None, :]), 0.0, None)
+
+
+def _cumulative(sender: SenderLog):
+    """Octets émis cumulés, linéaires par morceau: (instants, cumuls) pour `np.interp`."""
+    order = np.argsort(sender.seg_start, kind="stable")
+    s0, s1, bps = sender.seg_start[order], sender.seg_end[order], sender.seg_bps[order]
+    seg_bytes = bps * (s1 - s0)
+    before = np.concatenate(([0.0], np.cumsum(seg_bytes)[:-1]))
+    xs = np.column_stack((s0, s1)).ravel()
+    ys = np.column_stack((before, before + seg_bytes)).ravel()
+    return xs, ys
+
+
+def expected_bytes(sender: SenderLog, receiver: ReceiverLog, offset_s: float, cumulative=None):
+    """Octets émis pendant chaque intervalle du récepteur, horloge récepteur = émetteur + `offset_s`."""
+    xs, ys = cumulative if cumulative is not None else _cumulative(sender)
+    return np.interp(receiver.end - offset_s, xs, ys) - np.interp(receiver.start - offset_s, xs, ys)
+
+
+def _score(sender: SenderLog, receiver: ReceiverLog, offset_s: float, cumulative=None) -> float:
+    exp = expected_bytes(sender, receiver, offset_s, cumulative)
+    if exp.std() == 0 or receiver.bytes.std() == 0:
+        return -1.0
+    return float(np.corrcoef(exp, receiver.bytes)[0, 1])
+
+
+def estimate_offset(sender: SenderLog, receiver: ReceiverLog, max_offset_s: float = DEFAULT_MAX_OFFSET_S) -> Tuple[float, float]:
+    """(décalage récepteur - émetteur en s, corrélation obtenue)."""
+    # Seuls les intervalles qui peuvent recouvrir un palier comptent
+    keep = (receiver.end >= sender.start.min() - max_offset_s) & (receiver.start <= sender.end.max() + max_offset_s)
+    rx = ReceiverLog(*(getattr(receiver, f)[keep] for f in ("start", "end", "bytes", "packets", "lost")))
+    if rx.start.size == 0:
+        return 0.0, float("nan")
+    cum = _cumulative(sender)
+    step = float(min(np.median(rx.end - rx.start), 1.0))
+    best = max(np.arange(-max_offset_s, max_offset_s + step / 2, step), key=lambda o: _score(sender, rx, o, cum))
+    fine = np.linspace(best - step, best + step, 2 * REFINE_STEPS + 1)
+    best = max(fine, key=lambda o: _score(sender, rx, o, cum))
+    return float(best), _score(sender, rx, best, cum)
+
+
+@dataclass
+class TierDelivery:
+    name: str
+    protocol: str
+    start_s: float  # horloge émetteur (epoch)
+    duration_s: float
+    sent_mbps: float
+    recv_mbps: float
+    delivery_pct: float
+    loss_pct: float
+    recv_packets: int
+    lost_packets: int
+    coverage_pct: float  # part de la fenêtre couverte par le journal récepteur
+
+
+@dataclass
+class Analysis:
+    offset_s: float
+    correlation: float
+    tiers: List[TierDelivery]
+    # Par intervalle du récepteur (horloge émetteur): tableaux de même longueur
+    t_start: "np.ndarray"
+    t_end: "np.ndarray"
+    tier_index: "np.ndarray"  # -1 hors palier
+    sent_mbps: "np.ndarray"
+    recv_mbps: "np.ndarray"
+    loss_pct: "np.ndarray"
+
+
+def _pct(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den * 100, np.nan)
+
+
+def analyze(sender: SenderLog, receiver: ReceiverLog, offset_s: Optional[float] = None,
+            max_offset_s: float = DEFAULT_MAX_OFFSET_S) -> Analysis:
+    correlation = float("nan")
+    if offset_s is None:
+        offset_s, correlation = estimate_offset(sender, receiver, max_offset_s)
+    # Tout en horloge émetteur
+    r0, r1 = receiver.start - offset_s, receiver.end - offset_s
+    length = r1 - r0
+    # Part de chaque intervalle revenant à chaque palier: au prorata des octets émis
+    # (un intervalle à cheval sur le début d'un palier ne contient que son trafic)
+    overlap = _overlap(r0, r1, sender.start, sender.end)
+    weight = overlap * sender.sent_mbps[None, :]
+    total = weight.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(total > 0, weight / total, overlap / np.maximum(length, 1e-9)[:, None])
+    recv_bytes = receiver.bytes @ share
+    packets, lost = receiver.packets @ share, receiver.lost @ share
+    duration = sender.end - sender.start
+    coverage = overlap.sum(axis=0) / np.maximum(duration, 1e-9)
+    recv_mbps = recv_bytes * 8 / 1_000_000 / np.maximum(duration * np.minimum(coverage, 1.0), 1e-9)
+    delivery = _pct(recv_bytes, sender.sent_bytes * np.minimum(coverage, 1.0))
+    loss = _pct(lost, packets + lost)
+    tiers = [
+        TierDelivery(
+            sender.names[i], sender.protocols[i], float(sender.start[i]), float(duration[i]),
+            float(sender.sent_mbps[i]), float(recv_mbps[i]), float(delivery[i]), float(loss[i]),
+            int(round(packets[i])), int(round(lost[i])), float(min(coverage[i], 1.0) * 100),
+        )
+        for i in range(len(sender.names))
+    ]
+    # Par intervalle: limité à la course (premier début - dernière fin de palier)
+    in_run = (r1 > sender.start.min()) & (r0 < sender.end.max())
+    share = share[in_run]
+    tier_index = np.where(share.max(axis=1) > 0, share.argmax(axis=1), -1) if share.size else np.zeros(0, int)
+    exp = expected_bytes(sender, ReceiverLog(r0[in_run], r1[in_run], receiver.bytes[in_run], receiver.packets[in_run],
+                                             receiver.lost[in_run]), 0.0)
+    return Analysis(
+        offset_s=offset_s,
+        correlation=correlation,
+        tiers=tiers,
+        t_start=r0[in_run],
+        t_end=r1[in_run],
+        tier_index=tier_index,
+        sent_mbps=exp * 8 / 1_000_000 / length[in_run],
+        recv_mbps=receiver.bytes[in_run] * 8 / 1_000_000 / length[in_run],
+        loss_pct=_pct(receiver.lost[in_run], receiver.packets[in_run] + receiver.lost[in_run]),
+    )
+
+
+def _iso(epoch_s: float) -> str:
+    return str(np.datetime64(int(round(epoch_s * 1e6)), "us"))
+
+
+def write_analysis(result: Analysis, report: Path) -> Tuple[Path, Path]:
+    tiers_path = report.with_suffix(".delivery.csv")
+    with tiers_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow([
+            "tier_name", "protocol", "window_start", "duration_s", "sent_mbps", "recv_mbps", "delivery_pct",
+            "loss_pct", "recv_packets", "lost_packets", "coverage_pct", "clock_offset_s",
+        ])
+        for t in result.tiers:
+            w.writerow([
+                t.name, t.protocol, _iso(t.start_s), f"{t.duration_s:.2f}", f"{t.sent_mbps:.2f}", f"{t.recv_mbps:.2f}",
+                f"{t.delivery_pct:.2f}", f"{t.loss_pct:.2f}", t.recv_packets, t.lost_packets,
+                f"{t.coverage_pct:.1f}", f"{result.offset_s:.3f}",
+            ])
+    seconds_path = report.with_suffix(".delivery_seconds.csv")
+    names = [t.name for t in result.tiers]
+    origin = result.tiers[0].start_s if result.tiers else 0.0
+    delivery = _pct(result.recv_mbps, result.sent_mbps)
+    with seconds_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["time", "t_s", "tier_name", "interval_s", "sent_mbps", "recv_mbps", "delivery_pct", "loss_pct"])
+        for i in range(result.t_start.size):
+            w.writerow([
+                _iso(result.t_end[i]), f"{result.t_end[i] - origin:.2f}",
+                names[result.tier_index[i]] if result.tier_index[i] >= 0 else "",
+                f"{result.t_end[i] - result.t_start[i]:.2f}", f"{result.sent_mbps[i]:.2f}",
+                f"{result.recv_mbps[i]:.2f}", f"{delivery[i]:.2f}", f"{result.loss_pct[i]:.2f}",
+            ])
+    return tiers_path, seconds_path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Jointure rapport émetteur / journal récepteur: livraison de bout en bout")
+    p.add_argument("report", help="Rapport émetteur (reports/report_*.csv)")
+    p.add_argument("receiver", help="Journal du récepteur (loadtester-receiver --output)")
+    p.add_argument("--target", help="Seulement la cible de ce nom (palier multi-cibles, un journal par récepteur)")
+    p.add_argument("--offset", type=float, help="Décalage d'horloge récepteur - émetteur connu (s): pas d'estimation")
+    p.add_argument("--max-offset", type=float, default=DEFAULT_MAX_OFFSET_S, help="Décalage maximal cherché (s)")
+    p.add_argument("--log-level", default="INFO")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="[%(levelname)s] %(message)s")
+    try:
+        _require_numpy()
+        report = Path(args.report)
+        result = analyze(load_sender(report, args.target), load_receiver(Path(args.receiver)), args.offset, args.max_offset)
+    except (RuntimeError, ValueError, OSError, KeyError) as exc:
+        print(f"Erreur: {exc}", file=sys.stderr)
+        sys.exit(2)
+    if args.offset is None:
+        logging.info("Décalage d'horloge estimé: %+.3f s (corrélation %.3f)", result.offset_s, result.correlation)
+        if not result.correlation > 0.5:
+            logging.warning("Corrélation faible: vérifier que le journal récepteur couvre bien ce rapport")
+    for t in result.tiers:
+        print(
+            f"{t.name:<16} {t.protocol:<3} émis {t.sent_mbps:7.2f} Mbps  reçu {t.recv_mbps:7.2f} Mbps  "
+            f"livraison {t.delivery_pct:6.1f} %  perte {t.loss_pct:5.2f} %  couverture {t.coverage_pct:5.1f} %"
+        )
+    tiers_path, seconds_path = write_analysis(result, report)
+    print(f"Analyse écrite: {tiers_path}, {seconds_path}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,298 @@
+"""Modèle de capacité d'une escalade stress: saturation, coude de latence, début des pertes.
+
+    loadtester-stress --host 192.168.1.10 --repeat 3 --past-fail 2 --site entrepot-nord --ap AP-12
+    loadtester-capacity reports/capacity_history.jsonl --site entrepot-nord
+
+Trois ajustements, par protocole, sur tous les paliers (répétitions comprises):
+- saturation: débit atteint = pente x cible jusqu'à une rupture, puis plateau
+  constant (moindres carrés sur chaque rupture possible). Sans plateau
+  observé, la saturation est une borne basse (`saturated` = False);
+- coude de latence: « crosse de hockey » latence = base + pente x max(0,
+  cible - coude). Le coude est retenu si la latence monte d'au moins
+  `KNEE_MIN_RISE_MS` (et de `KNEE_MIN_RISE_PCT` % de la base) sur la plage
+  testée;
+- début des pertes: cible où la perte moyenne franchit `LOSS_ONSET_PCT`
+  (interpolation linéaire entre paliers).
+
+Avec `--repeat`, les intervalles de confiance viennent d'un bootstrap: chaque
+palier est ré-échantillonné parmi ses répétitions, puis tout est réajusté
+(`BOOTSTRAP` fois, percentiles 2,5 / 97,5). Chaque escalade ajoute une ligne
+par protocole à un historique JSONL, pour suivre la capacité d'un site ou d'un
+AP dans le temps.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LOSS_ONSET_PCT = 1.0
+# Plateau retenu seulement sous ce rapport du débit que le suivi de la cible prédirait
+TRACKING_RATIO = 0.95
+KNEE_MIN_RISE_MS = 2.0
+KNEE_MIN_RISE_PCT = 20.0
+BOOTSTRAP = 200
+CONFIDENCE = 0.95
+HISTORY_FILE = "capacity_history.jsonl"
+
+Point = Tuple[float, float]  # (cible, valeur)
+Interval = Tuple[float, float]
+
+
+@dataclass
+class CapacityModel:
+    protocol: str
+    levels: int  # cibles distinctes
+    runs: int  # paliers, répétitions comprises
+    saturation_mbps: float
+    saturated: bool  # plateau observé; sinon borne basse (débit max atteint)
+    knee_mbps: Optional[float]  # None: pas de montée nette de la latence
+    latency_base_ms: float
+    latency_slope_ms_per_mbps: float
+    loss_onset_mbps: Optional[float]  # None: perte jamais au-dessus de LOSS_ONSET_PCT
+    saturation_ci: Interval = (math.nan, math.nan)
+    knee_ci: Interval = (math.nan, math.nan)
+    loss_onset_ci: Interval = (math.nan, math.nan)
+
+    def describe(self) -> str:
+        def fmt(value: Optional[float], ci: Interval, absent: str) -> str:
+            if value is None:
+                return absent
+            text = f"{value:.1f} Mbps"
+            if not math.isnan(ci[0]):
+                text += f" [{ci[0]:.1f}-{ci[1]:.1f}]"
+            return text
+
+        sat = fmt(self.saturation_mbps, self.saturation_ci, "")
+        return (
+            f"{self.protocol}: saturation {sat if self.saturated else '>= ' + sat}, "
+            f"coude latence {fmt(self.knee_mbps, self.knee_ci, 'aucun')}, "
+            f"début pertes {fmt(self.loss_onset_mbps, self.loss_onset_ci, 'aucun')} "
+            f"({self.levels} paliers, {self.runs} mesures)"
+        )
+
+
+def _lstsq2(xs: Sequence[float], hs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float, float]:
+    """Moindres carrés y = a + b*h: (a, b, SSE)."""
+    n = len(xs)
+    sh, sy = sum(hs), sum(ys)
+    shh = sum(h * h for h in hs)
+    shy = sum(h * y for h, y in zip(hs, ys))
+    det = n * shh - sh * sh
+    if det <= 1e-12:
+        a, b = sy / n, 0.0
+    else:
+        b = (n * shy - sh * sy) / det
+        a = (sy - b * sh) / n
+    return a, b, sum((y - a - b * h) ** 2 for h, y in zip(hs, ys))
+
+
+def _proportional(points: Sequence[Point]) -> Tuple[float, float]:
+    """(pente, SSE) de y = pente * x."""
+    sxx = sum(x * x for x, _ in points)
+    slope = sum(x * y for x, y in points) / sxx if sxx > 0 else 0.0
+    return slope, sum((y - slope * x) ** 2 for x, y in points)
+
+
+def fit_saturation(points: Sequence[Point]) -> Tuple[float, bool]:
+    """(saturation en Mbps, plateau observé): rupture entre suivi proportionnel et plateau."""
+    pts = sorted(points)
+    targets = sorted({x for x, _ in pts})
+    best_sse = _proportional(pts)[1]
+    best = (max(y for _, y in pts), False)
+    # Plateau sur au moins deux cibles, nettement sous le suivi de la cible
+    for cut in targets[:-2]:
+        left = [(x, y) for x, y in pts if x <= cut]
+        right = [(x, y) for x, y in pts if x > cut]
+        slope, sse = _proportional(left)
+        plateau = sum(y for _, y in right) / len(right)
+        if plateau >= TRACKING_RATIO * slope * right[0][0]:
+            continue
+        sse += sum((y - plateau) ** 2 for _, y in right)
+        if sse < best_sse:
+            best_sse, best = sse, (plateau, True)
+    return best
+
+
+def fit_knee(points: Sequence[Point]) -> Tuple[Optional[float], float, float]:
+    """(coude ou None, latence de base, pente après le coude en ms/Mbps)."""
+    pts = [(x, y) for x, y in points if not math.isnan(y)]
+    if len({x for x, _ in pts}) < 3:
+        return None, (sum(y for _, y in pts) / len(pts)) if pts else math.nan, 0.0
+    xs = [x for x, _ in pts]
+    ys = [y for _, y in pts]
+    targets = sorted(set(xs))
+    best = None
+    # Coudes candidats: chaque cible et les milieux, sauf la dernière (au moins deux cibles au-delà)
+    candidates = sorted(set(targets[:-2]) | {(a + b) / 2 for a, b in zip(targets[:-2], targets[1:-1])})
+    for knee in candidates:
+        a, b, sse = _lstsq2(xs, [max(0.0, x - knee) for x in xs], ys)
+        if best is None or sse < best[3]:
+            best = (knee, a, b, sse)
+    knee, base, slope, _ = best
+    rise = slope * (max(xs) - knee)
+    if slope <= 0 or rise < max(KNEE_MIN_RISE_MS, abs(base) * KNEE_MIN_RISE_PCT / 100):
+        return None, sum(ys) / len(ys), 0.0
+    return knee, base, slope
+
+
+def loss_onset(points: Sequence[Point], threshold_pct: float = LOSS_ONSET_PCT) -> Optional[float]:
+    """Cible où la perte moyenne par palier franchit `threshold_pct` (interpolée), None si jamais."""
+    by_target: Dict[float, List[float]] = {}
+    for x, y in points:
+        by_target.setdefault(x, []).append(y)
+    prev: Optional[Point] = None
+    for x in sorted(by_target):
+        loss = sum(by_target[x]) / len(by_target[x])
+        if loss > threshold_pct:
+            if prev is None or loss == prev[1]:
+                return x
+            return prev[0] + (threshold_pct - prev[1]) / (loss - prev[1]) * (x - prev[0])
+        prev = (x, loss)
+    return None
+
+
+def _bootstrap(results: Sequence, fit: Callable[[Sequence], Optional[float]], rng: random.Random) -> Interval:
+    """IC percentile: chaque cible ré-échantillonnée parmi ses répétitions."""
+    groups: Dict[float, list] = {}
+    for r in results:
+        groups.setdefault(r.target_mbps, []).append(r)
+    if all(len(g) < 2 for g in groups.values()):
+        return math.nan, math.nan
+    values = []
+    for _ in range(BOOTSTRAP):
+        sample = [rng.choice(g) for g in groups.values() for _ in g]
+        v = fit(sample)
+        if v is not None:
+            values.append(v)
+    if len(values) < BOOTSTRAP / 2:  # le modèle n'existe pas dans la plupart des tirages
+        return math.nan, math.nan
+    values.sort()
+    lo = values[int((1 - CONFIDENCE) / 2 * (len(values) - 1))]
+    hi = values[int((1 + CONFIDENCE) / 2 * (len(values) - 1))]
+    return lo, hi
+
+
+def _saturation(results) -> float:
+    return fit_saturation([(r.target_mbps, r.achieved_mbps) for r in results])[0]
+
+
+def _knee(results) -> Optional[float]:
+    return fit_knee([(r.target_mbps, r.latency_ms) for r in results])[0]
+
+
+def _loss_onset(results) -> Optional[float]:
+    return loss_onset([(r.target_mbps, r.loss_pct) for r in results])
+
+
+def fit_capacity(results: Sequence, seed: int = 0) -> List[CapacityModel]:
+    """Un modèle par protocole à partir de `StressResult` (au moins 3 cibles distinctes)."""
+    models = []
+    for proto in sorted({r.protocol for r in results}):
+        runs = [r for r in results if r.protocol == proto]
+        if len({r.target_mbps for r in runs}) < 3:
+            continue
+        rng = random.Random(seed)
+        saturation, saturated = fit_saturation([(r.target_mbps, r.achieved_mbps) for r in runs])
+        knee, base, slope = fit_knee([(r.target_mbps, r.latency_ms) for r in runs])
+        onset = _loss_onset(runs)
+        models.append(
+            CapacityModel(
+                protocol=proto,
+                levels=len({r.target_mbps for r in runs}),
+                runs=len(runs),
+                saturation_mbps=saturation,
+                saturated=saturated,
+                knee_mbps=knee,
+                latency_base_ms=base,
+                latency_slope_ms_per_mbps=slope,
+                loss_onset_mbps=onset,
+                saturation_ci=_bootstrap(runs, _saturation, rng),
+                knee_ci=_bootstrap(runs, _knee, rng) if knee is not None else (math.nan, math.nan),
+                loss_onset_ci=_bootstrap(runs, _loss_onset, rng) if onset is not None else (math.nan, math.nan),
+            )
+        )
+    return models
+
+
+def append_history(models: Sequence[CapacityModel], path: Path, site: str = "", ap: str = "", report: str = ""):
+    """Une ligne JSON par protocole: suivi de la capacité par site et par AP."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    now = datetime.utcnow().isoformat(timespec="seconds")
+    with path.open("a", encoding="utf-8") as f:
+        for m in models:
+            entry = {"time": now, "site": site, "ap": ap, "report": report, **asdict(m)}
+            f.write(json.dumps(_nan_to_none(entry), allow_nan=False) + "\n")
+
+
+def _nan_to_none(value):
+    """JSON strict (jq, tableaux de bord): borne ou valeur absente = null, jamais `NaN`."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _nan_to_none(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_nan_to_none(v) for v in value]
+    return value
+
+
+def load_history(path: Path) -> List[dict]:
+    entries = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            entries.append(json.loads(line))
+    return entries
+
+
+def format_history(entries: Sequence[dict]) -> str:
+    """Tableau par (site, AP, protocole), de la plus ancienne à la plus récente mesure."""
+    def mbps(value) -> str:
+        # Absent: null, ou NaN dans les historiques écrits avant le passage au JSON strict
+        return f"{value:7.1f}" if value is not None and not math.isnan(value) else "      -"
+
+    lines = []
+    groups: Dict[tuple, List[dict]] = {}
+    for e in entries:
+        groups.setdefault((e.get("site", ""), e.get("ap", ""), e["protocol"]), []).append(e)
+    for (site, ap, proto), rows in sorted(groups.items()):
+        lines.append(f"{site or '-'} / {ap or '-'} / {proto}")
+        lines.append("  date                 saturation    coude  pertes")
+        for e in sorted(rows, key=lambda e: e["time"]):
+            flag = " " if e["saturated"] else ">"
+            lines.append(
+                f"  {e['time']:<19} {flag}{mbps(e['saturation_mbps'])}    {mbps(e['knee_mbps'])} {mbps(e['loss_onset_mbps'])}"
+            )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Historique des modèles de capacité (loadtester-stress)")
+    p.add_argument("history", nargs="?", default=str(Path("reports") / HISTORY_FILE), help="Fichier JSONL d'historique")
+    p.add_argument("--site", help="Seulement ce site")
+    p.add_argument("--ap", help="Seulement cet AP")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    entries = [
+        e for e in load_history(Path(args.history))
+        if (args.site is None or e.get("site") == args.site) and (args.ap is None or e.get("ap") == args.ap)
+    ]
+    print(format_history(entries) if entries else "Aucune mesure.")
+
+
+__all__ = [
+    "CapacityModel", "fit_capacity", "fit_saturation", "fit_knee", "loss_onset",
+    "append_history", "load_history", "format_history",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
+
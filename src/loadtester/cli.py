@@ -1,23 +1,36 @@
 from __future__ import annotations
 
 import argparse
-import asyncio
 import logging
+import sys
+from . import eventloop
 from .config import load_config
-from .runner import LoadTestRunner
+from .exporter import add_metrics_arguments, run_metrics_from_args, serving
 
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Wifi network load tester")
     p.add_argument("--config", required=True, help="YAML configuration file")
-    p.add_argument("--dry-run", action="store_true", help="Only show what would run")
+    p.add_argument(
+        "--dry-run", action="store_true",
+        help="Plan only: duration, volumes and sender calibration per tier, no traffic to the target",
+    )
+    p.add_argument(
+        "--no-calibration", action="store_true", help="With --dry-run, skip the local sender calibration"
+    )
     p.add_argument("--output", help="Override output directory")
     p.add_argument(
         "--internal-only", action="store_true", help="Ignore iperf3 even if available"
     )
+    p.add_argument(
+        "--session", action="store_true",
+        help="Keep sockets, TCP connections and the latency probe open across tiers (global.session)",
+    )
     p.add_argument(
         "--log-level", default="INFO", help="Logging level (DEBUG, INFO, WARNING, ERROR)"
     )
+    eventloop.add_loop_argument(p)
+    add_metrics_arguments(p)
     return p.parse_args()
 
 
@@ -27,10 +40,33 @@ def main():
     cfg = load_config(args.config)
     if args.output:
         cfg.global_.output_dir = args.output
-    runner = LoadTestRunner(cfg, dry_run=bool(args.dry_run), internal_only=args.internal_only)
-    reporter = asyncio.run(runner.run())
+    if args.loop:
+        cfg.global_.loop_backend = args.loop
+    if args.session:
+        cfg.global_.session = True
+    # Résolue une seule fois: le repli sans uvloop n'est signalé qu'une fois
+    backend = eventloop.resolve_backend(cfg.global_.loop_backend)
+    logging.info("Boucle d'événements: %s", backend)
+    if args.dry_run:
+        sys.exit(_dry_run(cfg, backend, calibrate=not args.no_calibration))
+    # Import différé: rich, psutil et le générateur ne sont chargés qu'une fois la config validée
+    from .runner import LoadTestRunner
+
+    metrics, server = run_metrics_from_args(args)
+    runner = LoadTestRunner(cfg, internal_only=args.internal_only, metrics=metrics)
+    reporter = eventloop.run(serving(server, runner.run()), backend)
     print(f"Rapport écrit: {reporter.path}")
 
 
+def _dry_run(cfg, backend: str, calibrate: bool) -> int:
+    """Affiche et écrit le plan; code 1 si un palier dépasse ce que l'émetteur peut tenir."""
+    from .plan import build_plan, format_plan, write_plan
+
+    plan = eventloop.run(build_plan(cfg, calibrate=calibrate, loop_backend=backend), backend)
+    print(format_plan(plan))
+    print(f"Plan écrit: {write_plan(plan, cfg.global_.output_dir)}")
+    return 0 if all(t.feasible for t in plan.tiers) else 1
+
+
 if __name__ == "__main__":  # pragma: no cover
     main()
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
 import dataclasses
-from dataclasses import dataclass
+import ipaddress
+from dataclasses import dataclass, field
 from pathlib import Path
 import yaml
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
+
+from .envelope import Envelope, parse_envelope
+from .generator import Source
+from .guard import GuardLimits, parse_guard
+from .steady import SteadyConfig, parse_steady
+from .wire import parse_dscp
+
+DEFAULT_TCP_PORT = 5201
+DEFAULT_UDP_PORT = 5202
+DEFAULT_ECHO_PORT = 5203
 
 
 @dataclass
@@ -14,6 +25,45 @@ class GlobalConfig:
     safety_max_mbps: float
     output_dir: str = "reports"
     use_iperf_if_available: bool = True
+    loop_backend: str = "auto"  # auto | asyncio | uvloop (voir eventloop)
+    # Réactivité sous charge (voir responsiveness): écho UDP du récepteur, ICMP à défaut
+    echo_port: int = DEFAULT_ECHO_PORT
+    idle_probe_s: float = 3.0  # mesure à vide avant chaque palier (0 = aucune)
+    probe_interval_ms: float = 50.0
+    # Échantillonnage CPU par cœur / interfaces réseau (voir metrics.ResourceSampler)
+    resource_interval_ms: float = 100.0
+    # Durée automatique (voir steady): None = durée fixe `duration_s`
+    steady: Optional[SteadyConfig] = None
+    # Limites dures vérifiées en direct (voir guard): None = `guard: false`
+    guard: Optional[GuardLimits] = None
+    # Sockets, connexions TCP et sonde de latence gardés d'un palier à l'autre (voir session)
+    session: bool = False
+
+
+@dataclass
+class TargetConfig:
+    """Récepteur d'un palier multi-cibles; `share` = poids relatif du débit."""
+    host: str
+    share: float = 1.0
+    tcp_port: int = DEFAULT_TCP_PORT
+    udp_port: int = DEFAULT_UDP_PORT
+    name: str = ""
+
+    def label(self, protocol: str) -> str:
+        """Libellé de la cible dans le rapport (comme `generator.Destination.label`)."""
+        return self.name or f"{self.host}:{self.tcp_port if protocol == 'TCP' else self.udp_port}"
+
+
+@dataclass
+class StreamConfig:
+    """Flux additionnel d'un palier (ex: sonde voix EF pendant la charge best-effort)."""
+    name: str
+    target_bandwidth_mbps: float
+    dscp: int = 46
+    protocol: str = "UDP"
+    packet_size: int = 200
+    connections: int = 1
+    sources: List[Source] = field(default_factory=list)  # vide = route par défaut
 
 
 @dataclass
@@ -21,9 +71,24 @@ class TierConfig:
     name: str
     protocol: str  # UDP or TCP
     target_bandwidth_mbps: float
-    connections: int
+    connections: int  # par cible
     duration_s: int
     packet_size: int = 512
+    targets: List[TargetConfig] = field(default_factory=list)  # vide = global.target_host
+    dscp: int = 0  # marquage du trafic principal (0 = best effort)
+    streams: List[StreamConfig] = field(default_factory=list)  # flux concurrents par classe
+    envelope: Optional[Envelope] = None  # débit variable dans le palier (voir envelope)
+    sources: List[Source] = field(default_factory=list)  # interfaces d'émission (vide = route par défaut)
+
+    @property
+    def peak_mbps(self) -> float:
+        """Débit maximal du trafic principal (crête de l'enveloppe s'il y en a une)."""
+        return self.envelope.peak_mbps if self.envelope else self.target_bandwidth_mbps
+
+    @property
+    def mean_target_mbps(self) -> float:
+        """Débit moyen visé par le trafic principal sur le palier."""
+        return self.envelope.mean_mbps(0.0, self.duration_s) if self.envelope else self.target_bandwidth_mbps
 
 
 @dataclass
@@ -33,40 +98,125 @@ class FullConfig:
 
     @property
     def total_max_bandwidth(self) -> float:
-        return max((t.target_bandwidth_mbps for t in self.tiers), default=0)
+        return max((t.peak_mbps for t in self.tiers), default=0)
+
+
+def _parse_target(raw: Any) -> TargetConfig:
+    if isinstance(raw, str):
+        return TargetConfig(host=raw)
+    return TargetConfig(
+        host=raw["host"],
+        share=float(raw.get("share", 1.0)),
+        tcp_port=int(raw.get("tcp_port", DEFAULT_TCP_PORT)),
+        udp_port=int(raw.get("udp_port", DEFAULT_UDP_PORT)),
+        name=str(raw.get("name", "")),
+    )
+
+
+def parse_source(raw: Any) -> Source:
+    """`wlan1`, `192.168.2.50` ou {interface, address, share}."""
+    if isinstance(raw, str):
+        try:
+            ipaddress.ip_address(raw)
+        except ValueError:
+            return Source(interface=raw)
+        return Source(address=raw)
+    source = Source(
+        interface=str(raw.get("interface", "")),
+        address=str(raw.get("address", "")),
+        share=float(raw.get("share", 1.0)),
+    )
+    if not source.interface and not source.address:
+        raise ValueError(f"Source {raw}: `interface` ou `address` requis")
+    return source
+
+
+def parse_sources(raw: List[Any], owner: str) -> List[Source]:
+    """Sources d'un palier, d'un flux ou de `--source`; `owner` préfixe les erreurs."""
+    sources = [parse_source(x) for x in raw]
+    if sources and sum(s.share for s in sources) <= 0:
+        raise ValueError(f"{owner}: la somme des parts (share) des sources doit être > 0")
+    # Une ligne de rapport par source: deux sources de même libellé fusionneraient leurs compteurs
+    labels = [s.label for s in sources]
+    duplicates = sorted({x for x in labels if labels.count(x) > 1})
+    if duplicates:
+        raise ValueError(f"{owner}: sources en double ({', '.join(duplicates)})")
+    return sources
+
+
+def _parse_stream(raw: Dict[str, Any], tier: str) -> StreamConfig:
+    return StreamConfig(
+        name=str(raw["name"]),
+        target_bandwidth_mbps=float(raw["target_bandwidth_mbps"]),
+        dscp=parse_dscp(raw.get("dscp", 46)),
+        protocol=str(raw.get("protocol", "UDP")).upper(),
+        packet_size=int(raw.get("packet_size", 200)),
+        connections=int(raw.get("connections", 1)),
+        sources=parse_sources(raw.get("sources", []), f"Tier {tier} flux {raw['name']}"),
+    )
 
 
 def load_config(path: str | Path) -> FullConfig:
     data = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
     g = data.get("global", {})
+    safety_max_mbps = float(g.get("safety_max_mbps", 100))
+    # Garde-fou actif par défaut, sur le débit émis seulement
+    guard_raw = g.get("guard", {})
     global_cfg = GlobalConfig(
         target_host=g["target_host"],
         ping_host=g.get("ping_host", g["target_host"]),
-        safety_max_mbps=float(g.get("safety_max_mbps", 100)),
+        safety_max_mbps=safety_max_mbps,
         output_dir=g.get("output_dir", "reports"),
         use_iperf_if_available=bool(g.get("use_iperf_if_available", True)),
+        loop_backend=str(g.get("loop_backend", "auto")).lower(),
+        echo_port=int(g.get("echo_port", DEFAULT_ECHO_PORT)),
+        idle_probe_s=float(g.get("idle_probe_s", 3.0)),
+        probe_interval_ms=float(g.get("probe_interval_ms", 50.0)),
+        resource_interval_ms=float(g.get("resource_interval_ms", 100.0)),
+        steady=parse_steady(g["steady"]) if g.get("steady") else None,
+        guard=parse_guard(guard_raw or {}, safety_max_mbps) if guard_raw is not False else None,
+        session=bool(g.get("session", False)),
     )
     tiers_raw: List[Dict[str, Any]] = data.get("tiers", [])
     tiers: List[TierConfig] = []
     for t in tiers_raw:
+        target_mbps = float(t["target_bandwidth_mbps"])
+        duration_s = int(t.get("duration_s", 30))
+        envelope = t.get("envelope")
         tiers.append(
             TierConfig(
                 name=t["name"],
                 protocol=t["protocol"].upper(),
-                target_bandwidth_mbps=float(t["target_bandwidth_mbps"]),
+                target_bandwidth_mbps=target_mbps,
                 connections=int(t.get("connections", 1)),
-                duration_s=int(t.get("duration_s", 30)),
+                duration_s=duration_s,
                 packet_size=int(t.get("packet_size", 512)),
+                targets=[_parse_target(x) for x in t.get("targets", [])],
+                dscp=parse_dscp(t.get("dscp", 0)),
+                streams=[_parse_stream(x, t["name"]) for x in t.get("streams", [])],
+                envelope=parse_envelope(envelope, duration_s, target_mbps) if envelope else None,
+                sources=parse_sources(t.get("sources", []), f"Tier {t['name']}"),
             )
         )
     cfg = FullConfig(global_cfg, tiers)
     # Safety validation per tier vs global safety limit
     for tier in cfg.tiers:
-        if tier.target_bandwidth_mbps > cfg.global_.safety_max_mbps:
+        if tier.targets and sum(t.share for t in tier.targets) <= 0:
+            raise ValueError(f"Tier {tier.name}: la somme des parts (share) des cibles doit être > 0")
+        # Une ligne de rapport par cible: deux cibles de même libellé fusionneraient leurs compteurs
+        labels = [t.label(tier.protocol) for t in tier.targets]
+        duplicates = sorted({x for x in labels if labels.count(x) > 1})
+        if duplicates:
+            raise ValueError(f"Tier {tier.name}: cibles en double ({', '.join(duplicates)}), donner un `name` distinct")
+        total_mbps = tier.peak_mbps + sum(st.target_bandwidth_mbps for st in tier.streams)
+        if total_mbps > cfg.global_.safety_max_mbps:
             raise ValueError(
-                f"Tier {tier.name} bandwidth {tier.target_bandwidth_mbps} Mbps dépasse safety_max_mbps {cfg.global_.safety_max_mbps}"
+                f"Tier {tier.name} bandwidth {total_mbps} Mbps dépasse safety_max_mbps {cfg.global_.safety_max_mbps}"
             )
     return cfg
 
 
-__all__ = ["GlobalConfig", "TierConfig", "FullConfig", "load_config"]
+__all__ = [
+    "GlobalConfig", "TargetConfig", "StreamConfig", "TierConfig", "FullConfig", "load_config",
+    "parse_source", "parse_sources",
+]
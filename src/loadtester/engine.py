@@ -0,0 +1,96 @@
+"""Moteur d'exécution persistant pour la GUI.
+
+Un seul thread d'arrière-plan garde une boucle d'événements ouverte pendant
+toute la session: les tests y sont soumis (`submit`) au lieu de recréer boucle,
+runner et sockets à chaque clic. Les échantillons par seconde (`LiveSample`)
+sont déposés dans une file bornée que le thread Tk vide avec `after()`.
+"""
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, List, Optional
+
+from . import eventloop
+from .generator import SocketPool
+from .instrument import LiveSample
+
+
+class BackgroundEngine:
+    def __init__(self, loop_backend: str = "auto", max_samples: int = 1024):
+        self.loop_backend = loop_backend
+        self.pool = SocketPool()
+        self.samples: "queue.Queue[LiveSample]" = queue.Queue(maxsize=max_samples)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._serve, name="loadtester-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _serve(self):
+        loop = eventloop.new_event_loop(self.loop_backend)
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
+            for t in pending:
+                t.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.pool.close()
+            # Fermeture effective des connexions TCP du pool (rappels planifiés par `close`)
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Planifie `coro` sur la boucle du moteur (appelable depuis n'importe quel thread)."""
+        if not self.running or self._loop is None:
+            raise RuntimeError("moteur arrêté")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def publish(self, sample: LiveSample):
+        """Dépose un échantillon; si la GUI prend du retard, le plus ancien est écarté."""
+        while True:
+            try:
+                self.samples.put_nowait(sample)
+                return
+            except queue.Full:
+                try:
+                    self.samples.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def drain(self, limit: int = 256) -> List[LiveSample]:
+        out: List[LiveSample] = []
+        while len(out) < limit:
+            try:
+                out.append(self.samples.get_nowait())
+            except queue.Empty:
+                break
+        return out
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._loop = None
+
+
+__all__ = ["BackgroundEngine"]
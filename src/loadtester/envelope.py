@@ -0,0 +1,128 @@
+"""Enveloppes de débit à l'intérieur d'un palier.
+
+    tiers:
+      - name: rampe
+        protocol: UDP
+        target_bandwidth_mbps: 50      # valeur par défaut de to_mbps / high_mbps
+        duration_s: 60
+        envelope: {kind: ramp, from_mbps: 5, to_mbps: 50}
+
+Formes disponibles:
+- `ramp`: droite de `from_mbps` (0) à `to_mbps` sur la durée du palier;
+- `steps`: `levels_mbps` successifs, `step_s` chacun (par défaut durée / nombre);
+- `sine`: entre `low_mbps` et `high_mbps`, période `period_s`, départ au minimum;
+- `square`: `high_mbps` pendant `duty` (0,5) de chaque période, puis `low_mbps`;
+- `piecewise`: `points` [[t_s, Mbps], ...], interpolation linéaire, dernier niveau tenu.
+
+Le générateur suit l'enveloppe en continu par `RateControl`, sans recréer ni
+sockets ni connexions. Le débit est échantillonné tous les `UPDATE_S`, et la
+cible par seconde du rapport (`mean_mbps`) utilise le même échantillonnage:
+elle correspond à ce que le pacer a réellement visé.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+ENVELOPE_KINDS = ("ramp", "steps", "sine", "square", "piecewise")
+# Pas de mise à jour du débit (s)
+UPDATE_S = 0.05
+
+
+@dataclass
+class Envelope:
+    kind: str
+    points: List[Tuple[float, float]] = field(default_factory=list)  # ramp / piecewise
+    levels_mbps: List[float] = field(default_factory=list)  # steps
+    step_s: float = 0.0
+    low_mbps: float = 0.0  # sine / square
+    high_mbps: float = 0.0
+    period_s: float = 0.0
+    duty: float = 0.5
+
+    def rate_mbps(self, t: float) -> float:
+        """Débit visé à `t` secondes du début du palier."""
+        if self.kind in ("ramp", "piecewise"):
+            times = [p[0] for p in self.points]
+            i = bisect.bisect_right(times, t)
+            if i == 0:
+                return self.points[0][1]
+            if i == len(self.points):
+                return self.points[-1][1]
+            (t0, v0), (t1, v1) = self.points[i - 1], self.points[i]
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        if self.kind == "steps":
+            return self.levels_mbps[min(int(t // self.step_s), len(self.levels_mbps) - 1)]
+        phase = (t % self.period_s) / self.period_s
+        if self.kind == "sine":
+            return self.low_mbps + (self.high_mbps - self.low_mbps) * (1 - math.cos(2 * math.pi * phase)) / 2
+        return self.high_mbps if phase < self.duty else self.low_mbps
+
+    def mean_mbps(self, t0: float, t1: float) -> float:
+        """Débit moyen visé sur [t0, t1), aux instants de mise à jour du pacer."""
+        k0, k1 = math.floor(t0 / UPDATE_S + 1e-9), math.ceil(t1 / UPDATE_S - 1e-9)
+        if k1 <= k0:
+            return self.rate_mbps(t0)
+        return sum(self.rate_mbps(k * UPDATE_S) for k in range(k0, k1)) / (k1 - k0)
+
+    @property
+    def peak_mbps(self) -> float:
+        if self.kind in ("ramp", "piecewise"):
+            return max(v for _, v in self.points)
+        if self.kind == "steps":
+            return max(self.levels_mbps)
+        return max(self.high_mbps, self.low_mbps)
+
+
+def parse_envelope(raw: Dict[str, Any], duration_s: float, default_mbps: float) -> Envelope:
+    """Enveloppe depuis la section YAML `envelope` d'un palier."""
+    kind = str(raw.get("kind", "")).lower()
+    if kind not in ENVELOPE_KINDS:
+        raise ValueError(f"Enveloppe: kind {kind!r} inconnu (attendu: {', '.join(ENVELOPE_KINDS)})")
+    if kind == "ramp":
+        start = float(raw.get("from_mbps", 0.0))
+        end = float(raw.get("to_mbps", default_mbps))
+        env = Envelope(kind, points=[(0.0, start), (float(duration_s), end)])
+    elif kind == "piecewise":
+        points = [(float(t), float(v)) for t, v in raw.get("points", [])]
+        if not points or any(b[0] <= a[0] for a, b in zip(points, points[1:])) or points[0][0] < 0:
+            raise ValueError("Enveloppe piecewise: `points` [[t_s, Mbps], ...] à instants croissants requis")
+        env = Envelope(kind, points=points)
+    elif kind == "steps":
+        levels = [float(v) for v in raw.get("levels_mbps", [])]
+        if not levels:
+            raise ValueError("Enveloppe steps: `levels_mbps` requis")
+        env = Envelope(kind, levels_mbps=levels, step_s=float(raw.get("step_s", duration_s / len(levels))))
+        if env.step_s <= 0:
+            raise ValueError("Enveloppe steps: `step_s` doit être > 0")
+    else:
+        env = Envelope(
+            kind,
+            low_mbps=float(raw.get("low_mbps", 0.0)),
+            high_mbps=float(raw.get("high_mbps", default_mbps)),
+            period_s=float(raw.get("period_s", duration_s)),
+            duty=float(raw.get("duty", 0.5)),
+        )
+        if env.period_s <= 0 or not 0 < env.duty < 1:
+            raise ValueError(f"Enveloppe {kind}: `period_s` > 0 et 0 < `duty` < 1 requis")
+    values = [v for _, v in env.points] + env.levels_mbps + [env.low_mbps, env.high_mbps]
+    if env.peak_mbps <= 0 or min(values) < 0:
+        raise ValueError(f"Enveloppe {kind}: débits positifs et crête > 0 requis")
+    return env
+
+
+async def follow(envelope: Envelope, rate, duration_s: float):
+    """Applique l'enveloppe à `rate` (`generator.RateControl`) tous les `UPDATE_S` jusqu'à `duration_s`."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    k = 0
+    while k * UPDATE_S < duration_s:
+        rate.set(envelope.rate_mbps(k * UPDATE_S) * 1_000_000)
+        k += 1
+        await asyncio.sleep(max(start + k * UPDATE_S - loop.time(), 0.0))
+
+
+__all__ = ["Envelope", "parse_envelope", "follow", "ENVELOPE_KINDS", "UPDATE_S"]
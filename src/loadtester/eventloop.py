@@ -0,0 +1,82 @@
+"""Choix de la boucle d'événements utilisée par tous les points d'entrée.
+
+`auto` utilise uvloop s'il est installé (`pip install wifi-loadtester[fast]`,
+non disponible sous Windows) et retombe sinon sur la boucle asyncio standard.
+Son coût par callback est nettement plus faible à haut débit de paquets.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from typing import Any, Awaitable, Callable, TypeVar
+
+BACKENDS = ("auto", "asyncio", "uvloop")
+
+T = TypeVar("T")
+
+
+def resolve_backend(name: str | None = "auto") -> str:
+    """Retourne la boucle réellement utilisable: `asyncio` ou `uvloop`."""
+    name = (name or "auto").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Boucle inconnue {name!r} (choix: {', '.join(BACKENDS)})")
+    if name == "asyncio":
+        return "asyncio"
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        if name == "uvloop":
+            logging.warning("uvloop n'est pas installé, repli sur la boucle asyncio standard")
+        return "asyncio"
+    return "uvloop"
+
+
+def loop_factory(name: str | None = "auto") -> Callable[[], asyncio.AbstractEventLoop]:
+    if resolve_backend(name) == "uvloop":
+        import uvloop
+
+        return uvloop.new_event_loop
+    return asyncio.new_event_loop
+
+
+def new_event_loop(name: str | None = "auto") -> asyncio.AbstractEventLoop:
+    """Équivalent de `asyncio.new_event_loop()` pour les threads (GUI)."""
+    return loop_factory(name)()
+
+
+def run(main: Awaitable[T], name: str | None = "auto") -> T:
+    """Équivalent de `asyncio.run(main)` avec la boucle choisie."""
+    factory = loop_factory(name)
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=factory) as runner:
+            return runner.run(main)
+    loop = factory()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        _cancel_all_tasks(loop)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _cancel_all_tasks(loop: asyncio.AbstractEventLoop):
+    pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
+    for t in pending:
+        t.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+
+
+def add_loop_argument(parser: Any):
+    """Ajoute l'option `--loop` commune aux points d'entrée."""
+    parser.add_argument(
+        "--loop",
+        choices=BACKENDS,
+        help="Boucle d'événements: auto (uvloop si disponible), asyncio ou uvloop",
+    )
+
+
+__all__ = ["BACKENDS", "resolve_backend", "loop_factory", "new_event_loop", "run", "add_loop_argument"]
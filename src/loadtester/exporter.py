@@ -0,0 +1,252 @@
+"""Exposition OpenMetrics (Prometheus) des compteurs en direct.
+
+    loadtester-receiver --metrics-port 9464
+    loadtester --config config/example.yaml --metrics-port 9465
+    curl http://127.0.0.1:9464/metrics
+
+Serveur HTTP minimal sur la boucle asyncio du processus: ni thread ni
+dépendance. Chaque requête appelle les collecteurs. Ils ne font que lire des
+compteurs déjà tenus par le chemin chaud: pas de verrou, rien de calculé par
+paquet pour l'exposition. L'écoute se fait par défaut sur 127.0.0.1
+(`--metrics-host 0.0.0.0` pour un Prometheus distant).
+
+Les histogrammes `Log2Histogram` sont exposés tels quels: un seau par
+puissance de 2, sans `_sum`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+T = TypeVar("T")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricFamily:
+    """Une famille de métriques (`counter`, `gauge` ou `histogram`) et ses échantillons."""
+
+    __slots__ = ("name", "type", "help", "samples")
+
+    def __init__(self, name: str, type: str, help: str):
+        self.name = name
+        self.type = type
+        self.help = help
+        self.samples: List[Tuple[str, dict, float]] = []
+
+    def add(self, value: float, **labels: str):
+        suffix = "_total" if self.type == "counter" else ""
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def add_log2(self, counts: List[int], per_unit: float, **labels: str):
+        """Seaux d'un `Log2Histogram` (`per_unit` valeurs entières par unité exposée, ex: 1e6 µs/s)."""
+        cumulative = 0
+        last = len(counts) - 1
+        for i, c in enumerate(counts):
+            cumulative += c
+            le = "+Inf" if i == last else _number(((1 << i) - 1) / per_unit)
+            self.samples.append(("_bucket", dict(labels, le=le), cumulative))
+        return self
+
+    def render(self) -> str:
+        lines = [f"# TYPE {self.name} {self.type}", f"# HELP {self.name} {_escape(self.help)}"]
+        for suffix, labels, value in self.samples:
+            label_text = ""
+            if labels:
+                label_text = "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+            lines.append(f"{self.name}{suffix}{label_text} {_number(value)}")
+        return "\n".join(lines)
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    return "\n".join(f.render() for f in families if f.samples) + "\n# EOF\n"
+
+
+def process_families() -> List[MetricFamily]:
+    """CPU consommé par le processus (sans psutil: le récepteur reste léger)."""
+    return [MetricFamily("process_cpu_seconds", "counter", "CPU utilisateur + système du processus").add(time.process_time())]
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class MetricsServer:
+    def __init__(self, port: int, host: str = DEFAULT_METRICS_HOST):
+        self.host = host
+        self.port = port
+        self.collectors: List[Collector] = [process_families]
+        self.scrapes = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def add_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def collect(self) -> str:
+        families: List[MetricFamily] = []
+        for collector in self.collectors:
+            try:
+                families.extend(collector())
+            except Exception:  # un collecteur en échec ne doit pas casser l'exposition
+                logging.exception("Collecteur de métriques en échec")
+        return render(families)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info("Métriques OpenMetrics: http://%s:%s/metrics", self.host, self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+                status, ctype, body = "405 Method Not Allowed", "text/plain", b""
+            elif parts[1].split("?")[0] not in ("/metrics", "/"):
+                status, ctype, body = "404 Not Found", "text/plain", b""
+            else:
+                self.scrapes += 1
+                status, ctype, body = "200 OK", CONTENT_TYPE, self.collect().encode()
+            head = f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            writer.write(head.encode() + (body if parts[:1] != ["HEAD"] else b""))
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def add_metrics_arguments(parser):
+    """Ajoute `--metrics-port` / `--metrics-host` communs aux points d'entrée émetteurs."""
+    parser.add_argument("--metrics-port", type=int, help="Expose les compteurs en OpenMetrics sur ce port HTTP (/metrics)")
+    parser.add_argument("--metrics-host", default=DEFAULT_METRICS_HOST, help="Adresse d'écoute des métriques")
+
+
+def run_metrics_from_args(args) -> Tuple[Optional["RunMetrics"], Optional[MetricsServer]]:
+    """(`RunMetrics`, serveur) si `--metrics-port` est donné, sinon (None, None)."""
+    if getattr(args, "metrics_port", None) is None:
+        return None, None
+    metrics = RunMetrics()
+    server = MetricsServer(args.metrics_port, args.metrics_host)
+    server.add_collector(metrics.collect)
+    return metrics, server
+
+
+async def serving(server: Optional[MetricsServer], coro: Awaitable[T]) -> T:
+    """Exécute `coro` avec `server` à l'écoute (aucun serveur si None)."""
+    if server is None:
+        return await coro
+    await server.start()
+    try:
+        return await coro
+    finally:
+        await server.close()
+
+
+class RunMetrics:
+    """Compteurs en direct d'un émetteur (runner, stress, soak) pour l'exposition.
+
+    Le palier en cours attache sa `SenderProbe` et sa sonde de latence; à la
+    fin du palier leurs compteurs sont cumulés, les compteurs exposés restent
+    donc monotones d'un palier à l'autre. L'histogramme de la sonde n'est
+    jamais remis à zéro (sonde partagée par une session, voir session): seuls
+    les RTT ajoutés depuis `attach` sont comptés pour le palier.
+    """
+
+    def __init__(self):
+        self.phase = ""
+        self.target_mbps = 0.0
+        self.phases_done = 0
+        self.bytes_done = 0
+        self.calls_done = 0
+        self.probe = None
+        self.latency = None
+        self.rtt_counts: List[int] = [0] * 32  # RTT en µs des paliers terminés
+        self._rtt_base: List[int] = []  # histogramme de la sonde au moment d'`attach`
+
+    def attach(self, phase: str, target_mbps: float, probe, latency=None):
+        self.phase = phase
+        self.target_mbps = target_mbps
+        self.probe = probe
+        self.latency = latency
+        self._rtt_base = list(latency.hist.counts) if latency is not None else []
+
+    def detach(self):
+        if self.probe is not None:
+            self.bytes_done += self.probe.bytes_sent
+            self.calls_done += self.probe.sendto_calls
+        if self.latency is not None:
+            self.rtt_counts = [a + b for a, b in zip(self.rtt_counts, self.latency.hist.diff(self._rtt_base).counts)]
+        self.phases_done += 1
+        self.probe = self.latency = None
+
+    def collect(self) -> List[MetricFamily]:
+        probe, latency = self.probe, self.latency
+        labels = {"phase": self.phase} if self.phase else {}
+        families = [
+            MetricFamily("loadtester_sender_bytes", "counter", "Octets émis").add(
+                self.bytes_done + (probe.bytes_sent if probe else 0)),
+            MetricFamily("loadtester_sender_send_calls", "counter", "Appels sendto/write").add(
+                self.calls_done + (probe.sendto_calls if probe else 0)),
+            MetricFamily("loadtester_sender_phases", "counter", "Paliers terminés").add(self.phases_done),
+        ]
+        if probe is not None:
+            families.append(MetricFamily("loadtester_sender_target_mbps", "gauge", "Débit cible du palier").add(
+                self.target_mbps, **labels))
+            if probe.samples:
+                s = probe.samples[-1]
+                families += [
+                    MetricFamily("loadtester_sender_mbps", "gauge", "Débit émis (dernière seconde)").add(s.mbps, **labels),
+                    MetricFamily("loadtester_sender_loop_lag_seconds", "gauge", "Retard de réveil moyen de la boucle").add(
+                        s.loop_lag_ms_avg / 1000, **labels),
+                    MetricFamily("loadtester_sender_loop_lag_max_seconds", "gauge", "Retard de réveil max de la boucle").add(
+                        s.loop_lag_ms_max / 1000, **labels),
+                    MetricFamily("loadtester_sender_pacing_error_seconds", "gauge", "Retard moyen sur l'échéancier").add(
+                        s.pacing_error_ms_avg / 1000, **labels),
+                    MetricFamily("loadtester_sender_cpu_percent", "gauge", "CPU du processus émetteur").add(
+                        s.proc_cpu_pct, **labels),
+                ]
+        rtt = self.rtt_counts
+        if latency is not None:
+            rtt = [a + b for a, b in zip(rtt, latency.hist.diff(self._rtt_base).counts)]
+            families += [
+                MetricFamily("loadtester_latency_seconds", "gauge", "Dernier RTT de la sonde de latence").add(
+                    latency.latency_ms / 1000, **labels),
+                MetricFamily("loadtester_latency_loss_ratio", "gauge", "Perte des échos depuis le début du palier").add(
+                    latency.loss_pct / 100, **labels),
+            ]
+        families.append(MetricFamily("loadtester_latency_rtt_seconds", "histogram", "RTT de la sonde de latence").add_log2(
+            rtt, 1e6))
+        return families
+
+
+__all__ = [
+    "MetricFamily", "MetricsServer", "RunMetrics", "render", "serving", "process_families",
+    "add_metrics_arguments", "run_metrics_from_args", "DEFAULT_METRICS_HOST",
+]
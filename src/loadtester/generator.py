@@ -1,14 +1,36 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import logging
 import socket
+import struct
 import time
-from dataclasses import dataclass
-from typing import Literal, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Literal, Optional, Sequence
+
+from .wire import EXT_FLAG, EXT_HEADER, FLAG_FEEDBACK, Feedback, unpack_feedback
+
+if TYPE_CHECKING:
+    from .instrument import SenderProbe
 
 
 Protocol = Literal["UDP", "TCP"]
 
+# Retard de pacing au-delà duquel l'échéancier est recalé (évite une rafale de rattrapage).
+_MAX_BACKLOG_S = 0.1
+# Envois consécutifs sans rendre la main quand l'émetteur est en retard.
+_MAX_BURST = 32
+_SEQ = struct.Struct("!Q")
+# Datagrammes de retour lus au maximum par réveil
+_FEEDBACK_BATCH = 16
+# Attente du dernier retour du récepteur après le dernier envoi
+_FEEDBACK_LINGER_S = 0.25
+# Sommeil maximal quand le débit peut changer en cours d'envoi (`RateControl`)
+_RATE_POLL_S = 0.05
+
+FeedbackCallback = Callable[[tuple, Feedback], None]
+
 
 @dataclass
 class TrafficStats:
@@ -22,105 +44,618 @@ class TrafficStats:
         return (self.bytes_sent * 8 / 1_000_000) / self.duration_s
 
 
-async def _send_udp(host: str, port: int, packet_size: int, target_bps: float, duration: float, sequence: bool = True):
-    """Envoie UDP avec pacing approximatif.
+class RateControl:
+    """Débit total (bps) modifiable pendant l'envoi (boucle fermée, enveloppes).
+
+    Chaque flux garde sa part de `reference` (le débit à la création, celui
+    passé au générateur); l'émetteur recalcule ses intervalles quand
+    `generation` change. `limit` plafonne le débit quelle que soit la
+    consigne (garde-fou); l'émetteur suit `effective`.
+    """
+
+    __slots__ = ("bps", "generation", "reference", "cap")
+
+    def __init__(self, bps: float):
+        self.bps = bps
+        self.generation = 0
+        self.reference = bps
+        self.cap = float("inf")
+
+    def set(self, bps: float):
+        self.bps = bps
+        self.generation += 1
+
+    def limit(self, cap_bps: float):
+        self.cap = cap_bps
+        self.generation += 1
+
+    @property
+    def effective(self) -> float:
+        return min(self.bps, self.cap)
+
+
+class SocketPool:
+    """Sockets UDP et connexions TCP réutilisés d'un palier à l'autre (moteur GUI, session).
+
+    Un socket réutilisé garde son port source: le récepteur voit le même flux,
+    dont la séquence repart de 0 au palier suivant. Une connexion TCP rendue au
+    pool reste ouverte: le palier suivant l'utilise sans poignée de main ni
+    slow-start (voir session).
+    """
+
+    def __init__(self, max_idle: int = 256):
+        self.max_idle = max_idle
+        # Source (None = route par défaut) -> sockets UDP inutilisés, liés à cette source
+        self._idle: Dict[Optional[Source], list[socket.socket]] = {}
+        # (hôte, port, source) -> connexions ouvertes inutilisées
+        self._tcp: Dict[tuple, list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.tcp_opened = 0
+        self.tcp_reused = 0
+
+    def acquire_udp(self, source: Optional[Source] = None) -> socket.socket:
+        idle = self._idle.get(source)
+        if idle:
+            return idle.pop()
+        return _new_udp_socket(source)
+
+    def release(self, sock: socket.socket, source: Optional[Source] = None):
+        idle = self._idle.setdefault(source, [])
+        if len(idle) < self.max_idle:
+            idle.append(sock)
+        else:
+            sock.close()
+
+    async def open_tcp(
+        self, host: str, port: int, source: Optional[Source] = None
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Connexion inutilisée vers (host, port) si elle est encore ouverte, sinon nouvelle connexion."""
+        idle = self._tcp.get((host, port, source))
+        while idle:
+            reader, writer = idle.pop()
+            # Récepteur redémarré ou connexion coupée pendant la pause
+            if not writer.is_closing() and not reader.at_eof():
+                self.tcp_reused += 1
+                return reader, writer
+            writer.close()
+        conn = await _open_tcp(host, port, source)
+        self.tcp_opened += 1
+        return conn
+
+    def release_tcp(
+        self,
+        host: str,
+        port: int,
+        conn: tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        source: Optional[Source] = None,
+    ):
+        idle = self._tcp.setdefault((host, port, source), [])
+        if len(idle) < self.max_idle:
+            idle.append(conn)
+        else:
+            conn[1].close()
+
+    def close(self):
+        for socks in self._idle.values():
+            for sock in socks:
+                sock.close()
+        self._idle.clear()
+        for conns in self._tcp.values():
+            for _, writer in conns:
+                writer.close()
+        self._tcp.clear()
+
+
+@dataclass(frozen=True)
+class Source:
+    """Origine des paquets (émetteur multi-interfaces); `share` est un poids relatif du débit.
+
+    `interface` lie les sockets à une carte (SO_BINDTODEVICE): les paquets
+    sortent par cette radio quelle que soit la route par défaut. Sans ce droit
+    (Linux sans CAP_NET_RAW, Windows, macOS), le socket est lié à l'adresse
+    IPv4 de l'interface. La sortie dépend alors du routage par adresse source.
+    `address` lie les sockets à une adresse locale.
+    """
+
+    interface: str = ""
+    address: str = ""
+    share: float = 1.0
+
+    @property
+    def label(self) -> str:
+        return self.interface or self.address
+
+
+# Interfaces déjà signalées comme liées par adresse (un avertissement par interface)
+_DEVICE_FALLBACK: set = set()
+
+
+def _interface_address(interface: str) -> Optional[str]:
+    import psutil
+
+    for a in psutil.net_if_addrs().get(interface, []):
+        if a.family == socket.AF_INET:
+            return a.address
+    return None
+
+
+def _bind_source(sock: socket.socket, source: Source):
+    """Lie le socket à l'interface et/ou à l'adresse de `source` (avant tout envoi ou connect)."""
+    address = source.address
+    if source.interface:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, source.interface.encode())
+        except (OSError, AttributeError) as e:
+            fallback = address or _interface_address(source.interface)
+            if not fallback:
+                raise OSError(f"interface {source.interface}: SO_BINDTODEVICE refusé ({e}) et aucune adresse IPv4") from e
+            if source.interface not in _DEVICE_FALLBACK:
+                _DEVICE_FALLBACK.add(source.interface)
+                logging.warning(
+                    "SO_BINDTODEVICE %s indisponible (%s): liaison à l'adresse %s, "
+                    "la sortie dépend du routage par adresse source",
+                    source.interface, e, fallback,
+                )
+            address = fallback
+    if address:
+        sock.bind((address, 0))
+
+
+def _new_udp_socket(source: Optional[Source] = None) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    if source is not None:
+        try:
+            _bind_source(sock, source)
+        except OSError:
+            sock.close()
+            raise
+    return sock
+
+
+async def _open_tcp(host: str, port: int, source: Optional[Source] = None):
+    """`asyncio.open_connection`, socket lié à `source` avant le connect."""
+    if source is None:
+        return await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_STREAM)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        _bind_source(sock, source)
+        await loop.sock_connect(sock, infos[0][4])
+    except BaseException:
+        sock.close()
+        raise
+    return await asyncio.open_connection(sock=sock)
+
+
+def _set_dscp(sock: socket.socket, dscp: int) -> bool:
+    """Marque les paquets du socket (octet TOS = DSCP << 2, ECN à 0)."""
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, dscp << 2)
+    except (OSError, AttributeError) as e:
+        # Windows ignore ou refuse IP_TOS sans stratégie QoS de groupe
+        logging.debug("IP_TOS %s refusé: %s", dscp, e)
+        return False
+    return True
+
+
+class _UdpFlow:
+    """Socket et échéancier de pacing d'un flux UDP vers une destination."""
+
+    __slots__ = ("sock", "addr", "interval", "seq", "bytes_sent", "buf", "sequence", "share")
+
+    def __init__(self, sock: socket.socket, addr: tuple, packet_size: int, bps: float, sequence: bool):
+        self.sock = sock
+        self.addr = addr
+        self.buf = bytearray(b"X" * max(packet_size, 1))
+        self.set_rate(bps)
+        self.seq = 0
+        self.bytes_sent = 0
+        self.sequence = sequence and packet_size >= 8
+        self.share = 1.0
+
+    def set_rate(self, bps: float):
+        pps = bps / (len(self.buf) * 8)
+        self.interval = 1.0 / pps if pps > 0 else 1.0
+
+
+async def _send_udp(
+    addrs: Sequence[tuple],
+    rates_bps: Sequence[float],
+    packet_size: int,
+    duration: float,
+    sequence: bool = True,
+    probe: Optional["SenderProbe"] = None,
+    pool: Optional[SocketPool] = None,
+    rate: Optional[RateControl] = None,
+    on_feedback: Optional[FeedbackCallback] = None,
+    dscp: int = 0,
+    timestamps: bool = False,
+    stop: Optional[asyncio.Event] = None,
+    source: Optional[Source] = None,
+):
+    """Envoie UDP vers une ou plusieurs destinations avec pacing par échéancier.
 
     Si sequence=True, insère un numéro de séquence 8 octets big-endian au début
     du paquet permettant au récepteur d'estimer la perte.
+
+    Chaque destination a son socket et ses échéances `start + n * interval`;
+    un tas les ordonne pour qu'une seule tâche serve toutes les destinations
+    (le coût d'une cible supplémentaire est une entrée du tas, pas une tâche).
+    En retard, l'émetteur envoie jusqu'à `_MAX_BURST` paquets d'affilée avant
+    de rendre la main. Avec un `probe`, le retard sur l'échéance et le temps
+    passé dans `sendto` sont comptabilisés.
+
+    Boucle fermée: avec `rate`, chaque flux suit sa part de `rate.bps`; avec
+    `on_feedback`, les paquets portent l'en-tête étendu (heure d'envoi) et
+    demandent au récepteur un retour, passé à `on_feedback(adresse locale, Feedback)`.
+    `dscp` marque les paquets (IP_TOS); `timestamps` force l'en-tête étendu
+    (heure d'envoi + classe) pour le délai aller par classe côté récepteur.
+    `stop` (évènement) termine l'envoi avant `duration` (voir scheduler).
+    `source` lie les sockets à une interface ou une adresse locale.
+
+    Retourne (octets envoyés par destination, durée).
     """
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    seq = 0
-    header_size = 8 if sequence and packet_size >= 8 else 0
-    body_size = max(packet_size - header_size, 0)
-    body = b"X" * body_size
-    bytes_sent = 0
-    start = time.time()
-    pps = target_bps / max(packet_size * 8, 1)
-    if pps <= 0:
-        pps = 1
-    interval = 1.0 / pps
+    acquire = pool.acquire_udp if pool is not None else _new_udp_socket
+    flows = []
+    try:
+        for a, bps in zip(addrs, rates_bps):
+            if bps > 0:
+                flows.append(_UdpFlow(acquire(source), a, packet_size, bps, sequence))
+    except OSError:
+        for f in flows:
+            f.sock.close()
+        raise
+    # Avec `rate`, le débit courant est appliqué dès le premier envoi (generation = -1)
+    generation = -1
+    if rate is not None:
+        # Part du débit global (plusieurs connexions partagent le même `rate`)
+        for f, bps in zip(flows, (b for b in rates_bps if b > 0)):
+            f.share = bps / rate.reference if rate.reference > 0 else 0.0
+    if dscp:
+        for f in flows:
+            _set_dscp(f.sock, dscp)
+    extended = (on_feedback is not None or timestamps) and packet_size >= EXT_HEADER.size
+    flags = FLAG_FEEDBACK if on_feedback is not None else 0
+    loop = asyncio.get_running_loop()
+    if on_feedback is not None:
+        for f in flows:
+            loop.add_reader(f.sock.fileno(), _read_feedback, f.sock, on_feedback)
+    clock = time.perf_counter
+    start = clock()
+    end = start + duration
+    heap = [(start, i) for i in range(len(flows))]
+    burst = 0
+    try:
+        while heap:
+            now = clock()
+            if now >= end or (stop is not None and stop.is_set()):
+                break
+            if rate is not None and rate.generation != generation:
+                generation = rate.generation
+                for fl in flows:
+                    fl.set_rate(rate.effective * fl.share)
+                # Un flux presque à l'arrêt (échéance lointaine) repart sans attendre son ancienne échéance
+                heap = [(min(d, now + flows[j].interval), j) for d, j in heap]
+                heapq.heapify(heap)
+            due, i = heap[0]
+            if due > now:
+                burst = 0
+                await asyncio.sleep(due - now if rate is None and stop is None else min(due - now, _RATE_POLL_S))
+                continue
+            f = flows[i]
+            if extended:
+                EXT_HEADER.pack_into(f.buf, 0, f.seq | EXT_FLAG, time.time_ns(), flags, dscp)
+            elif f.sequence:
+                _SEQ.pack_into(f.buf, 0, f.seq)
+            try:
+                if probe is not None:
+                    t0 = time.perf_counter_ns()
+                    f.sock.sendto(f.buf, f.addr)
+                    probe.sendto_ns += time.perf_counter_ns() - t0
+                    probe.sendto_calls += 1
+                    probe.bytes_sent += len(f.buf)
+                    probe.pacing_err_ns += int((now - due) * 1e9)
+                    probe.pacing_samples += 1
+                else:
+                    f.sock.sendto(f.buf, f.addr)
+            except BlockingIOError:
+                # Tampon d'émission plein: on réessaie à la prochaine échéance
+                pass
+            except Exception:
+                heapq.heappop(heap)
+                continue
+            else:
+                f.bytes_sent += len(f.buf)
+                f.seq += 1
+            nxt = due + f.interval
+            if nxt < now - _MAX_BACKLOG_S:
+                nxt = now - _MAX_BACKLOG_S
+            heapq.heapreplace(heap, (nxt, i))
+            burst += 1
+            if burst >= _MAX_BURST:
+                burst = 0
+                await asyncio.sleep(0)
+        elapsed = clock() - start
+        if on_feedback is not None:
+            await asyncio.sleep(_FEEDBACK_LINGER_S)
+    finally:
+        for f in flows:
+            if on_feedback is not None:
+                loop.remove_reader(f.sock.fileno())
+                _drain(f.sock)
+            if pool is not None:
+                if dscp:
+                    _set_dscp(f.sock, 0)
+                pool.release(f.sock, source)
+            else:
+                f.sock.close()
+    sent = iter(f.bytes_sent for f in flows)
+    return [next(sent) if bps > 0 else 0 for bps in rates_bps], elapsed
+
+
+def _drain(sock: socket.socket):
+    """Vide les retours en attente avant de rendre le socket au pool."""
     while True:
-        now = time.time()
-        if now - start >= duration:
-            break
-        if header_size:
-            payload = seq.to_bytes(8, 'big', signed=False) + body
-        else:
-            payload = body if body_size else b"X"
         try:
-            sock.sendto(payload, (host, port))
-        except Exception:
-            break
-        bytes_sent += len(payload)
-        seq += 1
-        await asyncio.sleep(interval)
-    return bytes_sent, time.time() - start
+            sock.recv(256)
+        except OSError:
+            return
+
+
+def _read_feedback(sock: socket.socket, on_feedback: FeedbackCallback):
+    local = sock.getsockname()
+    for _ in range(_FEEDBACK_BATCH):
+        try:
+            data = sock.recv(256)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            return
+        fb = unpack_feedback(data)
+        if fb is not None:
+            on_feedback(local, fb)
 
 
-async def _send_tcp(host: str, port: int, packet_size: int, target_bps: float, duration: float):
+async def _send_tcp(
+    host: str,
+    port: int,
+    packet_size: int,
+    target_bps: float,
+    duration: float,
+    probe: Optional["SenderProbe"] = None,
+    dscp: int = 0,
+    rate: Optional[RateControl] = None,
+    stop: Optional[asyncio.Event] = None,
+    pool: Optional[SocketPool] = None,
+    source: Optional[Source] = None,
+):
+    """Envoie TCP à `target_bps`; avec `rate`, suit sa part de `rate.bps` (voir `RateControl`).
+
+    Avec `pool`, la connexion est prise dans le pool et lui est rendue ouverte à la fin.
+    `source` lie la connexion à une interface ou une adresse locale.
+    """
     try:
-        reader, writer = await asyncio.open_connection(host, port)
+        if pool is not None:
+            reader, writer = await pool.open_tcp(host, port, source)
+        else:
+            reader, writer = await _open_tcp(host, port, source)
     except Exception as e:
+        if source is not None:
+            logging.warning("Connexion TCP %s:%s via %s impossible: %s", host, port, source.label, e)
         # Indiquer échec en retournant 0 durée (géré plus haut)
         return 0, 0.0
+    if dscp:
+        _set_dscp(writer.get_extra_info("socket"), dscp)
     payload = b"X" * packet_size
     bytes_sent = 0
-    start = time.time()
-    # naive pacing using sleep to approach target_bps
-    loop = asyncio.get_running_loop()
-    while time.time() - start < duration:
-        writer.write(payload)
-        await writer.drain()
-        bytes_sent += len(payload)
-        elapsed = time.time() - start
-        if elapsed > 0:
-            current_bps = bytes_sent * 8 / elapsed
-            if current_bps > target_bps:
-                # back off a bit
-                await asyncio.sleep(packet_size * 8 / target_bps)
-    writer.close()
-    await writer.wait_closed()
-    return bytes_sent, time.time() - start
+    share = target_bps / rate.reference if rate is not None and rate.reference > 0 else 1.0
+    generation = -1
+    bps = target_bps
+    # Origine du pacing (octets, instant), recalée à chaque changement de débit
+    base_bytes, base_t = 0, 0.0
+    poll = _RATE_POLL_S if rate is not None or stop is not None else float("inf")
+    clock = time.perf_counter
+    start = clock()
+    try:
+        while True:
+            elapsed = clock() - start
+            if elapsed >= duration or (stop is not None and stop.is_set()):
+                break
+            if rate is not None and rate.generation != generation:
+                generation = rate.generation
+                # L'avance déjà prise au débit précédent reste due (pas de rafale au changement)
+                owed = (bytes_sent - base_bytes) * 8 / bps - (elapsed - base_t) if bps > 0 else 0.0
+                bps = rate.effective * share
+                base_bytes, base_t = bytes_sent, elapsed + max(owed, 0.0)
+            if bps <= 0:
+                await asyncio.sleep(min(poll, duration - elapsed))
+                continue
+            # Pacing par échéance: attendre tant que l'envoi est en avance sur le débit courant
+            ahead = (bytes_sent - base_bytes) * 8 / bps - (elapsed - base_t)
+            if ahead > 0:
+                await asyncio.sleep(min(ahead, duration - elapsed, poll))
+                continue
+            if probe is not None:
+                t0 = time.perf_counter_ns()
+                writer.write(payload)
+                probe.sendto_ns += time.perf_counter_ns() - t0
+                probe.sendto_calls += 1
+                probe.bytes_sent += len(payload)
+            else:
+                writer.write(payload)
+            await writer.drain()
+            bytes_sent += len(payload)
+    except BaseException:
+        # Connexion dans un état inconnu (coupée, palier annulé): jamais rendue au pool
+        writer.close()
+        raise
+    elapsed = clock() - start
+    if pool is not None:
+        if dscp:
+            _set_dscp(writer.get_extra_info("socket"), 0)
+        pool.release_tcp(host, port, (reader, writer), source)
+    else:
+        writer.close()
+        await writer.wait_closed()
+    return bytes_sent, elapsed
 
 
-async def generate_traffic(
+@dataclass
+class Destination:
+    """Cible d'envoi; `share` est un poids relatif de la part du débit."""
+
+    host: str
+    port: int
+    share: float = 1.0
+    name: str = ""
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.host}:{self.port}"
+
+
+@dataclass
+class FanoutStats:
+    per_target: Dict[str, TrafficStats]
+    total: TrafficStats
+    # Émission multi-interfaces: débit par source (`Source.label`), vide sans `sources`
+    per_source: Dict[str, TrafficStats] = field(default_factory=dict)
+
+
+async def generate_fanout(
     protocol: Protocol,
-    host: str,
-    port: int,
+    destinations: Sequence[Destination],
     packet_size: int,
     target_bandwidth_mbps: float,
     connections: int,
     duration_s: float,
     udp_sequence: bool = True,
-) -> TrafficStats:
+    probe: Optional["SenderProbe"] = None,
+    pool: Optional[SocketPool] = None,
+    rate: Optional[RateControl] = None,
+    on_feedback: Optional[FeedbackCallback] = None,
+    dscp: int = 0,
+    timestamps: bool = False,
+    stop: Optional[asyncio.Event] = None,
+    sources: Sequence[Source] = (),
+) -> FanoutStats:
+    """Envoie vers plusieurs destinations en parallèle.
+
+    `connections` est le nombre de connexions par destination. Le débit total
+    est réparti entre destinations selon `share`, puis entre connexions.
+    `rate` fait varier le débit en cours d'envoi (boucle fermée de `goodput`,
+    enveloppes); `on_feedback` (UDP seulement) sert à la boucle fermée.
+    `dscp` marque tous les sockets; `timestamps` (UDP) horodate les paquets.
+    `stop` termine l'envoi avant `duration_s` (fin anticipée du palier).
+
+    Avec `sources` (une par radio), le débit est d'abord réparti entre
+    sources selon leur `share`. Chaque source ouvre ensuite `connections`
+    connexions par destination, liées à son interface ou à son adresse.
+    """
     target_bps = target_bandwidth_mbps * 1_000_000
-    per_conn_bps = target_bps / max(connections, 1)
-
-    tasks = []
-    for _ in range(connections):
-        if protocol == "UDP":
-            tasks.append(
-                asyncio.create_task(
-                    _send_udp(host, port, packet_size, per_conn_bps, duration_s, sequence=udp_sequence)
-                )
-            )
-        else:
-            tasks.append(
-                asyncio.create_task(
-                    _send_tcp(host, port, packet_size, per_conn_bps, duration_s)
+    conns = max(connections, 1)
+    total_share = sum(max(d.share, 0.0) for d in destinations) or 1.0
+    per_conn_bps = [target_bps * max(d.share, 0.0) / total_share / conns for d in destinations]
+    addrs = [(d.host, d.port) for d in destinations]
+    origins: list[Optional[Source]] = list(sources) or [None]
+    source_total = sum(max(src.share, 0.0) for src in sources) or 1.0
+
+    # (index source, index destination | None pour toutes, tâche)
+    tasks: list[tuple[int, Optional[int], asyncio.Task]] = []
+    for si, src in enumerate(origins):
+        fraction = max(src.share, 0.0) / source_total if src is not None else 1.0
+        if fraction <= 0:
+            continue
+        rates_bps = [bps * fraction for bps in per_conn_bps]
+        for _ in range(conns):
+            if protocol == "UDP":
+                tasks.append(
+                    (si, None, asyncio.create_task(
+                        _send_udp(
+                            addrs, rates_bps, packet_size, duration_s,
+                            sequence=udp_sequence, probe=probe, pool=pool,
+                            rate=rate, on_feedback=on_feedback, dscp=dscp, timestamps=timestamps, stop=stop,
+                            source=src,
+                        )
+                    ))
                 )
-            )
-    total_bytes = 0
-    durations = []
-    for t in tasks:
+            else:
+                for i, d in enumerate(destinations):
+                    if rates_bps[i] <= 0:
+                        continue
+                    tasks.append(
+                        (si, i, asyncio.create_task(
+                            _send_tcp(
+                                d.host, d.port, packet_size, rates_bps[i], duration_s,
+                                probe=probe, dscp=dscp, rate=rate, stop=stop, pool=pool, source=src,
+                            )
+                        ))
+                    )
+    per_bytes = [0] * len(destinations)
+    per_durations: list[list[float]] = [[] for _ in destinations]
+    source_bytes = [0] * len(origins)
+    source_durations: list[list[float]] = [[] for _ in origins]
+    for si, idx, t in tasks:
         try:
             b, d = await t
-            total_bytes += b
-            durations.append(d)
-        except Exception:
-            pass
-    duration = max(durations) if durations else duration_s
-    return TrafficStats(total_bytes, duration)
+        except Exception as e:
+            if sources:
+                logging.warning("Envoi via %s en échec: %s", origins[si].label, e)
+            continue
+        if idx is None:
+            for i, nbytes in enumerate(b):
+                per_bytes[i] += nbytes
+                per_durations[i].append(d)
+            source_bytes[si] += sum(b)
+        else:
+            per_bytes[idx] += b
+            per_durations[idx].append(d)
+            source_bytes[si] += b
+        source_durations[si].append(d)
+    per_target = {
+        dest.label: TrafficStats(per_bytes[i], max(per_durations[i]) if per_durations[i] else duration_s)
+        for i, dest in enumerate(destinations)
+    }
+    all_durations = [d for ds in per_durations for d in ds]
+    total = TrafficStats(sum(per_bytes), max(all_durations) if all_durations else duration_s)
+    per_source = {
+        src.label: TrafficStats(source_bytes[si], max(source_durations[si]) if source_durations[si] else duration_s)
+        for si, src in enumerate(sources)
+    }
+    return FanoutStats(per_target, total, per_source)
+
+
+async def generate_traffic(
+    protocol: Protocol,
+    host: str,
+    port: int,
+    packet_size: int,
+    target_bandwidth_mbps: float,
+    connections: int,
+    duration_s: float,
+    udp_sequence: bool = True,
+    probe: Optional["SenderProbe"] = None,
+    pool: Optional[SocketPool] = None,
+    sources: Sequence[Source] = (),
+) -> TrafficStats:
+    stats = await generate_fanout(
+        protocol,
+        [Destination(host, port)],
+        packet_size,
+        target_bandwidth_mbps,
+        connections,
+        duration_s,
+        udp_sequence=udp_sequence,
+        probe=probe,
+        pool=pool,
+        sources=sources,
+    )
+    return stats.total
 
 
-__all__ = ["generate_traffic", "TrafficStats"]
+__all__ = [
+    "generate_traffic", "generate_fanout", "Destination", "FanoutStats", "RateControl", "SocketPool", "Source",
+    "TrafficStats",
+]
@@ -0,0 +1,243 @@
+"""Recherche du débit utile maximal en boucle fermée (UDP).
+
+Au lieu d'une échelle de paliers à débit fixe, l'émetteur ajuste son débit en
+continu à partir du retour du récepteur (`loadtester-receiver`, voir `wire`):
+perte et délai de mise en file d'attente, toutes les ~100 ms.
+
+Deux contrôleurs:
+- `AIMDController`: démarrage multiplicatif (x1.25 par retour) jusqu'au premier
+  dépassement, puis +`increase_mbps` par retour sans dépassement et x`decrease`
+  au dépassement;
+- `DelayGradientController`: même démarrage, puis x1.08 par retour; réagit dès
+  que le délai croît (pente en ms/s sur les derniers retours), avant que la
+  perte n'apparaisse; repli à 85 % du débit reçu.
+
+Dépassement = perte > `loss_threshold_pct` ou délai > `delay_threshold_ms`,
+les mêmes seuils que le mode stress. Après un repli, `holdoff` retours sont
+ignorés le temps que la file se vide.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .generator import Destination, RateControl, generate_fanout
+from .wire import Feedback
+
+CONTROLLERS = ("aimd", "delay")
+# Période de décision (le récepteur renvoie ses compteurs toutes les 100 ms par défaut)
+CONTROL_PERIOD_S = 0.1
+# Sans aucun retour après ce délai, le récepteur n'est pas là (ou trop ancien)
+FEEDBACK_TIMEOUT_S = 1.5
+
+
+@dataclass
+class FeedbackSample:
+    t_s: float
+    rate_mbps: float
+    recv_mbps: float
+    loss_pct: float
+    delay_ms: float
+
+
+class AIMDController:
+    name = "aimd"
+
+    def __init__(
+        self,
+        start_mbps: float,
+        max_mbps: float,
+        loss_threshold_pct: float,
+        delay_threshold_ms: float,
+        increase_mbps: Optional[float] = None,
+        decrease: float = 0.7,
+        min_mbps: float = 0.5,
+        holdoff: int = 3,
+    ):
+        self.rate_mbps = start_mbps
+        self.max_mbps = max_mbps
+        self.min_mbps = min_mbps
+        self.loss_threshold_pct = loss_threshold_pct
+        self.delay_threshold_ms = delay_threshold_ms
+        self.increase_mbps = increase_mbps or max(max_mbps / 100, 0.1)
+        self.decrease = decrease
+        self.holdoff = holdoff
+        self.slow_start = True
+        self._hold = 0
+
+    def congested(self, s: FeedbackSample) -> bool:
+        return s.loss_pct > self.loss_threshold_pct or s.delay_ms > self.delay_threshold_ms
+
+    def update(self, s: FeedbackSample) -> float:
+        if self._hold > 0:
+            self._hold -= 1
+        elif self.congested(s):
+            self.slow_start = False
+            self.rate_mbps *= self.decrease
+            self._hold = self.holdoff
+        elif self.slow_start:
+            self.rate_mbps *= 1.25
+        else:
+            self.rate_mbps += self.increase_mbps
+        self.rate_mbps = min(max(self.rate_mbps, self.min_mbps), self.max_mbps)
+        return self.rate_mbps
+
+
+class DelayGradientController(AIMDController):
+    name = "delay"
+
+    def __init__(self, *args, gradient_ms_per_s: float = 20.0, window: int = 5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gradient_ms_per_s = gradient_ms_per_s
+        self._delays: deque = deque(maxlen=window)
+
+    def _slope(self) -> float:
+        """Pente des moindres carrés du délai (ms/s) sur les derniers retours."""
+        n = len(self._delays)
+        if n < 3:
+            return 0.0
+        mt = sum(t for t, _ in self._delays) / n
+        md = sum(d for _, d in self._delays) / n
+        num = sum((t - mt) * (d - md) for t, d in self._delays)
+        den = sum((t - mt) ** 2 for t, _ in self._delays)
+        return num / den if den else 0.0
+
+    def update(self, s: FeedbackSample) -> float:
+        self._delays.append((s.t_s, s.delay_ms))
+        slope = self._slope()
+        if self._hold > 0:
+            self._hold -= 1
+        elif self.congested(s) or slope > self.gradient_ms_per_s:
+            self.slow_start = False
+            self.rate_mbps = min(self.rate_mbps, s.recv_mbps) * 0.85
+            self._hold = self.holdoff
+            self._delays.clear()
+        elif slope >= -self.gradient_ms_per_s:
+            # Délai stable: on sonde vers le haut (une file qui se vide ne bouge pas le débit)
+            self.rate_mbps *= 1.25 if self.slow_start else 1.08
+        self.rate_mbps = min(max(self.rate_mbps, self.min_mbps), self.max_mbps)
+        return self.rate_mbps
+
+
+def make_controller(name: str, start_mbps: float, max_mbps: float, loss_threshold_pct: float, delay_threshold_ms: float):
+    cls = {"aimd": AIMDController, "delay": DelayGradientController}.get(name)
+    if cls is None:
+        raise ValueError(f"Contrôleur inconnu {name!r} (choix: {', '.join(CONTROLLERS)})")
+    return cls(start_mbps, max_mbps, loss_threshold_pct, delay_threshold_ms)
+
+
+@dataclass
+class GoodputResult:
+    controller: str
+    goodput_mbps: float  # débit reçu moyen sur la seconde moitié (régime établi)
+    rate_mbps: float  # débit d'envoi moyen sur la même période
+    max_ok_mbps: float  # plus haut débit reçu sans dépassement des seuils
+    loss_pct: float
+    delay_ms: float
+    trace: List[FeedbackSample] = field(default_factory=list)
+
+
+async def find_goodput(
+    host: str,
+    port: int,
+    packet_size: int,
+    controller: AIMDController,
+    duration_s: float,
+    connections: int = 1,
+    probe=None,
+) -> GoodputResult:
+    """Envoie pendant `duration_s` en laissant `controller` piloter le débit."""
+    rate = RateControl(controller.rate_mbps * 1_000_000)
+    latest: Dict[tuple, Feedback] = {}
+    trace: List[FeedbackSample] = []
+
+    def on_feedback(local: tuple, fb: Feedback):
+        latest[local] = fb
+
+    async def control():
+        loop = asyncio.get_running_loop()
+        start = last = loop.time()
+        prev_recv = prev_lost = 0
+        while True:
+            await asyncio.sleep(CONTROL_PERIOD_S)
+            now = loop.time()
+            if not latest:
+                if now - start > FEEDBACK_TIMEOUT_S:
+                    raise RuntimeError(
+                        f"aucun retour de {host}:{port} (loadtester-receiver à jour lancé sur la cible?)"
+                    )
+                continue
+            recv = sum(fb.received for fb in latest.values())
+            lost = sum(fb.lost for fb in latest.values())
+            d_recv, d_lost = recv - prev_recv, lost - prev_lost
+            if d_recv + d_lost <= 0:
+                continue
+            dt = now - last
+            sample = FeedbackSample(
+                t_s=now - start,
+                rate_mbps=rate.bps / 1_000_000,
+                recv_mbps=d_recv * packet_size * 8 / 1_000_000 / dt,
+                loss_pct=d_lost / (d_recv + d_lost) * 100,
+                delay_ms=max(fb.queuing_delay_ms for fb in latest.values()),
+            )
+            trace.append(sample)
+            rate.set(controller.update(sample) * 1_000_000)
+            prev_recv, prev_lost, last = recv, lost, now
+
+    control_task = asyncio.create_task(control())
+    send_task = asyncio.create_task(
+        generate_fanout(
+            "UDP", [Destination(host, port)], packet_size, controller.rate_mbps, connections, duration_s,
+            probe=probe, rate=rate, on_feedback=on_feedback,
+        )
+    )
+    done, _ = await asyncio.wait({control_task, send_task}, return_when=asyncio.FIRST_COMPLETED)
+    if control_task in done:
+        send_task.cancel()
+        await asyncio.gather(send_task, return_exceptions=True)
+        control_task.result()  # propage l'absence de retour
+    control_task.cancel()
+    await asyncio.gather(control_task, return_exceptions=True)
+    return summarize(controller, trace)
+
+
+def summarize(controller: AIMDController, trace: List[FeedbackSample]) -> GoodputResult:
+    steady = trace[len(trace) // 2:]
+    if not steady:
+        return GoodputResult(controller.name, 0.0, 0.0, 0.0, 0.0, 0.0, trace)
+    n = len(steady)
+    ok = [s.recv_mbps for s in trace if not controller.congested(s)]
+    return GoodputResult(
+        controller=controller.name,
+        goodput_mbps=sum(s.recv_mbps for s in steady) / n,
+        rate_mbps=sum(s.rate_mbps for s in steady) / n,
+        max_ok_mbps=max(ok, default=0.0),
+        loss_pct=sum(s.loss_pct for s in steady) / n,
+        delay_ms=sum(s.delay_ms for s in steady) / n,
+        trace=trace,
+    )
+
+
+def write_trace(result: GoodputResult, output_dir: str) -> Path:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"goodput_{result.controller}_{datetime.utcnow():%Y%m%d_%H%M%S}.csv"
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["t_s", "rate_mbps", "recv_mbps", "loss_pct", "delay_ms"])
+        for s in result.trace:
+            w.writerow([f"{s.t_s:.2f}", f"{s.rate_mbps:.2f}", f"{s.recv_mbps:.2f}", f"{s.loss_pct:.2f}", f"{s.delay_ms:.2f}"])
+    logging.info("Trace boucle fermée: %s", path)
+    return path
+
+
+__all__ = [
+    "CONTROLLERS", "FeedbackSample", "AIMDController", "DelayGradientController",
+    "make_controller", "GoodputResult", "find_goodput", "summarize", "write_trace",
+]
@@ -0,0 +1,177 @@
+"""Garde-fou en direct: limites dures vérifiées pendant le palier.
+
+    global:
+      safety_max_mbps: 100
+      guard: {max_loss_pct: 20, max_latency_ms: 500, action: abort}
+
+ou `loadtester-stress --guard-max-mbps 100 --guard-loss 20 --guard-latency 500`.
+
+`safety_max_mbps` n'est vérifié par `load_config` que sur les cibles
+configurées. Le garde-fou surveille ce qui est réellement émis. Toutes les
+`CHECK_PERIOD_S`, sur la dernière seconde, il compare aux limites:
+- le débit émis par le trafic principal (`SenderProbe`), avec une tolérance
+  de `RATE_TOLERANCE` pour les rafales;
+- la perte: retour du récepteur en UDP, à défaut perte des échos de la sonde;
+- la latence moyenne des échos. Des échos envoyés sans aucune réponse
+  comptent comme une latence dépassée.
+
+Sur dépassement, deux réactions possibles:
+- `abort` arrête le palier (`TierScheduler.stop`);
+- `throttle` plafonne le débit (`RateControl.limit`): à la limite pour un
+  débit excessif, à `THROTTLE_FACTOR` du débit courant pour la perte ou la
+  latence. Après `MAX_THROTTLES` plafonnements, le palier est arrêté.
+
+Chaque décision est journalisée et le motif d'arrêt va au rapport.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+GUARD_ACTIONS = ("abort", "throttle")
+CHECK_PERIOD_S = 0.25
+WINDOW_S = 1.0
+RATE_TOLERANCE = 1.05
+THROTTLE_FACTOR = 0.7
+MAX_THROTTLES = 3
+# Échos envoyés sans réponse sur la fenêtre au-delà desquels la latence est jugée dépassée
+MIN_UNANSWERED = 5
+
+
+@dataclass
+class GuardLimits:
+    max_mbps: Optional[float] = None  # runner: safety_max_mbps par défaut
+    max_loss_pct: Optional[float] = None
+    max_latency_ms: Optional[float] = None
+    action: str = "abort"
+
+
+def parse_guard(raw: Dict[str, Any], safety_max_mbps: float) -> GuardLimits:
+    limits = GuardLimits(
+        max_mbps=float(raw.get("max_mbps", safety_max_mbps)),
+        max_loss_pct=float(raw["max_loss_pct"]) if raw.get("max_loss_pct") is not None else None,
+        max_latency_ms=float(raw["max_latency_ms"]) if raw.get("max_latency_ms") is not None else None,
+        action=str(raw.get("action", "abort")).lower(),
+    )
+    if limits.action not in GUARD_ACTIONS:
+        raise ValueError(f"guard: action {limits.action!r} inconnue (attendu: {', '.join(GUARD_ACTIONS)})")
+    return limits
+
+
+@dataclass
+class GuardEvent:
+    t_s: float
+    metric: str  # mbps | loss | latency
+    value: float
+    limit: float
+    action: str  # throttle | abort
+
+    def describe(self) -> str:
+        unit = {"mbps": " Mbps", "loss": " %", "latency": " ms"}[self.metric]
+        return f"{self.metric} {self.value:.1f}{unit} > {self.limit:g}{unit} à t={self.t_s:.1f}s ({self.action})"
+
+
+@dataclass
+class _Mark:
+    t: float
+    bytes_sent: int
+    recv: int
+    lost: int
+    # Compteurs absolus de la sonde (`rtt_total`...): stables à travers ses `reset()`
+    echo_sent: int
+    echo_lost: int
+    rtt_count: int
+
+
+@dataclass
+class LiveGuard:
+    limits: GuardLimits
+    events: List[GuardEvent] = field(default_factory=list)
+
+    @property
+    def throttles(self) -> int:
+        return sum(1 for e in self.events if e.action == "throttle")
+
+    @property
+    def reason(self) -> str:
+        """Motif d'arrêt (dernier dépassement fatal), vide si le palier est allé à son terme."""
+        aborts = [e for e in self.events if e.action == "abort"]
+        return "guard: " + aborts[-1].describe() if aborts else ""
+
+    def check(self, t_s: float, mbps: float, loss_pct: Optional[float], latency_ms: Optional[float]) -> Optional[GuardEvent]:
+        """Premier dépassement de la fenêtre (débit, perte, latence), None si tout est dans les limites."""
+        lim = self.limits
+        if lim.max_mbps is not None and mbps > lim.max_mbps * RATE_TOLERANCE:
+            return GuardEvent(t_s, "mbps", mbps, lim.max_mbps, "")
+        if lim.max_loss_pct is not None and loss_pct is not None and loss_pct > lim.max_loss_pct:
+            return GuardEvent(t_s, "loss", loss_pct, lim.max_loss_pct, "")
+        if lim.max_latency_ms is not None and latency_ms is not None and latency_ms > lim.max_latency_ms:
+            return GuardEvent(t_s, "latency", latency_ms, lim.max_latency_ms, "")
+        return None
+
+    async def run(self, sched, probe, latency=None, feedback=None, rate=None):
+        """Tâche de fond d'un palier (`TierScheduler`); `rate` (`RateControl`) permet de plafonner."""
+        loop = asyncio.get_running_loop()
+        marks: deque = deque()
+        while True:
+            await asyncio.sleep(CHECK_PERIOD_S)
+            recv, lost = feedback.totals() if feedback is not None and feedback.latest else (0, 0)
+            mark = _Mark(
+                loop.time(), probe.bytes_sent, recv, lost,
+                latency.sent_total if latency is not None else 0,
+                latency.lost_total if latency is not None else 0,
+                latency.rtt_total if latency is not None else 0,
+            )
+            marks.append(mark)
+            # Garder comme origine la marque la plus récente vieille d'au moins une fenêtre
+            full = WINDOW_S - CHECK_PERIOD_S / 2
+            while len(marks) > 1 and mark.t - marks[1].t >= full:
+                marks.popleft()
+            first = marks[0]
+            dt = mark.t - first.t
+            if dt < full:
+                continue  # fenêtre pas encore pleine (début de palier)
+            event = self.check(sched.elapsed, *self._window(first, mark, dt, latency, feedback))
+            if event is None:
+                continue
+            if self.limits.action == "throttle" and rate is not None and self.throttles < MAX_THROTTLES:
+                event.action = "throttle"
+                mbps = (mark.bytes_sent - first.bytes_sent) * 8 / 1_000_000 / dt
+                cap = self.limits.max_mbps if event.metric == "mbps" else mbps * THROTTLE_FACTOR
+                rate.limit(min(cap, rate.effective / 1_000_000) * 1_000_000)
+                self.events.append(event)
+                logging.warning("Garde-fou: %s, débit plafonné à %.1f Mbps", event.describe(), rate.effective / 1_000_000)
+                marks.clear()  # nouvelle fenêtre au nouveau débit
+                continue
+            event.action = "abort"
+            self.events.append(event)
+            logging.warning("Garde-fou: %s, palier arrêté", event.describe())
+            sched.stop(self.reason)
+            return
+
+    @staticmethod
+    def _window(first: _Mark, last: _Mark, dt: float, latency, feedback):
+        mbps = (last.bytes_sent - first.bytes_sent) * 8 / 1_000_000 / dt
+        loss = None
+        d_recv, d_lost = last.recv - first.recv, last.lost - first.lost
+        if feedback is not None and d_recv + d_lost > 0:
+            loss = d_lost / (d_recv + d_lost) * 100
+        elif latency is not None and last.echo_sent > first.echo_sent:
+            loss = (last.echo_lost - first.echo_lost) / (last.echo_sent - first.echo_sent) * 100
+        latency_ms = None
+        if latency is not None:
+            # Repères ramenés sur la liste courante (vidée par un `reset()` en cours de fenêtre)
+            base = latency.rtt_base
+            window = latency.rtts[max(first.rtt_count - base, 0):last.rtt_count - base]
+            if window:
+                latency_ms = sum(window) / len(window)
+            elif last.echo_sent - first.echo_sent >= MIN_UNANSWERED:
+                latency_ms = math.inf  # plus aucun écho: le réseau ne répond plus
+        return mbps, loss, latency_ms
+
+
+__all__ = ["GuardLimits", "GuardEvent", "LiveGuard", "parse_guard", "GUARD_ACTIONS"]
@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-import asyncio
-import threading
+import argparse
+import math
 import tkinter as tk
 from tkinter import ttk, messagebox
 from dataclasses import dataclass
@@ -11,9 +11,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from .config import FullConfig, GlobalConfig, TierConfig
-from .runner import LoadTestRunner
+from . import eventloop
+from .config import DEFAULT_ECHO_PORT, FullConfig, GlobalConfig, TierConfig
+from .engine import BackgroundEngine
 from .report import TierReportRow
+from .ring import DecimatingBuffer
+
+
+# Période de vidage de la file d'échantillons par la boucle Tk (ms)
+DRAIN_INTERVAL_MS = 200
 
 
 @dataclass
@@ -43,11 +49,57 @@ PREDEFINED_LEVELS = [
 ]
 
 
+class LiveChart:
+    """Courbe temps réel sur un Canvas Tk, alimentée par un `DecimatingBuffer`."""
+
+    def __init__(self, parent, title: str, unit: str, color: str, width: int = 280, height: int = 120):
+        self.title = title
+        self.unit = unit
+        self.color = color
+        self.width = width
+        self.height = height
+        self.buffer = DecimatingBuffer()
+        self.canvas = tk.Canvas(parent, width=width, height=height, background="white", highlightthickness=1)
+
+    def add(self, t: float, value: float):
+        if not math.isnan(value):
+            self.buffer.append(t, value)
+
+    def clear(self):
+        self.buffer.clear()
+        self.redraw()
+
+    def redraw(self):
+        c = self.canvas
+        c.delete("all")
+        pts = self.buffer.points()
+        last = f"{pts[-1][1]:.1f} {self.unit}" if pts else "-"
+        c.create_text(4, 2, anchor="nw", text=f"{self.title}: {last}", font=("Arial", 8))
+        if len(pts) < 2:
+            return
+        x0, x1 = pts[0][0], pts[-1][0]
+        y_max = max(y for _, y in pts) or 1.0
+        top, bottom = 16, self.height - 4
+        span = (x1 - x0) or 1.0
+        coords = []
+        for x, y in pts:
+            coords.append(4 + (x - x0) / span * (self.width - 8))
+            coords.append(bottom - y / y_max * (bottom - top))
+        c.create_line(*coords, fill=self.color)
+        c.create_text(self.width - 4, top, anchor="ne", text=f"max {y_max:.1f}", font=("Arial", 7), fill="gray")
+
+
 class LoadTesterGUI:
-    """Interface graphique principale."""
+    """Interface graphique principale.
 
-    def __init__(self, root: tk.Tk):
+    Les tests tournent sur un `BackgroundEngine` unique (boucle et sockets
+    persistants); la boucle Tk vide sa file d'échantillons toutes les
+    `DRAIN_INTERVAL_MS` pour mettre à jour les courbes.
+    """
+
+    def __init__(self, root: tk.Tk, loop_backend: str = "auto"):
         self.root = root
+        self.loop_backend = loop_backend
         self.root.title("WiFi Load Tester - Test Progressif AMR")
         self.root.geometry("900x700")
         
@@ -58,8 +110,17 @@ class LoadTesterGUI:
         self.test_running = False
         self.last_result: Optional[TierReportRow] = None
         self.results_history: list[TierReportRow] = []
+        # Temps cumulé des courbes: les échantillons repartent de 0 à chaque palier
+        self._chart_offset = 0.0
+        self._chart_last = 0.0
+        self._chart_label = ""
+
+        self.engine = BackgroundEngine(loop_backend)
+        self.engine.start()
         
         self._setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self._quit)
+        self.root.after(DRAIN_INTERVAL_MS, self._drain_samples)
     
     def _setup_ui(self):
         """Configure l'interface utilisateur."""
@@ -104,11 +165,23 @@ class LoadTesterGUI:
         levels_frame.columnconfigure(0, weight=1)
         levels_frame.columnconfigure(1, weight=1)
         
-        # Frame résultats en temps réel
+        # Frame courbes en temps réel
+        charts_frame = ttk.LabelFrame(self.root, text="En direct", padding=5)
+        charts_frame.pack(fill="x", padx=10, pady=5)
+        self.charts = {
+            "mbps": LiveChart(charts_frame, "Débit", "Mbps", "blue"),
+            "loss_pct": LiveChart(charts_frame, "Perte", "%", "red"),
+            "latency_ms": LiveChart(charts_frame, "Latence", "ms", "darkgreen"),
+        }
+        for chart in self.charts.values():
+            chart.canvas.pack(side="left", fill="x", expand=True, padx=2)
+            chart.redraw()
+
+        # Frame résultats
         results_frame = ttk.LabelFrame(self.root, text="Résultats du dernier test", padding=10)
         results_frame.pack(fill="x", padx=10, pady=5)
         
-        self.results_text = tk.Text(results_frame, height=8, wrap="word", font=("Consolas", 9))
+        self.results_text = tk.Text(results_frame, height=6, wrap="word", font=("Consolas", 9))
         self.results_text.pack(fill="both", expand=True)
         self.results_text.insert("1.0", "Aucun test lancé.\n")
         self.results_text.config(state="disabled")
@@ -120,7 +193,7 @@ class LoadTesterGUI:
         ttk.Button(action_frame, text="📊 Voir rapport complet", command=self._show_full_report).pack(side="left", padx=5)
         ttk.Button(action_frame, text="🔥 Mode Stress", command=self._open_stress_dialog).pack(side="left", padx=5)
         ttk.Button(action_frame, text="🔄 Réinitialiser", command=self._reset).pack(side="left", padx=5)
-        ttk.Button(action_frame, text="❌ Quitter", command=self.root.quit).pack(side="right", padx=5)
+        ttk.Button(action_frame, text="❌ Quitter", command=self._quit).pack(side="right", padx=5)
         
         # Barre de statut
         self.status_var = tk.StringVar(value="Prêt - Cliquez sur un niveau pour commencer")
@@ -151,56 +224,87 @@ class LoadTesterGUI:
         self._update_button_status(level_def.level - 1, "running")
         self.status_var.set(f"⏳ Test en cours: {level_def.name}...")
         
-        # Lancer le test dans un thread séparé
-        thread = threading.Thread(target=self._run_test_thread, args=(level_def,), daemon=True)
-        thread.start()
-    
-    def _run_test_thread(self, level_def: LevelDefinition):
-        """Exécute le test dans un thread séparé."""
+        self._reset_charts()
+        # Soumettre le test au moteur persistant
         try:
-            # Créer config temporaire
-            global_cfg = GlobalConfig(
-                target_host=self.target_host.get(),
-                ping_host=self.target_host.get(),
-                safety_max_mbps=float(self.safety_max.get()),
-                output_dir="reports",
-                use_iperf_if_available=True,
-            )
-            
-            tier = TierConfig(
-                name=level_def.name,
-                protocol=level_def.protocol,
-                target_bandwidth_mbps=level_def.target_mbps,
-                connections=level_def.connections,
-                duration_s=level_def.duration_s,
-                packet_size=level_def.packet_size,
-            )
-            
-            full_cfg = FullConfig(global_cfg, [tier])
-            runner = LoadTestRunner(full_cfg, dry_run=False, internal_only=False)
-            
-            # Exécuter dans event loop asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            reporter = loop.run_until_complete(runner.run())
-            loop.close()
-            
-            # Récupérer le résultat
-            if reporter.rows:
-                result = reporter.rows[0]
-                self.last_result = result
-                self.results_history.append(result)
-                
-                # Mettre à jour l'UI depuis le thread principal
-                self.root.after(0, lambda: self._display_result(level_def, result))
-            else:
-                self.root.after(0, lambda: self._display_error(level_def, "Aucun résultat retourné"))
-        
+            runner = self._build_runner(level_def)
+            future = self.engine.submit(runner.run())
         except Exception as e:
-            self.root.after(0, lambda: self._display_error(level_def, str(e)))
-        
-        finally:
             self.test_running = False
+            self._display_error(level_def, str(e))
+            return
+        future.add_done_callback(lambda f: self.root.after(0, self._level_done, level_def, f))
+
+    def _build_runner(self, level_def: LevelDefinition):
+        from .runner import LoadTestRunner
+
+        global_cfg = GlobalConfig(
+            target_host=self.target_host.get(),
+            ping_host=self.target_host.get(),
+            safety_max_mbps=float(self.safety_max.get()),
+            output_dir="reports",
+            use_iperf_if_available=True,
+            loop_backend=self.loop_backend,
+        )
+        tier = TierConfig(
+            name=level_def.name,
+            protocol=level_def.protocol,
+            target_bandwidth_mbps=level_def.target_mbps,
+            connections=level_def.connections,
+            duration_s=level_def.duration_s,
+            packet_size=level_def.packet_size,
+        )
+        # Générateur interne: lui seul publie le débit seconde par seconde
+        return LoadTestRunner(
+            FullConfig(global_cfg, [tier]),
+            internal_only=True,
+            pool=self.engine.pool,
+            on_sample=self.engine.publish,
+        )
+
+    def _level_done(self, level_def: LevelDefinition, future):
+        """Appelé dans le thread Tk à la fin du test."""
+        self.test_running = False
+        try:
+            reporter = future.result()
+        except Exception as e:
+            self._display_error(level_def, str(e))
+            return
+        if reporter.rows:
+            result = reporter.rows[0]
+            self.last_result = result
+            self.results_history.append(result)
+            self._display_result(level_def, result)
+        else:
+            self._display_error(level_def, "Aucun résultat retourné")
+
+    # ------------------ Courbes en direct ------------------
+    def _drain_samples(self):
+        samples = self.engine.drain()
+        for s in samples:
+            if s.label != self._chart_label:
+                # Nouveau palier: on enchaîne sur l'axe du temps
+                self._chart_offset = self._chart_last
+                self._chart_label = s.label
+            t = self._chart_offset + s.t_s
+            self._chart_last = t
+            for key, chart in self.charts.items():
+                chart.add(t, getattr(s, key))
+        if samples:
+            for chart in self.charts.values():
+                chart.redraw()
+        self.root.after(DRAIN_INTERVAL_MS, self._drain_samples)
+
+    def _reset_charts(self):
+        self.engine.drain(limit=self.engine.samples.maxsize)
+        self._chart_offset = self._chart_last = 0.0
+        self._chart_label = ""
+        for chart in self.charts.values():
+            chart.clear()
+
+    def _quit(self):
+        self.engine.stop()
+        self.root.quit()
     
     def _display_result(self, level_def: LevelDefinition, result: TierReportRow):
         """Affiche les résultats dans l'interface."""
@@ -225,6 +329,8 @@ class LoadTesterGUI:
             f"",
             f"📊 Métriques réseau:",
             f"   • Latence moyenne: {result.latency_ms_avg:.2f} ms",
+            f"   • Latence à vide: {result.latency_idle_ms:.2f} ms (inflation en charge {result.latency_inflation_ms:+.1f} ms)",
+            f"   • Réactivité: {result.rpm:.0f} RPM",
             f"   • Gigue (jitter): {result.jitter_ms:.2f} ms",
             f"   • Perte de paquets: {result.packet_loss_pct:.1f}%",
             f"",
@@ -322,11 +428,19 @@ class LoadTesterGUI:
             return
         self.status_var.set("⏳ Stress en cours...")
         self.test_running = True
-        thread = threading.Thread(target=self._run_stress_thread, args=(start, step, maxv, duration, protocol, connections), daemon=True)
-        thread.start()
+        self._reset_charts()
+        args = self._stress_args(start, step, maxv, duration, protocol, connections)
+        from .stress import stress
+
+        try:
+            future = self.engine.submit(stress(args))
+        except Exception as e:
+            self.test_running = False
+            self._stress_done(f"Erreur stress: {e}")
+            return
+        future.add_done_callback(lambda f: self.root.after(0, self._stress_finished, args, f))
 
-    def _run_stress_thread(self, start, step, maxv, duration, protocol, connections):
-        from .stress import parse_args as stress_parse_args, stress, write_report
+    def _stress_args(self, start, step, maxv, duration, protocol, connections):
         import types, logging
         # Construire un objet args minimal
         args = types.SimpleNamespace(
@@ -344,24 +458,29 @@ class LoadTesterGUI:
             min_ratio=0.6,
             output_dir='reports',
             no_iperf=True,
+            echo_port=DEFAULT_ECHO_PORT,
+            idle_probe=2.0,
+            pool=self.engine.pool,
+            on_sample=self.engine.publish,
         )
         logging.getLogger().setLevel(logging.INFO)
+        return args
+
+    def _stress_finished(self, args, future):
+        from .stress import write_report
+
+        self.test_running = False
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = loop.run_until_complete(stress(args))
+            results = future.result()
             path = write_report(results, args.output_dir)
-            loop.close()
-            # Synthèse
-            summary = [f"Stress test terminé. Rapport: {path}"]
-            for r in results:
-                summary.append(f"Lvl{r.level} {r.protocol} target={r.target_mbps} achieved={r.achieved_mbps:.1f} latency={r.latency_ms:.1f} loss={r.loss_pct:.1f}% status={r.status}")
-            text = "\n".join(summary)
-            self.root.after(0, lambda: self._stress_done(text))
         except Exception as e:
-            self.root.after(0, lambda: self._stress_done(f"Erreur stress: {e}"))
-        finally:
-            self.test_running = False
+            self._stress_done(f"Erreur stress: {e}")
+            return
+        # Synthèse
+        summary = [f"Stress test terminé. Rapport: {path}"]
+        for r in results:
+            summary.append(f"Lvl{r.level} {r.protocol} target={r.target_mbps} achieved={r.achieved_mbps:.1f} latency={r.latency_ms:.1f} loss={r.loss_pct:.1f}% status={r.status}")
+        self._stress_done("\n".join(summary))
 
     def _stress_done(self, text: str):
         self.results_text.config(state='normal')
@@ -435,6 +554,7 @@ class LoadTesterGUI:
                 f"Protocole: {result.protocol}",
                 f"Cible: {result.target_mbps:.1f} Mbps | Atteint: {result.achieved_mbps:.1f} Mbps",
                 f"Latence: {result.latency_ms_avg:.2f} ms | Gigue: {result.jitter_ms:.2f} ms",
+                f"Latence à vide: {result.latency_idle_ms:.2f} ms | Inflation: {result.latency_inflation_ms:+.1f} ms | {result.rpm:.0f} RPM",
                 f"Perte: {result.packet_loss_pct:.1f}% | CPU: {result.cpu_pct_avg:.1f}% | RAM: {result.mem_pct_avg:.1f}%",
             ])
         
@@ -461,8 +581,11 @@ class LoadTesterGUI:
 
 def main():
     """Point d'entrée de l'interface graphique."""
+    p = argparse.ArgumentParser(description="Interface graphique WiFi Load Tester")
+    eventloop.add_loop_argument(p)
+    args = p.parse_args()
     root = tk.Tk()
-    app = LoadTesterGUI(root)
+    app = LoadTesterGUI(root, loop_backend=args.loop or "auto")
     root.mainloop()
 
 
@@ -0,0 +1,64 @@
+"""Histogrammes à mémoire fixe (seaux en puissances de 2).
+
+Le seau `i` contient les valeurs `v` telles que `v.bit_length() == i`, soit
+l'intervalle [2**(i-1), 2**i - 1] (le seau 0 ne contient que 0). L'ajout se
+résume à un `bit_length()` et une incrémentation: utilisable par paquet.
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+
+class Log2Histogram:
+    __slots__ = ("counts",)
+
+    def __init__(self, buckets: int = 32):
+        self.counts: List[int] = [0] * buckets
+
+    def add(self, value: int):
+        i = value.bit_length() if value > 0 else 0
+        last = len(self.counts) - 1
+        self.counts[i if i < last else last] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    @staticmethod
+    def bucket_upper(i: int) -> int:
+        """Borne supérieure (incluse) du seau `i`."""
+        return (1 << i) - 1
+
+    def quantile(self, q: float) -> int:
+        """Borne supérieure du seau contenant le quantile `q` (0..1), 0 si vide."""
+        total = self.total
+        if total == 0:
+            return 0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return self.bucket_upper(i)
+        return self.bucket_upper(len(self.counts) - 1)
+
+    def merge(self, other: "Log2Histogram"):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+
+    def diff(self, previous: List[int]) -> "Log2Histogram":
+        """Histogramme des ajouts depuis l'instantané `previous` (liste de comptes)."""
+        h = Log2Histogram(len(self.counts))
+        h.counts = [c - p for c, p in zip(self.counts, previous)]
+        return h
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """Seaux non vides indexés par leur borne supérieure."""
+        return {str(self.bucket_upper(i)): c for i, c in enumerate(self.counts) if c}
+
+
+__all__ = ["Log2Histogram"]
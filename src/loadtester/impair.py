@@ -0,0 +1,466 @@
+"""Relais UDP d'émulation de dégradations réseau (tests hors ligne, calibration).
+
+    loadtester-receiver --udp-port 6202 --echo-port 6203
+    loadtester-impair --map 5202:127.0.0.1:6202 --map 5203:127.0.0.1:6203 \\
+        --rate-mbps 50 --delay-ms 20 --jitter-ms 5 --loss 0.5 --burst-loss 0.01,0.3 --reorder 1
+    loadtester-stress --host 127.0.0.1 --no-iperf        # traverse le relais
+
+Le relais écoute sur les ports `--map` et transmet à la cible. Chaque source
+y a son propre socket amont: le récepteur voit donc les mêmes flux qu'en
+direct. Toutes les correspondances passent par la même chaîne de
+dégradations, dans cet ordre:
+
+1. perte aléatoire (`--loss`, %) puis perte en rafales selon le modèle de
+   Gilbert-Elliott (`--burst-loss P,R`: passage bon->mauvais avec la
+   probabilité P, retour avec R; perte `--burst-bad-loss` en état mauvais);
+2. goulot à `--rate-mbps`: sérialisation à débit fixe derrière une file de
+   `--queue-ms` au plus, au-delà la file déborde (perte par file pleine);
+3. délai fixe + gigue gaussienne (`--delay-ms`, `--jitter-ms`). L'ordre est
+   conservé: la gigue ne réordonne pas;
+4. réordonnancement explicite: `--reorder` % des paquets sont retenus
+   `--reorder-ms` de plus et doublés par les suivants.
+
+Les départs sont planifiés sur une roue temporelle (`TimerWheel`, 1 ms par
+cran): insertion en O(1), chaque réveil n'envoie que les paquets dus.
+Les réponses (retour récepteur, écho) repartent vers la source sans
+dégradation. Les compteurs du relais (`ImpairStats`, `--output` en JSON)
+servent de vérité terrain. UDP uniquement.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import eventloop
+
+# Sources muettes depuis ce délai: socket amont fermé
+UPSTREAM_IDLE_S = 60.0
+
+
+class TimerWheel:
+    """Roue temporelle hachée: `slots` crans de `tick_s` secondes.
+
+    Un élément dû au-delà d'un tour de roue reste dans son cran jusqu'au bon
+    tour. Au sein d'un cran, l'ordre d'insertion est conservé.
+    """
+
+    def __init__(self, tick_s: float = 0.001, slots: int = 4096, origin: float = 0.0):
+        self.tick_s = tick_s
+        self.slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self.origin = origin
+        self.current = 0  # prochain cran à traiter
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def tick_of(self, at: float) -> int:
+        return int((at - self.origin) / self.tick_s)
+
+    def schedule(self, at: float, item: Any):
+        tick = max(self.tick_of(at), self.current)
+        self.slots[tick % len(self.slots)].append((tick, item))
+        self.size += 1
+
+    def pop_due(self, now: float) -> List[Any]:
+        """Éléments dont le cran est échu à `now`, dans l'ordre des crans."""
+        due: List[Any] = []
+        last = self.tick_of(now)
+        n = len(self.slots)
+        if last - self.current >= n:
+            # Retard de plus d'un tour: un seul passage sur chaque cran suffit
+            for _ in range(n):
+                self._drain(self.current % n, last, due)
+                self.current += 1
+            self.current = last + 1
+            return due
+        while self.current <= last:
+            self._drain(self.current % n, last, due)
+            self.current += 1
+        return due
+
+    def _drain(self, index: int, last: int, due: List[Any]):
+        slot = self.slots[index]
+        if not slot:
+            return
+        keep = []
+        for tick, item in slot:
+            if tick <= last:
+                due.append(item)
+            else:
+                keep.append((tick, item))
+        self.size -= len(slot) - len(keep)
+        self.slots[index] = keep
+
+
+class GilbertElliott:
+    """Perte en rafales à deux états (bon / mauvais)."""
+
+    def __init__(self, p: float, r: float, loss_bad: float = 1.0, loss_good: float = 0.0, rng=None):
+        self.p = p
+        self.r = r
+        self.loss_bad = loss_bad
+        self.loss_good = loss_good
+        self.bad = False
+        self.rng = rng or random.Random()
+
+    def lose(self) -> bool:
+        rnd = self.rng.random
+        if self.bad:
+            if rnd() < self.r:
+                self.bad = False
+        elif rnd() < self.p:
+            self.bad = True
+        return rnd() < (self.loss_bad if self.bad else self.loss_good)
+
+    @property
+    def mean_loss_pct(self) -> float:
+        """Perte moyenne attendue (état stationnaire)."""
+        if self.p + self.r == 0:
+            return self.loss_good * 100
+        pi_bad = self.p / (self.p + self.r)
+        return (pi_bad * self.loss_bad + (1 - pi_bad) * self.loss_good) * 100
+
+
+@dataclass
+class ImpairParams:
+    rate_mbps: float = 0.0  # 0 = pas de goulot
+    queue_ms: float = 100.0
+    delay_ms: float = 0.0
+    jitter_ms: float = 0.0
+    loss_pct: float = 0.0
+    burst_p: float = 0.0  # Gilbert-Elliott: bon -> mauvais (0 = désactivé)
+    burst_r: float = 1.0  # mauvais -> bon
+    burst_bad_loss: float = 1.0
+    reorder_pct: float = 0.0
+    reorder_ms: float = 10.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class ImpairStats:
+    received: int = 0
+    forwarded: int = 0
+    bytes_forwarded: int = 0
+    lost_random: int = 0
+    lost_burst: int = 0
+    dropped_queue: int = 0
+    reordered: int = 0
+    replies: int = 0
+    queue_delay_ms_max: float = 0.0
+
+    @property
+    def dropped(self) -> int:
+        return self.lost_random + self.lost_burst + self.dropped_queue
+
+
+class Impairment:
+    """Chaîne de dégradations, sans E/S: `admit` donne l'instant de départ ou None.
+
+    Les instants sont en secondes sur l'horloge de l'appelant (boucle asyncio
+    pour le relais, horloge fictive pour les tests).
+    """
+
+    def __init__(self, params: ImpairParams):
+        self.params = params
+        self.rng = random.Random(params.seed)
+        self.burst = (
+            GilbertElliott(params.burst_p, params.burst_r, params.burst_bad_loss, rng=self.rng)
+            if params.burst_p > 0 else None
+        )
+        self.stats = ImpairStats()
+        self._bits_per_s = params.rate_mbps * 1_000_000
+        self._link_free = 0.0  # fin de sérialisation du dernier paquet admis
+        self._last_departure = 0.0
+
+    def admit(self, size: int, now: float) -> Optional[float]:
+        p = self.params
+        stats = self.stats
+        stats.received += 1
+        rnd = self.rng.random
+        if p.loss_pct and rnd() * 100 < p.loss_pct:
+            stats.lost_random += 1
+            return None
+        if self.burst is not None and self.burst.lose():
+            stats.lost_burst += 1
+            return None
+        at = now
+        if self._bits_per_s:
+            start = self._link_free if self._link_free > now else now
+            queued = start - now
+            if queued * 1000 > p.queue_ms:
+                stats.dropped_queue += 1
+                return None
+            if queued * 1000 > stats.queue_delay_ms_max:
+                stats.queue_delay_ms_max = queued * 1000
+            self._link_free = start + size * 8 / self._bits_per_s
+            at = self._link_free
+        delay = p.delay_ms
+        if p.jitter_ms:
+            delay = max(delay + self.rng.gauss(0.0, p.jitter_ms), 0.0)
+        at += delay / 1000
+        if p.reorder_pct and rnd() * 100 < p.reorder_pct:
+            # Retenu sans faire avancer l'horloge d'ordre: les suivants le doublent
+            stats.reordered += 1
+            return at + p.reorder_ms / 1000
+        if at < self._last_departure:
+            at = self._last_departure
+        self._last_departure = at
+        return at
+
+
+class _ListenProtocol(asyncio.DatagramProtocol):
+    def __init__(self, relay: "ImpairRelay", target: Tuple[str, int]):
+        self.relay = relay
+        self.target = target
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        self.relay._on_client(self, data, addr)
+
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    def __init__(self, relay: "ImpairRelay", listen: _ListenProtocol, client):
+        self.relay = relay
+        self.listen = listen
+        self.client = client
+        self.transport = None
+        self.last_seen = time.monotonic()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        # Réponse du récepteur (retour, écho): vers la source, sans dégradation
+        self.relay.impairment.stats.replies += 1
+        self.listen.transport.sendto(data, self.client)
+
+
+class ImpairRelay:
+    def __init__(
+        self,
+        params: ImpairParams,
+        maps: List[Tuple[int, str, int]],
+        host: str = "0.0.0.0",
+        tick_ms: float = 1.0,
+        interval: float = 5.0,
+        verbose: bool = True,
+    ):
+        self.params = params
+        self.maps = maps
+        self.host = host
+        self.tick_s = tick_ms / 1000
+        self.interval = interval
+        self.verbose = verbose
+        self.impairment = Impairment(params)
+        self.wheel: Optional[TimerWheel] = None
+        self.listeners: List[_ListenProtocol] = []
+        self.ports: List[int] = []
+        self._upstreams: Dict[Tuple[int, Any], _UpstreamProtocol] = {}
+        self._pending: Dict[Tuple[int, Any], List[bytes]] = {}
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _on_client(self, listen: _ListenProtocol, data: bytes, addr):
+        now = self._loop.time()
+        at = self.impairment.admit(len(data), now)
+        if at is None:
+            return
+        self.wheel.schedule(at, (listen, addr, data))
+        self._wake.set()
+
+    async def _upstream(self, listen: _ListenProtocol, client) -> _UpstreamProtocol:
+        key = (id(listen), client)
+        up = self._upstreams.get(key)
+        if up is None:
+            _, up = await self._loop.create_datagram_endpoint(
+                lambda: _UpstreamProtocol(self, listen, client), remote_addr=listen.target
+            )
+            self._upstreams[key] = up
+        return up
+
+    def _send(self, item):
+        listen, client, data = item
+        key = (id(listen), client)
+        up = self._upstreams.get(key)
+        if up is None:
+            # Premier paquet de cette source: socket amont ouvert à part, paquets mis de côté
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = [data]
+                self._loop.create_task(self._open_upstream(listen, client, key))
+            else:
+                pending.append(data)
+            return
+        up.last_seen = time.monotonic()
+        up.transport.sendto(data)
+        stats = self.impairment.stats
+        stats.forwarded += 1
+        stats.bytes_forwarded += len(data)
+
+    async def _open_upstream(self, listen: _ListenProtocol, client, key):
+        try:
+            up = await self._upstream(listen, client)
+        except OSError as e:
+            logging.warning("Relais: cible %s:%s injoignable (%s)", *listen.target, e)
+            self._pending.pop(key, None)
+            return
+        for data in self._pending.pop(key, []):
+            self._send((listen, client, data))
+
+    async def _drive(self):
+        loop = self._loop
+        while True:
+            if not len(self.wheel):
+                self._wake.clear()
+                await self._wake.wait()
+            for item in self.wheel.pop_due(loop.time()):
+                self._send(item)
+            await asyncio.sleep(self.tick_s)
+
+    def _prune_upstreams(self):
+        limit = time.monotonic() - UPSTREAM_IDLE_S
+        for key, up in list(self._upstreams.items()):
+            if up.last_seen < limit:
+                up.transport.close()
+                del self._upstreams[key]
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(message, flush=True)
+
+    def status_line(self) -> str:
+        s = self.impairment.stats
+        return (
+            f"[Impair] reçus={s.received} transmis={s.forwarded} perte aléa={s.lost_random} "
+            f"rafales={s.lost_burst} file pleine={s.dropped_queue} réordonnés={s.reordered} "
+            f"file max={s.queue_delay_ms_max:.1f} ms réponses={s.replies}"
+        )
+
+    async def run(self):
+        loop = self._loop = asyncio.get_running_loop()
+        self.wheel = TimerWheel(self.tick_s, origin=loop.time())
+        for listen_port, host, port in self.maps:
+            transport, proto = await loop.create_datagram_endpoint(
+                lambda h=host, p=port: _ListenProtocol(self, (h, p)), local_addr=(self.host, listen_port)
+            )
+            self.listeners.append(proto)
+            self.ports.append(transport.get_extra_info("sockname")[1])
+        self._log(
+            "[Impair] " + " | ".join(f"{lp} -> {h}:{p}" for (_, h, p), lp in zip(self.maps, self.ports))
+            + f" | {describe(self.params)}"
+        )
+        driver = asyncio.create_task(self._drive())
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                self._prune_upstreams()
+                self._log(self.status_line())
+        finally:
+            driver.cancel()
+            await asyncio.gather(driver, return_exceptions=True)
+            for up in self._upstreams.values():
+                up.transport.close()
+            for listen in self.listeners:
+                listen.transport.close()
+
+
+def describe(p: ImpairParams) -> str:
+    parts = []
+    if p.rate_mbps:
+        parts.append(f"goulot {p.rate_mbps:g} Mbps (file {p.queue_ms:g} ms)")
+    if p.delay_ms or p.jitter_ms:
+        parts.append(f"délai {p.delay_ms:g}±{p.jitter_ms:g} ms")
+    if p.loss_pct:
+        parts.append(f"perte {p.loss_pct:g}%")
+    if p.burst_p:
+        ge = GilbertElliott(p.burst_p, p.burst_r, p.burst_bad_loss)
+        parts.append(f"rafales p={p.burst_p:g} r={p.burst_r:g} (~{ge.mean_loss_pct:.2f}%)")
+    if p.reorder_pct:
+        parts.append(f"réordre {p.reorder_pct:g}% (+{p.reorder_ms:g} ms)")
+    return ", ".join(parts) or "aucune dégradation"
+
+
+def _parse_map(text: str) -> Tuple[int, str, int]:
+    try:
+        listen, host, port = text.rsplit(":", 2)
+        return int(listen), host, int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"attendu PORT_ÉCOUTE:HÔTE:PORT, reçu {text!r}") from None
+
+
+def _parse_burst(text: str) -> Tuple[float, float]:
+    try:
+        p, r = (float(x) for x in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"attendu P,R (ex: 0.01,0.3), reçu {text!r}") from None
+    return p, r
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Relais UDP émulant débit, délai, gigue, pertes et réordonnancement")
+    p.add_argument(
+        "--map", action="append", type=_parse_map, required=True,
+        help="PORT_ÉCOUTE:HÔTE:PORT (répétable), ex: 5202:127.0.0.1:6202",
+    )
+    p.add_argument("--bind", default="0.0.0.0", help="Adresse d'écoute")
+    p.add_argument("--rate-mbps", type=float, default=0.0, help="Débit du goulot (0 = illimité)")
+    p.add_argument("--queue-ms", type=float, default=100.0, help="Profondeur max de la file du goulot")
+    p.add_argument("--delay-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="Écart-type de la gigue (gaussienne)")
+    p.add_argument("--loss", type=float, default=0.0, help="Perte aléatoire (%%)")
+    p.add_argument("--burst-loss", type=_parse_burst, help="Gilbert-Elliott P,R (bon->mauvais, mauvais->bon)")
+    p.add_argument("--burst-bad-loss", type=float, default=1.0, help="Probabilité de perte en état mauvais")
+    p.add_argument("--reorder", type=float, default=0.0, help="Paquets réordonnés (%%)")
+    p.add_argument("--reorder-ms", type=float, default=10.0, help="Retenue des paquets réordonnés")
+    p.add_argument("--seed", type=int, help="Graine (tirages reproductibles)")
+    p.add_argument("--tick-ms", type=float, default=1.0, help="Cran de la roue temporelle")
+    p.add_argument("--interval", type=float, default=5.0, help="Période d'affichage des compteurs (s)")
+    p.add_argument("--output", help="Compteurs finaux en JSON (vérité terrain)")
+    eventloop.add_loop_argument(p)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    burst_p, burst_r = args.burst_loss or (0.0, 1.0)
+    params = ImpairParams(
+        rate_mbps=args.rate_mbps,
+        queue_ms=args.queue_ms,
+        delay_ms=args.delay_ms,
+        jitter_ms=args.jitter_ms,
+        loss_pct=args.loss,
+        burst_p=burst_p,
+        burst_r=burst_r,
+        burst_bad_loss=args.burst_bad_loss,
+        reorder_pct=args.reorder,
+        reorder_ms=args.reorder_ms,
+        seed=args.seed,
+    )
+    relay = ImpairRelay(params, args.map, args.bind, args.tick_ms, args.interval)
+    try:
+        eventloop.run(relay.run(), args.loop)
+    except KeyboardInterrupt:
+        print("\nInterruption utilisateur, arrêt.")
+    print(relay.status_line())
+    if args.output:
+        doc = {"params": asdict(params), "stats": asdict(relay.impairment.stats)}
+        Path(args.output).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        print(f"Compteurs écrits: {args.output}")
+
+
+__all__ = ["TimerWheel", "GilbertElliott", "ImpairParams", "ImpairStats", "Impairment", "ImpairRelay", "describe"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,163 @@
+"""Instrumentation du générateur: savoir si c'est le réseau ou notre émetteur qui limite.
+
+`SenderProbe` expose des compteurs incrémentés directement par les boucles
+d'envoi (appels `sendto`/`write`, temps passé dedans, retard sur l'échéancier
+de pacing) et une tâche `run()` qui, chaque seconde, convertit ces compteurs
+en taux et mesure le retard de réveil de la boucle asyncio ainsi que le CPU du
+processus.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+import psutil
+
+
+# Seuils du drapeau "sender-bound": débit court ET émetteur visiblement saturé.
+SENDER_BOUND_RATIO = 0.9
+SENDER_BOUND_CPU_PCT = 90.0
+SENDER_BOUND_LOOP_LAG_MS = 5.0
+SENDER_BOUND_PACING_MS = 10.0
+
+
+@dataclass
+class InstrumentSample:
+    t_s: float
+    mbps: float
+    loop_lag_ms_avg: float
+    loop_lag_ms_max: float
+    syscalls_per_s: float
+    pacing_error_ms_avg: float
+    sendto_pct: float
+    proc_cpu_pct: float
+
+
+@dataclass
+class SenderOverhead:
+    loop_lag_ms_avg: float = 0.0
+    loop_lag_ms_max: float = 0.0
+    syscalls_per_s: float = 0.0
+    pacing_error_ms_avg: float = 0.0
+    sendto_pct: float = 0.0
+    proc_cpu_pct: float = 0.0
+    sender_bound: bool = False
+
+
+@dataclass
+class LiveSample:
+    """Échantillon par seconde publié pendant un palier (affichage en direct)."""
+    label: str
+    t_s: float
+    target_mbps: float
+    mbps: float
+    loss_pct: float
+    latency_ms: float
+
+
+class SenderProbe:
+    def __init__(self, lag_tick: float = 0.1):
+        self.lag_tick = lag_tick
+        # Compteurs chauds (incrémentés par le générateur)
+        self.sendto_calls = 0
+        self.sendto_ns = 0
+        self.bytes_sent = 0
+        self.pacing_err_ns = 0
+        self.pacing_samples = 0
+        self.samples: List[InstrumentSample] = []
+        # Appelés à chaque nouvel échantillon (affichage en direct)
+        self.listeners: List[Callable[[InstrumentSample], None]] = []
+        self._process = psutil.Process()
+
+    async def run(self, interval: float = 1.0):
+        """Échantillonne toutes les `interval` secondes jusqu'à annulation."""
+        loop = asyncio.get_running_loop()
+        self._process.cpu_percent(None)
+        start = last = loop.time()
+        prev = (self.sendto_calls, self.sendto_ns, self.bytes_sent, self.pacing_err_ns, self.pacing_samples)
+        lags: List[float] = []
+        while True:
+            scheduled = loop.time() + self.lag_tick
+            await asyncio.sleep(self.lag_tick)
+            now = loop.time()
+            lags.append(max(now - scheduled, 0.0))
+            if now - last < interval:
+                continue
+            cur = (self.sendto_calls, self.sendto_ns, self.bytes_sent, self.pacing_err_ns, self.pacing_samples)
+            calls, ns, nbytes, err_ns, err_n = (c - p for c, p in zip(cur, prev))
+            elapsed = now - last
+            sample = InstrumentSample(
+                t_s=now - start,
+                mbps=nbytes * 8 / 1_000_000 / elapsed,
+                loop_lag_ms_avg=sum(lags) / len(lags) * 1000,
+                loop_lag_ms_max=max(lags) * 1000,
+                syscalls_per_s=calls / elapsed,
+                pacing_error_ms_avg=(err_ns / err_n / 1e6) if err_n else 0.0,
+                sendto_pct=ns / 1e9 / elapsed * 100,
+                proc_cpu_pct=self._process.cpu_percent(None),
+            )
+            self.samples.append(sample)
+            for listener in self.listeners:
+                listener(sample)
+            prev = cur
+            last = now
+            lags = []
+
+    def summary(self, target_mbps: float, achieved_mbps: float, protocol: str = "UDP") -> SenderOverhead:
+        if not self.samples:
+            return SenderOverhead()
+        n = len(self.samples)
+
+        def avg(attr: str) -> float:
+            return sum(getattr(s, attr) for s in self.samples) / n
+
+        ov = SenderOverhead(
+            loop_lag_ms_avg=avg("loop_lag_ms_avg"),
+            loop_lag_ms_max=max(s.loop_lag_ms_max for s in self.samples),
+            syscalls_per_s=avg("syscalls_per_s"),
+            pacing_error_ms_avg=avg("pacing_error_ms_avg"),
+            sendto_pct=avg("sendto_pct"),
+            proc_cpu_pct=avg("proc_cpu_pct"),
+        )
+        short = target_mbps > 0 and achieved_mbps < target_mbps * SENDER_BOUND_RATIO
+        # Un retard de pacing TCP peut venir de la fenêtre de congestion: seul l'UDP le compte.
+        saturated = (
+            ov.proc_cpu_pct >= SENDER_BOUND_CPU_PCT
+            or ov.loop_lag_ms_avg >= SENDER_BOUND_LOOP_LAG_MS
+            or (protocol == "UDP" and ov.pacing_error_ms_avg >= SENDER_BOUND_PACING_MS)
+        )
+        ov.sender_bound = bool(short and saturated)
+        return ov
+
+
+def attach_live(
+    probe: SenderProbe,
+    label: str,
+    target_mbps: float,
+    on_sample: Callable[[LiveSample], None],
+    ping: Optional[Any] = None,
+    target_at: Optional[Callable[[float], float]] = None,
+):
+    """Publie un `LiveSample` à chaque échantillon du probe.
+
+    `ping` (ex: `metrics.PingMonitor`) fournit latence et perte courantes;
+    `target_at(t_s)` donne la cible courante d'un palier à enveloppe.
+    """
+
+    def _publish(s: InstrumentSample):
+        on_sample(
+            LiveSample(
+                label=label,
+                t_s=s.t_s,
+                target_mbps=target_at(s.t_s) if target_at is not None else target_mbps,
+                mbps=s.mbps,
+                loss_pct=ping.loss_pct if ping is not None else 0.0,
+                latency_ms=ping.latency_ms if ping is not None else float("nan"),
+            )
+        )
+
+    probe.listeners.append(_publish)
+
+
+__all__ = ["SenderProbe", "InstrumentSample", "SenderOverhead", "LiveSample", "attach_live"]
@@ -28,7 +28,14 @@ async def run_iperf(
     proc = await asyncio.create_subprocess_exec(
         *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
     )
-    out, _ = await proc.communicate()
+    try:
+        out, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        # Échéance du palier dépassée: ne pas laisser iperf3 tourner en arrière-plan
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
     try:
         data = json.loads(out.decode(errors="ignore"))
         end = data.get("end", {})
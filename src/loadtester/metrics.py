@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import math
 import platform
 import re
+import socket
 import statistics
-import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import psutil
 
+from .ring import RingBuffer
+
 
 @dataclass
 class PingResult:
@@ -21,9 +24,11 @@ class PingResult:
 async def run_ping(host: str, count: int = 4, timeout: int = 4) -> PingResult:
     system = platform.system().lower()
     if system == "windows":
-        cmd = ["ping", "-n", str(count), host]
+        cmd = ["ping", "-n", str(count), "-w", str(int(timeout * 1000)), host]
+    elif system == "darwin":
+        cmd = ["ping", "-c", str(count), "-W", str(int(timeout * 1000)), host]
     else:
-        cmd = ["ping", "-c", str(count), host]
+        cmd = ["ping", "-c", str(count), "-W", str(int(timeout)), host]
     proc = await asyncio.create_subprocess_exec(
         *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
     )
@@ -45,23 +50,185 @@ async def run_ping(host: str, count: int = 4, timeout: int = 4) -> PingResult:
     return PingResult(avg_latency, jitter, packet_loss)
 
 
+class PingMonitor:
+    """Ping continu (un écho par `interval`) pour l'affichage en direct.
+
+    Expose la dernière latence mesurée, la moyenne et la perte cumulées depuis
+    le démarrage ou le dernier `reset()`.
+    """
+
+    def __init__(self, host: str, interval: float = 1.0):
+        self.host = host
+        self.interval = interval
+        self.latency_ms = float("nan")
+        self.sent = 0
+        self.lost = 0
+        self.latency_sum_ms = 0.0
+
+    @property
+    def loss_pct(self) -> float:
+        return self.lost / self.sent * 100 if self.sent else 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        replies = self.sent - self.lost
+        return self.latency_sum_ms / replies if replies else float("nan")
+
+    def reset(self):
+        self.sent = self.lost = 0
+        self.latency_sum_ms = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            res = await run_ping(self.host, count=1, timeout=max(int(self.interval), 1))
+            self.sent += 1
+            if math.isnan(res.avg_latency_ms):
+                self.lost += 1
+            else:
+                self.latency_ms = res.avg_latency_ms
+                self.latency_sum_ms += res.avg_latency_ms
+            await asyncio.sleep(max(self.interval - (loop.time() - start), 0.0))
+
+
+@dataclass
+class NicSummary:
+    """Débits vus par une interface réseau sur la fenêtre: contrôle indépendant du générateur."""
+    name: str
+    tx_mbps: float = 0.0
+    rx_mbps: float = 0.0
+    tx_pps: float = 0.0
+    rx_pps: float = 0.0
+    errors: int = 0  # errin + errout
+    drops: int = 0  # dropin + dropout
+
+
 @dataclass
 class ResourceSample:
     cpu_pct: float
     mem_pct: float
+    cpu_core_max_pct: float = 0.0  # cœur le plus chargé (moyenne sur la fenêtre)
+    proc_cpu_pct: float = 0.0  # notre processus (100 = un cœur)
+    proc_cpu_max_pct: float = 0.0
+    nic: Optional[NicSummary] = None
+
+
+def interface_for(host: str) -> Optional[str]:
+    """Interface par laquelle le noyau route vers `host` (None si introuvable)."""
+    try:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        with socket.socket(family, socket.SOCK_DGRAM) as s:
+            s.connect((host, 9))  # UDP: aucune émission, seulement le choix de la route
+            local = s.getsockname()[0]
+    except OSError:
+        return None
+    return interface_with_address(local)
+
+
+def interface_with_address(address: str) -> Optional[str]:
+    """Interface portant l'adresse locale `address` (None si aucune)."""
+    for name, addrs in psutil.net_if_addrs().items():
+        if any(a.address.split("%")[0] == address for a in addrs):
+            return name
+    return None
+
+
+NIC_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv", "errin", "errout", "dropin", "dropout")
+DEFAULT_SAMPLE_INTERVAL_S = 0.1
+DEFAULT_SAMPLE_CAPACITY = 36_000  # 1 h à 10 Hz
+# Lignes en plus de `duration_s / interval` (réveils en retard, fin de palier)
+SAMPLE_MARGIN = 1.1
+SAMPLE_MIN_ROWS = 16
+
+
+class ResourceSampler:
+    """Échantillonne CPU par cœur, RAM, CPU du processus et compteurs de chaque interface.
+
+    Une ligne par `interval` dans un `RingBuffer`: t, mémoire, CPU du
+    processus, un CPU par cœur, puis les `NIC_FIELDS` bruts (cumulés) de chaque
+    interface présente au démarrage. Tourne jusqu'à annulation: la fenêtre est
+    fixée par l'appelant (`TierScheduler`). Avec `duration_s`, le tampon est
+    dimensionné pour cette fenêtre, sans dépasser `capacity` lignes.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_SAMPLE_INTERVAL_S,
+        capacity: int = DEFAULT_SAMPLE_CAPACITY,
+        duration_s: Optional[float] = None,
+    ):
+        self.interval = interval
+        if duration_s is not None and interval > 0:
+            capacity = min(capacity, int(duration_s / interval * SAMPLE_MARGIN) + SAMPLE_MIN_ROWS)
+        self.cores = psutil.cpu_count() or 1
+        self.nics: List[str] = sorted(psutil.net_io_counters(pernic=True))
+        self.buffer = RingBuffer(capacity, 3 + self.cores + len(NIC_FIELDS) * len(self.nics))
+        self._process = psutil.Process()
+
+    def _nic_values(self) -> List[float]:
+        counters = psutil.net_io_counters(pernic=True)
+        values: List[float] = []
+        for name in self.nics:
+            c = counters.get(name)
+            values.extend(float(getattr(c, f)) if c is not None else math.nan for f in NIC_FIELDS)
+        return values
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        # Amorces: la première mesure de CPU n'a pas de référence
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._process.cpu_percent(None)
+        nan = [math.nan] * (1 + self.cores)  # CPU du processus et des cœurs: pas encore de mesure
+        self.buffer.append([loop.time(), psutil.virtual_memory().percent] + nan + self._nic_values())
+        while True:
+            await asyncio.sleep(self.interval)
+            cores = psutil.cpu_percent(interval=None, percpu=True)
+            cores = (list(cores) + [math.nan] * self.cores)[:self.cores]
+            self.buffer.append(
+                [loop.time(), psutil.virtual_memory().percent, self._process.cpu_percent(None)]
+                + cores
+                + self._nic_values()
+            )
+
+    def nic_summary(self, name: str) -> Optional[NicSummary]:
+        if name not in self.nics or len(self.buffer) < 2:
+            return None
+        base = 3 + self.cores + self.nics.index(name) * len(NIC_FIELDS)
+        first, last = self.buffer.row(0), self.buffer.row(-1)
+        dt = last[0] - first[0]
+        d = [last[base + i] - first[base + i] for i in range(len(NIC_FIELDS))]
+        if dt <= 0 or any(math.isnan(v) for v in d):
+            return NicSummary(name)
+        return NicSummary(
+            name=name,
+            tx_mbps=d[0] * 8 / 1_000_000 / dt,
+            rx_mbps=d[1] * 8 / 1_000_000 / dt,
+            tx_pps=d[2] / dt,
+            rx_pps=d[3] / dt,
+            errors=int(d[4] + d[5]),
+            drops=int(d[6] + d[7]),
+        )
 
+    def summary(self, nic: Optional[str] = None) -> ResourceSample:
+        """Moyennes de la fenêtre; `nic` ajoute les débits vus par cette interface."""
+        def avg(values):
+            values = [v for v in values if not math.isnan(v)]
+            return sum(values) / len(values) if values else 0.0
 
-async def sample_resources(interval: float, duration: float) -> ResourceSample:
-    cpu_values = []
-    mem_values = []
-    start = time.time()
-    while time.time() - start < duration:
-        cpu_values.append(psutil.cpu_percent(interval=None))
-        mem_values.append(psutil.virtual_memory().percent)
-        await asyncio.sleep(interval)
-    def avg(values):
-        return sum(values) / len(values) if values else 0.0
-    return ResourceSample(avg(cpu_values), avg(mem_values))
+        per_core = [avg(self.buffer.column(3 + i)) for i in range(self.cores)]
+        proc = [v for v in self.buffer.column(2) if not math.isnan(v)]
+        return ResourceSample(
+            cpu_pct=sum(per_core) / len(per_core),
+            mem_pct=avg(self.buffer.column(1)),
+            cpu_core_max_pct=max(per_core),
+            proc_cpu_pct=avg(proc),
+            proc_cpu_max_pct=max(proc, default=0.0),
+            nic=self.nic_summary(nic) if nic is not None else None,
+        )
 
 
-__all__ = ["PingResult", "run_ping", "ResourceSample", "sample_resources"]
+__all__ = [
+    "PingResult", "run_ping", "PingMonitor", "ResourceSample", "NicSummary", "ResourceSampler",
+    "interface_for", "interface_with_address", "NIC_FIELDS",
+]
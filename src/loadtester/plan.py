@@ -0,0 +1,249 @@
+"""Plan d'exécution (`loadtester --dry-run`): durée, volumes et faisabilité de chaque palier.
+
+    loadtester --config config/config.yaml --dry-run
+    loadtester --config config/config.yaml --dry-run --no-calibration
+
+Pour chaque palier, sans rien envoyer vers la cible:
+- durée murale estimée: mesure à vide, palier (borne haute `max_s` en régime
+  établi) et mise en place;
+- paquets, octets et pps du trafic principal et des flux de classe.
+
+Avant de mobiliser un créneau de test, une calibration locale envoie ensuite
+`CALIBRATION_S` secondes à plein débit vers la boucle locale. Elle est faite
+pour chaque combinaison (protocole, packet_size, connexions) du fichier, avec
+la boucle d'événements choisie. Elle donne le pps maximal du pacer et le débit
+loopback. La boucle locale est un cas idéal, sans carte réseau: un palier dont
+la crête dépasse `FEASIBLE_RATIO` de ce maximum ne sera pas tenu sur le
+terrain. L'inverse n'est pas garanti.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .config import FullConfig, TierConfig
+
+CALIBRATION_S = 0.5
+# Cible "illimitée" de la calibration (au-delà de ce que la boucle locale peut tenir)
+BLAST_MBPS = 5000.0
+FEASIBLE_RATIO = 0.9
+# Connexions, arrêt du trafic et rapport d'un palier
+TIER_SETUP_S = 0.5
+
+CalibrationKey = Tuple[str, int, int]  # (protocole, packet_size, connexions)
+
+
+@dataclass
+class CalibrationPoint:
+    protocol: str
+    packet_size: int
+    connections: int
+    mbps: float
+    pps: float
+
+
+@dataclass
+class TierPlan:
+    name: str
+    protocol: str
+    duration_s: float  # borne haute en régime établi
+    wall_s: float
+    target_mbps: float  # moyenne visée (enveloppe comprise)
+    peak_mbps: float
+    packet_size: int
+    connections: int  # sockets / connexions du trafic principal, toutes cibles
+    packets: int  # trafic principal et flux de classe
+    bytes: int
+    pps: float  # crête
+    capacity_mbps: float = float("nan")  # calibration locale, NaN sans calibration
+    capacity_pps: float = float("nan")
+    feasible: bool = True
+    note: str = ""
+
+
+@dataclass
+class RunPlan:
+    tiers: List[TierPlan]
+    loop_backend: str
+    calibration: List[CalibrationPoint] = field(default_factory=list)
+    calibration_s: float = 0.0
+
+    @property
+    def wall_s(self) -> float:
+        return sum(t.wall_s for t in self.tiers)
+
+    @property
+    def max_pps(self) -> float:
+        """pps maximal du pacer UDP mesuré en calibration (0 sans calibration)."""
+        return max((c.pps for c in self.calibration if c.protocol == "UDP"), default=0.0)
+
+    @property
+    def loopback_mbps(self) -> float:
+        return max((c.mbps for c in self.calibration), default=0.0)
+
+
+def _main_connections(tier: TierConfig) -> int:
+    # UDP: chaque socket arrose toutes les cibles; TCP: une connexion par cible. Le tout par source.
+    conns = max(tier.connections, 1) * max(len(tier.sources), 1)
+    return conns if tier.protocol == "UDP" else conns * max(len(tier.targets), 1)
+
+
+def tier_plan(tier: TierConfig, cfg: FullConfig) -> TierPlan:
+    g = cfg.global_
+    duration = float(tier.duration_s)
+    if g.steady is not None and tier.envelope is None:
+        duration = g.steady.bounds(tier.duration_s)[1]
+    nbytes = tier.mean_target_mbps * 1_000_000 / 8 * duration
+    packets = nbytes / tier.packet_size
+    pps = tier.peak_mbps * 1_000_000 / 8 / tier.packet_size
+    for st in tier.streams:
+        st_bytes = st.target_bandwidth_mbps * 1_000_000 / 8 * duration
+        nbytes += st_bytes
+        packets += st_bytes / st.packet_size
+        pps += st.target_bandwidth_mbps * 1_000_000 / 8 / st.packet_size
+    return TierPlan(
+        name=tier.name,
+        protocol=tier.protocol,
+        duration_s=duration,
+        wall_s=g.idle_probe_s + duration + TIER_SETUP_S,
+        target_mbps=tier.mean_target_mbps,
+        peak_mbps=tier.peak_mbps,
+        packet_size=tier.packet_size,
+        connections=_main_connections(tier),
+        packets=int(packets),
+        bytes=int(nbytes),
+        pps=pps,
+    )
+
+
+class _Discard(asyncio.Protocol):
+    def data_received(self, data: bytes):
+        pass
+
+
+async def calibrate_point(protocol: str, packet_size: int, connections: int, duration_s: float = CALIBRATION_S) -> CalibrationPoint:
+    """Débit et pps maximaux de notre émetteur vers la boucle locale."""
+    from .generator import generate_traffic
+
+    server = sink = None
+    if protocol == "TCP":
+        server = await asyncio.get_running_loop().create_server(_Discard, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+    else:
+        # Personne ne lit: le noyau jette le surplus, `sendto` mesure bien le pacer
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        port = sink.getsockname()[1]
+    try:
+        stats = await generate_traffic(protocol, "127.0.0.1", port, packet_size, BLAST_MBPS, connections, duration_s)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        if sink is not None:
+            sink.close()
+    mbps = stats.mbps
+    return CalibrationPoint(protocol, packet_size, connections, mbps, mbps * 1_000_000 / 8 / packet_size)
+
+
+async def build_plan(cfg: FullConfig, calibrate: bool = True, loop_backend: str = "asyncio") -> RunPlan:
+    plans = [tier_plan(t, cfg) for t in cfg.tiers]
+    if cfg.global_.session:
+        # Session persistante: une seule mesure à vide, au premier palier (voir session)
+        for tp in plans[1:]:
+            tp.wall_s -= cfg.global_.idle_probe_s
+    plan = RunPlan(plans, loop_backend)
+    if not calibrate:
+        return plan
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    points: Dict[CalibrationKey, CalibrationPoint] = {}
+    for tier, tp in zip(cfg.tiers, plans):
+        key = (tier.protocol, tier.packet_size, tp.connections)
+        if key not in points:
+            points[key] = await calibrate_point(*key)
+        _assess(tp, points[key])
+    plan.calibration = list(points.values())
+    plan.calibration_s = loop.time() - start
+    return plan
+
+
+def _assess(tp: TierPlan, point: CalibrationPoint):
+    tp.capacity_mbps, tp.capacity_pps = point.mbps, point.pps
+    if tp.peak_mbps > point.mbps * FEASIBLE_RATIO:
+        tp.feasible = False
+        tp.note = (
+            f"émetteur limité à {point.mbps:.0f} Mbps ({point.pps:.0f} pps) en boucle locale "
+            f"avec packet_size={tp.packet_size}, {tp.connections} connexion(s)"
+        )
+
+
+def _human_bytes(n: float) -> str:
+    for unit in ("o", "ko", "Mo", "Go"):
+        if n < 1000:
+            return f"{n:.0f} {unit}"
+        n /= 1000
+    return f"{n:.1f} To"
+
+
+def format_plan(plan: RunPlan) -> str:
+    lines = []
+    for t in plan.tiers:
+        flag = "" if t.feasible else "  INFAISABLE: " + t.note
+        lines.append(
+            f"{t.name:<16} {t.protocol:<3} {t.wall_s:6.1f} s  {t.peak_mbps:7.1f} Mbps  {t.pps:9.0f} pps  "
+            f"{t.packets:>11,} paquets  {_human_bytes(t.bytes):>8}{flag}"
+        )
+    total_s = plan.wall_s
+    lines.append(f"Durée totale estimée: {total_s / 60:.1f} min ({total_s:.0f} s), {len(plan.tiers)} palier(s)")
+    if plan.calibration:
+        lines.append(
+            f"Calibration ({plan.loop_backend}, {plan.calibration_s:.1f} s): pacer UDP {plan.max_pps:.0f} pps max, "
+            f"boucle locale {plan.loopback_mbps:.0f} Mbps max"
+        )
+        blocked = [t.name for t in plan.tiers if not t.feasible]
+        if blocked:
+            lines.append(f"{len(blocked)} palier(s) hors de portée de cet émetteur: {', '.join(blocked)}")
+    return "\n".join(lines)
+
+
+def write_plan(plan: RunPlan, output_dir: str) -> Path:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / ("plan_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S") + ".csv")
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow([
+            "tier_name", "protocol", "duration_s", "wall_s", "target_mbps", "peak_mbps", "packet_size",
+            "connections", "packets", "bytes", "pps", "capacity_mbps", "capacity_pps", "feasible", "note",
+        ])
+        for t in plan.tiers:
+            w.writerow([
+                t.name,
+                t.protocol,
+                f"{t.duration_s:.1f}",
+                f"{t.wall_s:.1f}",
+                f"{t.target_mbps:.2f}",
+                f"{t.peak_mbps:.2f}",
+                t.packet_size,
+                t.connections,
+                t.packets,
+                t.bytes,
+                f"{t.pps:.0f}",
+                f"{t.capacity_mbps:.2f}",
+                f"{t.capacity_pps:.0f}",
+                int(t.feasible),
+                t.note,
+            ])
+    return path
+
+
+__all__ = [
+    "RunPlan", "TierPlan", "CalibrationPoint", "build_plan", "tier_plan", "calibrate_point",
+    "format_plan", "write_plan",
+]
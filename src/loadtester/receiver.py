@@ -2,17 +2,74 @@
 
 UDP: Attend des paquets avec optionnel numéro de séquence 8 octets (big-endian).
 TCP: Compte octets agrégés toutes les N secondes.
+
+Sous Linux, l'heure d'arrivée des datagrammes est prise dans l'horodatage noyau
+(`SO_TIMESTAMPNS`) plutôt qu'au moment où la boucle asyncio les traite: les
+métriques temporelles ne dépendent ainsi pas de la charge de la boucle.
+
+Par flux, le récepteur tient un histogramme à mémoire fixe des temps
+d'inter-arrivée et détecte les rafales (agrégation A-MPDU, tampons de l'AP):
+paquets arrivant à moins de `burst_gap_us` les uns des autres. Les trous
+supérieurs à `gap_threshold_ms` (seuil du watchdog AMR) sont comptés.
+
+Pour les essais longs (soak), `stream=True` écrit chaque intervalle dans le CSV
+dès sa clôture au lieu de tout garder en mémoire, et `flow_idle_s` oublie les
+flux muets depuis ce délai (leurs histogrammes sont fusionnés dans un agrégat).
+
+Les paquets à en-tête étendu (voir `wire`) portent leur heure d'envoi: le
+récepteur suit le délai aller par flux et, si l'émetteur le demande, lui
+renvoie toutes les `feedback_interval` secondes compteurs et délais (boucle
+fermée de `goodput`). Ils portent aussi leur classe (DSCP): perte, délai aller
+et gigue sont ventilés par classe dans `<output>.classes.csv`. Le délai est
+compté au-dessus du minimum tous flux confondus: le décalage d'horloge entre
+émetteur et récepteur s'annule, les classes restent comparables entre elles.
+
+Avec `echo_port`, le récepteur sert aussi de réflecteur pour la sonde de
+latence (voir `responsiveness`): chaque requête est renvoyée avec le temps
+passé dans le récepteur, mesuré depuis l'horodatage noyau quand il existe.
+
+Avec `metrics_port`, les compteurs cumulés, les débits par flux et les
+histogrammes (inter-arrivées, délai aller par classe) sont exposés au format
+OpenMetrics (voir `exporter`).
 """
 from __future__ import annotations
 
 import argparse
 import asyncio
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 import csv
+import json
+import math
+import socket
+import struct
 import sys
+import time
+
+from . import eventloop
+from .histogram import Log2Histogram
+from .wire import EXT_FLAG, EXT_HEADER, FLAG_FEEDBACK, SEQ_MASK, Feedback, echo_reply, pack_feedback, wmm_category
+
+
+# Python n'expose pas SO_TIMESTAMPNS: valeur Linux (SCM_TIMESTAMPNS == SO_TIMESTAMPNS).
+_SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+_TIMESPEC = struct.Struct("@ll")
+_SEQ = struct.Struct("!Q")
+_OWD_UNSET = 1 << 62
+# Datagrammes lus au maximum par réveil du lecteur (évite d'affamer la boucle).
+_RECV_BATCH = 64
+# Intervalles gardés en mémoire en mode streaming (le reste est sur disque)
+_STREAM_KEEP_STATS = 60
+_CSV_HEADER = [
+    "timestamp", "udp_packets", "udp_bytes", "udp_loss_est", "tcp_bytes",
+    "udp_jitter_ms", "rx_overhead_us_avg", "rx_overhead_us_max",
+    "iat_p50_us", "iat_p99_us", "max_gap_ms", "long_gaps", "bursts", "burst_len_max",
+]
+_CLASS_CSV_HEADER = [
+    "timestamp", "dscp", "wmm", "packets", "lost", "loss_pct", "owd_avg_ms", "owd_p99_ms", "owd_max_ms", "jitter_ms",
+]
 
 
 @dataclass
@@ -22,33 +79,208 @@ class IntervalStats:
     udp_bytes: int
     udp_loss_est: int
     tcp_bytes: int
+    udp_jitter_ms: float = 0.0
+    rx_overhead_us_avg: float = 0.0
+    rx_overhead_us_max: float = 0.0
+    iat_p50_us: int = 0
+    iat_p99_us: int = 0
+    max_gap_ms: float = 0.0
+    long_gaps: int = 0
+    bursts: int = 0
+    burst_len_max: int = 0
+
+    def csv_row(self) -> list:
+        return [
+            self.ts.isoformat(), self.udp_packets, self.udp_bytes, self.udp_loss_est, self.tcp_bytes,
+            f"{self.udp_jitter_ms:.3f}", f"{self.rx_overhead_us_avg:.1f}", f"{self.rx_overhead_us_max:.1f}",
+            self.iat_p50_us, self.iat_p99_us, f"{self.max_gap_ms:.2f}", self.long_gaps, self.bursts, self.burst_len_max,
+        ]
+
+
+@dataclass
+class ClassIntervalStats:
+    """Bilan d'un intervalle pour une classe de trafic (DSCP); délais au-dessus du minimum global."""
+    ts: datetime
+    dscp: int
+    wmm: str
+    packets: int
+    lost: int
+    loss_pct: float
+    owd_avg_ms: float
+    owd_p99_ms: float
+    owd_max_ms: float
+    jitter_ms: float
+
+    def csv_row(self) -> list:
+        return [
+            self.ts.isoformat(), self.dscp, self.wmm, self.packets, self.lost, f"{self.loss_pct:.2f}",
+            f"{self.owd_avg_ms:.3f}", f"{self.owd_p99_ms:.3f}", f"{self.owd_max_ms:.3f}", f"{self.jitter_ms:.3f}",
+        ]
+
+
+class _ClassStats:
+    """Compteurs d'intervalle d'une classe (remis à zéro à chaque snapshot)."""
+
+    __slots__ = ("dscp", "packets", "lost", "owd_sum_ns", "owd_max_ns", "owd_hist", "owd_total", "packets_total", "lost_total")
+
+    def __init__(self, dscp: int):
+        self.dscp = dscp
+        self.packets = 0
+        self.lost = 0
+        self.owd_sum_ns = 0
+        self.owd_max_ns = 0
+        self.owd_hist = Log2Histogram()  # délai au-dessus du minimum, en µs
+        # Cumuls des intervalles clos (exposition OpenMetrics)
+        self.owd_total = Log2Histogram()
+        self.packets_total = 0
+        self.lost_total = 0
+
+
+class _UDPFlow:
+    """État par flux UDP (adresse source): séquence, inter-arrivées et rafales."""
+
+    __slots__ = (
+        "last_seq", "last_arrival_ns", "last_gap_ns", "jitter_ns", "interval_packets",
+        "iat", "iat_prev", "bursts", "burst_len", "max_gap_ns", "idle_intervals",
+        "received", "lost", "owd_sum_ns", "owd_n", "owd_min_ns", "feedback",
+        "cls", "last_owd_ns", "owd_jitter_ns", "interval_bytes", "rate_pps", "rate_mbps",
+    )
+
+    def __init__(self):
+        self.last_seq: int | None = None
+        self.last_arrival_ns: int | None = None
+        self.last_gap_ns: int | None = None
+        self.jitter_ns = 0.0
+        self.interval_packets = 0
+        self.iat = Log2Histogram()  # inter-arrivées en µs (cumul du flux)
+        self.iat_prev = [0] * len(self.iat.counts)  # instantané au dernier intervalle
+        self.bursts = Log2Histogram(16)  # longueurs de rafale en paquets
+        self.burst_len = 1
+        self.max_gap_ns = 0
+        self.idle_intervals = 0
+        # Compteurs cumulés et délai aller (en-tête étendu) pour le retour à l'émetteur
+        self.received = 0
+        self.lost = 0
+        self.owd_sum_ns = 0
+        self.owd_n = 0
+        self.owd_min_ns = _OWD_UNSET
+        self.feedback = False
+        # Classe de trafic (DSCP de l'en-tête étendu) et gigue du délai aller
+        self.cls: _ClassStats | None = None
+        self.last_owd_ns: int | None = None
+        self.owd_jitter_ns = 0.0
+        # Débit du dernier intervalle clos
+        self.interval_bytes = 0
+        self.rate_pps = 0.0
+        self.rate_mbps = 0.0
 
 
 class Receiver:
-    def __init__(self, udp_port: int, tcp_port: int | None, interval: int, output: str | None):
+    def __init__(
+        self,
+        udp_port: int,
+        tcp_port: int | None,
+        interval: int,
+        output: str | None,
+        kernel_timestamps: bool = True,
+        burst_gap_us: int = 200,
+        gap_threshold_ms: float = 100.0,
+        host: str = "0.0.0.0",
+        verbose: bool = True,
+        stream: bool = False,
+        flow_idle_s: float | None = None,
+        feedback_interval: float = 0.1,
+        echo_port: int | None = None,
+        metrics_port: int | None = None,
+        metrics_host: str = "127.0.0.1",
+    ):
         self.udp_port = udp_port
+        self.echo_port = echo_port
+        self.echo_replies = 0
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        # Cumuls des intervalles clos (les compteurs ci-dessous repartent de zéro à chaque intervalle)
+        self.totals = {"udp_packets": 0, "udp_bytes": 0, "udp_loss": 0, "tcp_bytes": 0}
         self.tcp_port = tcp_port
+        self.host = host
+        self.verbose = verbose
         self.interval = interval
         self.output = output
+        self.kernel_timestamps = kernel_timestamps and sys.platform.startswith("linux")
         self.udp_packets = 0
         self.udp_bytes = 0
-        self.udp_last_seq: int | None = None
         self.udp_loss = 0
         self.tcp_bytes = 0
-        self.stats: list[IntervalStats] = []
+        self.flows: dict[tuple, _UDPFlow] = {}
+        self.burst_gap_ns = int(burst_gap_us * 1000)
+        self.gap_threshold_ns = int(gap_threshold_ms * 1_000_000)
+        self.max_gap_ns = 0
+        self.long_gaps = 0
+        self.burst_count = 0
+        self.burst_len_max = 0
+        # Écart horodatage noyau -> traitement Python (coût de réception côté récepteur)
+        self.rx_overhead_ns_sum = 0
+        self.rx_overhead_ns_max = 0
+        self.rx_overhead_samples = 0
+        # Mode streaming (soak): chaque intervalle part sur disque, seuls les derniers restent
+        self.stream = stream and bool(output)
+        self.stats: list[IntervalStats] | deque[IntervalStats] = (
+            deque(maxlen=_STREAM_KEEP_STATS) if self.stream else []
+        )
+        self.classes: dict[int, _ClassStats] = {}
+        self.class_stats: list[ClassIntervalStats] | deque[ClassIntervalStats] = (
+            deque(maxlen=_STREAM_KEEP_STATS) if self.stream else []
+        )
+        self.owd_base_ns = _OWD_UNSET
+        self._streams: dict[Path, tuple] = {}
+        # Oubli des flux muets depuis `flow_idle_s` (en nombre d'intervalles)
+        self.flow_idle_intervals = math.ceil(flow_idle_s / max(interval, 1)) if flow_idle_s else None
+        self.pruned_flows = 0
+        self._pruned_iat = Log2Histogram()
+        self._pruned_bursts = Log2Histogram(16)
+        self.feedback_interval = feedback_interval
+        self._udp_sock: socket.socket | None = None
+        self._echo_sock: socket.socket | None = None
+        self._reply = None
 
     async def start(self):
         loop = asyncio.get_running_loop()
         # UDP
-        transport, protocol = await loop.create_datagram_endpoint(
-            lambda: self._UDPProtocol(self), ("0.0.0.0", self.udp_port)
-        )
+        transport = None
+        if self.kernel_timestamps:
+            self.kernel_timestamps = self._open_timestamped_socket(loop)
+        if not self.kernel_timestamps:
+            transport, protocol = await loop.create_datagram_endpoint(
+                lambda: self._UDPProtocol(self), (self.host, self.udp_port)
+            )
+            self.udp_port = transport.get_extra_info("sockname")[1]
+            self._reply = transport.sendto
+        else:
+            self._reply = self._udp_sock.sendto
         # TCP
-        if self.tcp_port:
-            server = await asyncio.start_server(self._handle_tcp, host="0.0.0.0", port=self.tcp_port)
+        if self.tcp_port is not None:
+            server = await asyncio.start_server(self._handle_tcp, host=self.host, port=self.tcp_port)
+            self.tcp_port = server.sockets[0].getsockname()[1]
         else:
             server = None
-        print(f"[Receiver] UDP port {self.udp_port} | TCP port {self.tcp_port or '-'} | interval {self.interval}s")
+        echo_transport = None
+        if self.echo_port is not None:
+            echo_transport = await self._open_echo(loop)
+        metrics = None
+        if self.metrics_port is not None:
+            from .exporter import MetricsServer
+
+            metrics = MetricsServer(self.metrics_port, self.metrics_host)
+            metrics.add_collector(self.metric_families)
+            await metrics.start()
+            self.metrics_port = metrics.port
+        clock = "noyau" if self.kernel_timestamps else "boucle"
+        self._log(
+            f"[Receiver] UDP port {self.udp_port} | TCP port {self.tcp_port or '-'} | écho {self.echo_port or '-'}"
+            f" | interval {self.interval}s"
+            f" | horodatage {clock} | boucle {type(loop).__module__.split('.')[0]}"
+        )
+        feedback_task = asyncio.create_task(self._feedback_loop())
         try:
             while True:
                 await asyncio.sleep(self.interval)
@@ -56,24 +288,271 @@ class Receiver:
         except asyncio.CancelledError:
             pass
         finally:
-            transport.close()
+            feedback_task.cancel()
+            await asyncio.gather(feedback_task, return_exceptions=True)
+            if transport is not None:
+                transport.close()
+            if echo_transport is not None:
+                echo_transport.close()
+            if metrics is not None:
+                await metrics.close()
+            if self._echo_sock is not None:
+                loop.remove_reader(self._echo_sock.fileno())
+                self._echo_sock.close()
+                self._echo_sock = None
+            if self._udp_sock is not None:
+                loop.remove_reader(self._udp_sock.fileno())
+                self._udp_sock.close()
+                self._udp_sock = None
             if server:
                 server.close()
                 await server.wait_closed()
             self._write()
 
+    def _open_timestamped_socket(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Ouvre le socket UDP avec SO_TIMESTAMPNS et un lecteur `recvmsg`.
+
+        Retourne False si le noyau ou la boucle (ex: Proactor) ne le permettent pas;
+        l'appelant retombe alors sur le `DatagramProtocol` classique.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+            sock.bind((self.host, self.udp_port))
+            self.udp_port = sock.getsockname()[1]
+            sock.setblocking(False)
+            loop.add_reader(sock.fileno(), self._on_udp_readable)
+        except (OSError, NotImplementedError):
+            sock.close()
+            return False
+        self._udp_sock = sock
+        return True
+
+    async def _open_echo(self, loop: asyncio.AbstractEventLoop):
+        """Réflecteur d'écho: socket `recvmsg` horodaté si possible, sinon `DatagramProtocol`.
+
+        Retourne le transport du repli (None avec le socket horodaté).
+        """
+        if self.kernel_timestamps:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)
+                sock.bind((self.host, self.echo_port))
+                sock.setblocking(False)
+                loop.add_reader(sock.fileno(), self._on_echo_readable)
+            except (OSError, NotImplementedError):
+                sock.close()
+            else:
+                self._echo_sock = sock
+                self.echo_port = sock.getsockname()[1]
+                return None
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: self._EchoProtocol(self), (self.host, self.echo_port)
+        )
+        self.echo_port = transport.get_extra_info("sockname")[1]
+        return transport
+
+    def _on_echo_readable(self):
+        sock = self._echo_sock
+        if sock is None:
+            return
+        ancbufsize = socket.CMSG_SPACE(_TIMESPEC.size)
+        for _ in range(_RECV_BATCH):
+            try:
+                data, ancdata, _flags, addr = sock.recvmsg(2048, ancbufsize)
+            except OSError:
+                return
+            arrival_ns = None
+            for level, ctype, cdata in ancdata:
+                if level == socket.SOL_SOCKET and ctype == _SO_TIMESTAMPNS and len(cdata) >= _TIMESPEC.size:
+                    sec, nsec = _TIMESPEC.unpack_from(cdata)
+                    arrival_ns = sec * 1_000_000_000 + nsec
+            reply = echo_reply(data, time.time_ns() - arrival_ns if arrival_ns else 0)
+            if reply is not None:
+                try:
+                    sock.sendto(reply, addr)
+                    self.echo_replies += 1
+                except OSError:
+                    pass
+
+    def _on_udp_readable(self):
+        sock = self._udp_sock
+        if sock is None:
+            return
+        ancbufsize = socket.CMSG_SPACE(_TIMESPEC.size)
+        for _ in range(_RECV_BATCH):
+            try:
+                data, ancdata, _flags, addr = sock.recvmsg(65535, ancbufsize)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            now_ns = time.time_ns()
+            arrival_ns = now_ns
+            for level, ctype, cdata in ancdata:
+                if level == socket.SOL_SOCKET and ctype == _SO_TIMESTAMPNS and len(cdata) >= _TIMESPEC.size:
+                    sec, nsec = _TIMESPEC.unpack_from(cdata)
+                    arrival_ns = sec * 1_000_000_000 + nsec
+                    overhead = now_ns - arrival_ns
+                    self.rx_overhead_ns_sum += overhead
+                    self.rx_overhead_samples += 1
+                    if overhead > self.rx_overhead_ns_max:
+                        self.rx_overhead_ns_max = overhead
+            self._on_datagram(data, addr, arrival_ns)
+
+    def _on_datagram(self, data: bytes, addr, arrival_ns: int):
+        """Comptabilise un datagramme UDP reçu à `arrival_ns` (ns, horloge murale).
+
+        Chemin chaud: pas d'appel de méthode hors fin de rafale et en-tête étendu,
+        histogramme incrémenté en place.
+        """
+        self.udp_packets += 1
+        self.udp_bytes += len(data)
+        seq = _SEQ.unpack_from(data)[0] if len(data) >= 8 else None
+        owd = None
+        if seq is not None and seq & EXT_FLAG:
+            seq &= SEQ_MASK
+            if len(data) >= EXT_HEADER.size:
+                _, send_ns, flags, tclass = EXT_HEADER.unpack_from(data)
+                owd = arrival_ns - send_ns
+        flow = self.flows.get(addr)
+        if flow is None:
+            flow = self.flows[addr] = _UDPFlow()
+            flow.interval_packets = 1
+            flow.interval_bytes = len(data)
+            flow.received = 1
+            flow.last_seq = seq
+            flow.last_arrival_ns = arrival_ns
+            if owd is not None:
+                self._track_owd(flow, owd, flags, tclass)
+            return
+        flow.interval_packets += 1
+        flow.interval_bytes += len(data)
+        flow.received += 1
+        if owd is not None:
+            self._track_owd(flow, owd, flags, tclass)
+        if seq is not None:
+            last_seq = flow.last_seq
+            if seq == 0 and last_seq:
+                # Socket réutilisé par l'émetteur pour un nouveau palier: nouvelle session,
+                # l'attente entre paliers n'est pas un trou du réseau.
+                flow.last_seq = 0
+                flow.last_arrival_ns = arrival_ns
+                flow.last_gap_ns = None
+                flow.burst_len = 1
+                flow.received = 1
+                flow.lost = 0
+                flow.owd_sum_ns = flow.owd_n = 0
+                flow.owd_min_ns = _OWD_UNSET
+                flow.last_owd_ns = None
+                return
+            if last_seq is not None and seq > last_seq + 1:
+                n = seq - last_seq - 1
+                self.udp_loss += n
+                flow.lost += n
+                if flow.cls is not None:
+                    flow.cls.lost += n
+            flow.last_seq = seq
+        gap = arrival_ns - flow.last_arrival_ns
+        flow.last_arrival_ns = arrival_ns
+        last_gap = flow.last_gap_ns
+        if last_gap is not None:
+            # Gigue d'inter-arrivée lissée façon RFC 3550 (gain 1/16)
+            flow.jitter_ns += (abs(gap - last_gap) - flow.jitter_ns) / 16
+        flow.last_gap_ns = gap
+        b = (gap // 1000).bit_length() if gap > 0 else 0
+        flow.iat.counts[b if b < 31 else 31] += 1
+        if gap <= self.burst_gap_ns:
+            flow.burst_len += 1
+            return
+        if flow.burst_len > 1:
+            self._end_burst(flow)
+        else:
+            flow.bursts.counts[1] += 1
+        if gap > flow.max_gap_ns:
+            flow.max_gap_ns = gap
+        if gap > self.max_gap_ns:
+            self.max_gap_ns = gap
+        if gap >= self.gap_threshold_ns:
+            self.long_gaps += 1
+
+    def _track_owd(self, flow: _UDPFlow, owd: int, flags: int, tclass: int):
+        """Délai aller d'un paquet à en-tête étendu: retour émetteur et stats de classe."""
+        flow.owd_sum_ns += owd
+        flow.owd_n += 1
+        if owd < flow.owd_min_ns:
+            flow.owd_min_ns = owd
+        flow.feedback = bool(flags & FLAG_FEEDBACK)
+        cls = flow.cls
+        if cls is None or cls.dscp != tclass:
+            cls = self.classes.get(tclass)
+            if cls is None:
+                cls = self.classes[tclass] = _ClassStats(tclass)
+            flow.cls = cls
+        if owd < self.owd_base_ns:
+            self.owd_base_ns = owd
+        rel = owd - self.owd_base_ns
+        cls.packets += 1
+        cls.owd_sum_ns += rel
+        if rel > cls.owd_max_ns:
+            cls.owd_max_ns = rel
+        b = (rel // 1000).bit_length()
+        cls.owd_hist.counts[b if b < 31 else 31] += 1
+        last = flow.last_owd_ns
+        if last is not None:
+            # Gigue RFC 3550 sur la variation du temps de transit
+            flow.owd_jitter_ns += (abs(owd - last) - flow.owd_jitter_ns) / 16
+        flow.last_owd_ns = owd
+
+    async def _feedback_loop(self):
+        """Renvoie à chaque émetteur qui le demande ses compteurs et délais aller."""
+        while True:
+            await asyncio.sleep(self.feedback_interval)
+            for addr, f in self.flows.items():
+                # Flux muet depuis le dernier retour: l'émetteur a fini, on se tait
+                if not f.feedback or not f.owd_n:
+                    continue
+                fb = Feedback(
+                    highest_seq=f.last_seq or 0,
+                    received=f.received,
+                    lost=f.lost,
+                    owd_avg_ns=f.owd_sum_ns // f.owd_n if f.owd_n else -1,
+                    owd_min_ns=f.owd_min_ns if f.owd_min_ns != _OWD_UNSET else -1,
+                )
+                f.owd_sum_ns = f.owd_n = 0
+                try:
+                    self._reply(pack_feedback(fb), addr)
+                except OSError:
+                    pass
+
+    def _end_burst(self, flow: _UDPFlow):
+        n = flow.burst_len
+        flow.bursts.add(n)
+        self.burst_count += 1
+        if n > self.burst_len_max:
+            self.burst_len_max = n
+        flow.burst_len = 1
+
     class _UDPProtocol(asyncio.DatagramProtocol):
         def __init__(self, outer: 'Receiver'):
             self.outer = outer
 
         def datagram_received(self, data: bytes, addr):
-            self.outer.udp_packets += 1
-            self.outer.udp_bytes += len(data)
-            if len(data) >= 8:
-                seq = int.from_bytes(data[:8], 'big', signed=False)
-                if self.outer.udp_last_seq is not None and seq > self.outer.udp_last_seq + 1:
-                    self.outer.udp_loss += (seq - self.outer.udp_last_seq - 1)
-                self.outer.udp_last_seq = seq
+            self.outer._on_datagram(data, addr, time.time_ns())
+
+    class _EchoProtocol(asyncio.DatagramProtocol):
+        def __init__(self, outer: 'Receiver'):
+            self.outer = outer
+            self.transport = None
+
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data: bytes, addr):
+            reply = echo_reply(data, 0)
+            if reply is not None:
+                self.transport.sendto(reply, addr)
+                self.outer.echo_replies += 1
 
     async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         try:
@@ -87,37 +566,240 @@ class Receiver:
             await writer.wait_closed()
 
     def _snapshot(self):
+        active = [f for f in self.flows.values() if f.interval_packets]
+        jitter_ms = (sum(f.jitter_ns for f in active) / len(active) / 1e6) if active else 0.0
+        overhead_avg_us = (
+            self.rx_overhead_ns_sum / self.rx_overhead_samples / 1000 if self.rx_overhead_samples else 0.0
+        )
+        iat = Log2Histogram()
+        for f in active:
+            iat.merge(f.iat.diff(f.iat_prev))
+            f.iat_prev = list(f.iat.counts)
         stats = IntervalStats(
             ts=datetime.utcnow(),
             udp_packets=self.udp_packets,
             udp_bytes=self.udp_bytes,
             udp_loss_est=self.udp_loss,
             tcp_bytes=self.tcp_bytes,
+            udp_jitter_ms=jitter_ms,
+            rx_overhead_us_avg=overhead_avg_us,
+            rx_overhead_us_max=self.rx_overhead_ns_max / 1000,
+            iat_p50_us=iat.quantile(0.5),
+            iat_p99_us=iat.quantile(0.99),
+            max_gap_ms=self.max_gap_ns / 1e6,
+            long_gaps=self.long_gaps,
+            bursts=self.burst_count,
+            burst_len_max=self.burst_len_max,
         )
         self.stats.append(stats)
+        if self.stream:
+            self._append_row(Path(self.output), _CSV_HEADER, stats.csv_row())
+        class_lines = self._snapshot_classes(stats.ts)
         mbps_udp = (self.udp_bytes * 8 / 1_000_000) / max(self.interval, 1)
         mbps_tcp = (self.tcp_bytes * 8 / 1_000_000) / max(self.interval, 1)
-        print(
+        line = (
             f"[Interval] UDP packets={self.udp_packets} bytes={self.udp_bytes} loss_est={self.udp_loss} "
-            f"rate={mbps_udp:.2f} Mbps | TCP bytes={self.tcp_bytes} rate={mbps_tcp:.2f} Mbps"
+            f"rate={mbps_udp:.2f} Mbps jitter={jitter_ms:.3f} ms | TCP bytes={self.tcp_bytes} rate={mbps_tcp:.2f} Mbps"
         )
+        if self.rx_overhead_samples:
+            line += f" | rx_overhead avg={overhead_avg_us:.0f} us max={stats.rx_overhead_us_max:.0f} us"
+        if active:
+            line += (
+                f"\n           iat p50={stats.iat_p50_us} us p99={stats.iat_p99_us} us max_gap={stats.max_gap_ms:.1f} ms"
+                f" gaps>{self.gap_threshold_ns / 1e6:.0f}ms={self.long_gaps} bursts={self.burst_count}"
+                f" burst_max={self.burst_len_max}"
+            )
+        for c in class_lines:
+            line += f"\n           {c}"
+        self._log(line)
         # reset counters interval
+        totals = self.totals
+        totals["udp_packets"] += self.udp_packets
+        totals["udp_bytes"] += self.udp_bytes
+        totals["udp_loss"] += self.udp_loss
+        totals["tcp_bytes"] += self.tcp_bytes
         self.udp_packets = 0
         self.udp_bytes = 0
         self.udp_loss = 0
         self.tcp_bytes = 0
+        self.rx_overhead_ns_sum = 0
+        self.rx_overhead_ns_max = 0
+        self.rx_overhead_samples = 0
+        self.max_gap_ns = 0
+        self.long_gaps = 0
+        self.burst_count = 0
+        self.burst_len_max = 0
+        period = max(self.interval, 1)
+        for f in self.flows.values():
+            f.rate_pps = f.interval_packets / period
+            f.rate_mbps = f.interval_bytes * 8 / 1_000_000 / period
+        for f in active:
+            f.interval_packets = 0
+            f.interval_bytes = 0
+            f.idle_intervals = 0
+        if self.flow_idle_intervals is not None:
+            self._prune_idle_flows(active)
+
+    def _prune_idle_flows(self, active: list[_UDPFlow]):
+        busy = set(map(id, active))
+        for addr, f in list(self.flows.items()):
+            if id(f) in busy:
+                continue
+            f.idle_intervals += 1
+            if f.idle_intervals >= self.flow_idle_intervals:
+                self._pruned_iat.merge(f.iat)
+                self._pruned_bursts.merge(f.bursts)
+                del self.flows[addr]
+                self.pruned_flows += 1
+
+    def _snapshot_classes(self, ts: datetime) -> list[str]:
+        """Clôt l'intervalle de chaque classe active; retourne les lignes de log."""
+        lines = []
+        for dscp, c in sorted(self.classes.items()):
+            if not c.packets and not c.lost:
+                continue
+            jitters = [f.owd_jitter_ns for f in self.flows.values() if f.cls is c and f.interval_packets]
+            sent = c.packets + c.lost
+            cs = ClassIntervalStats(
+                ts=ts,
+                dscp=dscp,
+                wmm=wmm_category(dscp),
+                packets=c.packets,
+                lost=c.lost,
+                loss_pct=c.lost / sent * 100 if sent else 0.0,
+                owd_avg_ms=c.owd_sum_ns / c.packets / 1e6 if c.packets else 0.0,
+                owd_p99_ms=min(c.owd_hist.quantile(0.99) * 1000, c.owd_max_ns) / 1e6,
+                owd_max_ms=c.owd_max_ns / 1e6,
+                jitter_ms=sum(jitters) / len(jitters) / 1e6 if jitters else 0.0,
+            )
+            self.class_stats.append(cs)
+            if self.stream:
+                self._append_row(Path(self.output).with_suffix(".classes.csv"), _CLASS_CSV_HEADER, cs.csv_row())
+            lines.append(
+                f"[Classe {cs.wmm}/DSCP {dscp}] packets={cs.packets} loss={cs.loss_pct:.2f}% "
+                f"owd avg={cs.owd_avg_ms:.2f} ms p99={cs.owd_p99_ms:.2f} ms max={cs.owd_max_ms:.2f} ms "
+                f"jitter={cs.jitter_ms:.3f} ms"
+            )
+            c.packets_total += c.packets
+            c.lost_total += c.lost
+            c.owd_total.merge(c.owd_hist)
+            c.packets = c.lost = c.owd_sum_ns = c.owd_max_ns = 0
+            c.owd_hist.reset()
+        return lines
+
+    def _append_row(self, path: Path, header: list, row: list):
+        """Mode streaming: ajoute une ligne au CSV `path` (ouvert au premier appel)."""
+        entry = self._streams.get(path)
+        if entry is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            f = path.open("w", newline="", encoding="utf-8")
+            writer = csv.writer(f)
+            writer.writerow(header)
+            entry = self._streams[path] = (f, writer)
+        f, writer = entry
+        writer.writerow(row)
+        f.flush()
 
     def _write(self):
         if not self.output:
             return
         path = Path(self.output)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["timestamp", "udp_packets", "udp_bytes", "udp_loss_est", "tcp_bytes"])
-            for s in self.stats:
-                w.writerow([s.ts.isoformat(), s.udp_packets, s.udp_bytes, s.udp_loss_est, s.tcp_bytes])
-        print(f"[Receiver] Rapport écrit: {path}")
+        classes_path = path.with_suffix(".classes.csv")
+        if self.stream:
+            for f, _ in self._streams.values():
+                f.close()
+            self._streams.clear()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(_CSV_HEADER)
+                for s in self.stats:
+                    w.writerow(s.csv_row())
+            if self.class_stats:
+                with classes_path.open("w", newline="", encoding="utf-8") as f:
+                    w = csv.writer(f)
+                    w.writerow(_CLASS_CSV_HEADER)
+                    for s in self.class_stats:
+                        w.writerow(s.csv_row())
+        self._log(f"[Receiver] Rapport écrit: {path}")
+        if self.class_stats:
+            self._log(f"[Receiver] Stats par classe (DSCP): {classes_path}")
+        if self.flows or self.pruned_flows:
+            flows_path = path.with_suffix(".flows.json")
+            flows_path.write_text(json.dumps(self._flows_summary(), indent=2), encoding="utf-8")
+            self._log(f"[Receiver] Histogrammes par flux: {flows_path}")
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(message, flush=True)
+
+    def _flows_summary(self) -> dict:
+        """Histogrammes cumulés par flux (inter-arrivées en µs, rafales en paquets)."""
+        out = {}
+        for addr, f in self.flows.items():
+            out[f"{addr[0]}:{addr[1]}"] = {
+                "iat_us": f.iat.to_dict(),
+                "burst_len": f.bursts.to_dict(),
+                "max_gap_ms": round(f.max_gap_ns / 1e6, 3),
+            }
+        if self.pruned_flows:
+            out["pruned"] = {
+                "flows": self.pruned_flows,
+                "iat_us": self._pruned_iat.to_dict(),
+                "burst_len": self._pruned_bursts.to_dict(),
+            }
+        return out
+
+    def metric_families(self) -> list:
+        """Collecteur OpenMetrics: lecture seule des compteurs, appelé à chaque requête."""
+        from .exporter import MetricFamily
+
+        t = self.totals
+        families = [
+            MetricFamily("loadtester_receiver_udp_packets", "counter", "Datagrammes UDP reçus").add(
+                t["udp_packets"] + self.udp_packets),
+            MetricFamily("loadtester_receiver_udp_bytes", "counter", "Octets UDP reçus").add(t["udp_bytes"] + self.udp_bytes),
+            MetricFamily("loadtester_receiver_udp_lost", "counter", "Datagrammes UDP perdus (trous de séquence)").add(
+                t["udp_loss"] + self.udp_loss),
+            MetricFamily("loadtester_receiver_tcp_bytes", "counter", "Octets TCP reçus").add(t["tcp_bytes"] + self.tcp_bytes),
+            MetricFamily("loadtester_receiver_echo_replies", "counter", "Réponses du réflecteur d'écho").add(self.echo_replies),
+            MetricFamily("loadtester_receiver_flows", "gauge", "Flux UDP suivis").add(len(self.flows)),
+            MetricFamily("loadtester_receiver_pruned_flows", "counter", "Flux UDP oubliés (muets)").add(self.pruned_flows),
+        ]
+        if self.stats:
+            last = self.stats[-1]
+            families.append(MetricFamily(
+                "loadtester_receiver_rx_overhead_seconds", "gauge",
+                "Écart moyen horodatage noyau -> traitement (dernier intervalle)",
+            ).add(last.rx_overhead_us_avg / 1e6))
+        pps = MetricFamily("loadtester_receiver_flow_pps", "gauge", "Paquets/s par flux (dernier intervalle)")
+        mbps = MetricFamily("loadtester_receiver_flow_mbps", "gauge", "Débit par flux (dernier intervalle)")
+        loss = MetricFamily("loadtester_receiver_flow_loss_ratio", "gauge", "Perte du flux depuis le début de la session")
+        jitter = MetricFamily("loadtester_receiver_flow_jitter_seconds", "gauge", "Gigue d'inter-arrivée du flux")
+        iat = list(self._pruned_iat.counts)
+        for addr, f in list(self.flows.items()):
+            flow = f"{addr[0]}:{addr[1]}"
+            pps.add(f.rate_pps, flow=flow)
+            mbps.add(f.rate_mbps, flow=flow)
+            seen = f.received + f.lost
+            loss.add(f.lost / seen if seen else 0.0, flow=flow)
+            jitter.add(f.jitter_ns / 1e9, flow=flow)
+            iat = [a + b for a, b in zip(iat, f.iat.counts)]
+        families += [pps, mbps, loss, jitter]
+        families.append(MetricFamily(
+            "loadtester_receiver_iat_seconds", "histogram", "Inter-arrivées UDP, tous flux"
+        ).add_log2(iat, 1e6))
+        owd = MetricFamily("loadtester_receiver_owd_seconds", "histogram", "Délai aller au-dessus du minimum, par classe")
+        cls_packets = MetricFamily("loadtester_receiver_class_packets", "counter", "Paquets reçus par classe")
+        cls_lost = MetricFamily("loadtester_receiver_class_lost", "counter", "Paquets perdus par classe")
+        for dscp, c in sorted(self.classes.items()):
+            labels = {"dscp": str(dscp), "wmm": wmm_category(dscp)}
+            owd.add_log2([a + b for a, b in zip(c.owd_total.counts, c.owd_hist.counts)], 1e6, **labels)
+            cls_packets.add(c.packets_total + c.packets, **labels)
+            cls_lost.add(c.lost_total + c.lost, **labels)
+        families += [owd, cls_packets, cls_lost]
+        return families
 
 
 def parse_args():
@@ -126,14 +808,42 @@ def parse_args():
     p.add_argument("--tcp-port", type=int)
     p.add_argument("--interval", type=int, default=5)
     p.add_argument("--output", help="Fichier CSV de sortie")
+    p.add_argument(
+        "--no-kernel-timestamps",
+        action="store_true",
+        help="Désactive SO_TIMESTAMPNS (heure d'arrivée prise dans la boucle asyncio)",
+    )
+    p.add_argument("--burst-gap-us", type=int, default=200, help="Écart max entre paquets d'une même rafale (µs)")
+    p.add_argument("--gap-threshold-ms", type=float, default=100.0, help="Seuil de trou compté (watchdog AMR)")
+    p.add_argument("--stream", action="store_true", help="Écrit chaque intervalle dans --output dès sa clôture (soak)")
+    p.add_argument("--flow-idle-s", type=float, help="Oublie les flux UDP muets depuis N secondes")
+    p.add_argument("--feedback-interval", type=float, default=0.1, help="Période du retour à l'émetteur en boucle fermée (s)")
+    p.add_argument("--metrics-port", type=int, help="Expose les compteurs en OpenMetrics sur ce port HTTP (/metrics)")
+    p.add_argument("--metrics-host", default="127.0.0.1", help="Adresse d'écoute des métriques")
+    p.add_argument(
+        "--echo-port", type=int, default=5203,
+        help="Port du réflecteur d'écho pour la sonde de latence (0 = désactivé)",
+    )
+    eventloop.add_loop_argument(p)
     return p.parse_args()
 
 
 def main():
     args = parse_args()
-    recv = Receiver(args.udp_port, args.tcp_port, args.interval, args.output)
+    recv = Receiver(
+        args.udp_port, args.tcp_port, args.interval, args.output,
+        kernel_timestamps=not args.no_kernel_timestamps,
+        burst_gap_us=args.burst_gap_us,
+        gap_threshold_ms=args.gap_threshold_ms,
+        stream=args.stream,
+        flow_idle_s=args.flow_idle_s,
+        feedback_interval=args.feedback_interval,
+        echo_port=args.echo_port or None,
+        metrics_port=args.metrics_port,
+        metrics_host=args.metrics_host,
+    )
     try:
-        asyncio.run(recv.start())
+        eventloop.run(recv.start(), args.loop)
     except KeyboardInterrupt:
         print("\nInterruption utilisateur, arrêt.")
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import csv
+import dataclasses
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Any, List
 
 
 @dataclass
@@ -18,45 +19,102 @@ class TierReportRow:
     packet_loss_pct: float
     cpu_pct_avg: float
     mem_pct_avg: float
+    # Auto-instrumentation de l'émetteur (voir instrument.SenderProbe)
+    loop_lag_ms_avg: float = 0.0
+    loop_lag_ms_max: float = 0.0
+    syscalls_per_s: float = 0.0
+    pacing_error_ms_avg: float = 0.0
+    sendto_pct: float = 0.0
+    proc_cpu_pct: float = 0.0
+    sender_bound: bool = False
+    # Palier multi-cibles: une ligne par cible + une ligne TOTAL
+    target: str = ""
+    # Classe de trafic (ex: "EF/VO", "sonde_voix EF/VO"); vide = best effort non marqué
+    traffic_class: str = ""
+    # Réactivité sous charge (voir responsiveness): latence_ms_avg = moyenne en charge
+    latency_idle_ms: float = 0.0
+    latency_loaded_p90_ms: float = 0.0
+    latency_inflation_ms: float = 0.0
+    rpm: float = 0.0
+    # Fin de la fenêtre de mesure commune (début = timestamp_start, voir scheduler)
+    timestamp_end: str = ""
+    # Régime établi (voir steady): mise en route écartée, demi-largeurs des IC
+    warmup_s: float = 0.0
+    steady: bool = False
+    goodput_mbps: float = float("nan")
+    goodput_ci_mbps: float = float("nan")
+    loss_ci_pct: float = float("nan")
+    latency_p99_ms: float = float("nan")
+    latency_p99_ci_ms: float = float("nan")
+    # Fin anticipée: "steady", "guard: <dépassement>" (voir guard); vide = échéance atteinte
+    stop_reason: str = ""
+    guard_throttles: int = 0
+    # Compteurs de l'interface vers la cible (voir metrics.ResourceSampler): contrôle indépendant du débit
+    nic: str = ""
+    nic_tx_mbps: float = float("nan")
+    nic_rx_mbps: float = float("nan")
+    nic_errors: int = 0
+    nic_drops: int = 0
+    cpu_core_max_pct: float = 0.0
+    proc_cpu_max_pct: float = 0.0
+    # Émission multi-interfaces (tier.sources): une ligne par source, nic_* = compteurs de son interface
+    source: str = ""
+
+
+@dataclass
+class TimelineRow:
+    """Une seconde d'un palier: débit visé (enveloppe) et débit émis."""
+    tier_name: str
+    t_s: float
+    target_mbps: float
+    achieved_mbps: float
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def row_columns(cls) -> List[str]:
+    """En-tête CSV d'un type de ligne (`TierReportRow`, `TimelineRow`)."""
+    return [f.name for f in dataclasses.fields(cls)]
+
+
+def format_row(row) -> List[str]:
+    """Valeurs CSV d'une ligne, dans l'ordre de `row_columns`."""
+    return [_fmt(getattr(row, f.name)) for f in dataclasses.fields(row)]
 
 
 class CsvReporter:
     def __init__(self, path: Path):
         self.path = path
         self.rows: List[TierReportRow] = []
+        self.timeline: List[TimelineRow] = []
 
     def add(self, row: TierReportRow):
         self.rows.append(row)
 
+    @property
+    def timeline_path(self) -> Path:
+        return self.path.with_suffix(".timeline.csv")
+
     def write(self):
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        with self.path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "timestamp_start",
-                "tier_name",
-                "protocol",
-                "target_mbps",
-                "achieved_mbps",
-                "latency_ms_avg",
-                "jitter_ms",
-                "packet_loss_pct",
-                "cpu_pct_avg",
-                "mem_pct_avg",
-            ])
-            for r in self.rows:
-                writer.writerow([
-                    r.timestamp_start,
-                    r.tier_name,
-                    r.protocol,
-                    f"{r.target_mbps:.2f}",
-                    f"{r.achieved_mbps:.2f}",
-                    f"{r.latency_ms_avg:.2f}",
-                    f"{r.jitter_ms:.2f}",
-                    f"{r.packet_loss_pct:.2f}",
-                    f"{r.cpu_pct_avg:.2f}",
-                    f"{r.mem_pct_avg:.2f}",
-                ])
-
-
-__all__ = ["TierReportRow", "CsvReporter"]
+        _write_rows(self.path, TierReportRow, self.rows)
+        # Cible et débit émis par seconde (suivi des enveloppes): <rapport>.timeline.csv
+        if self.timeline:
+            _write_rows(self.timeline_path, TimelineRow, self.timeline)
+
+
+def _write_rows(path: Path, cls, rows: list):
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(row_columns(cls))
+        for r in rows:
+            writer.writerow(format_row(r))
+
+
+__all__ = ["TierReportRow", "TimelineRow", "CsvReporter", "row_columns", "format_row"]
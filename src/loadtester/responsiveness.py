@@ -0,0 +1,356 @@
+"""Réactivité sous charge (bufferbloat): latence à vide contre latence en charge.
+
+    loadtester-rpm --host 192.168.1.10 --tcp-mbps 150 --udp-mbps 50
+
+Un ping de 4 échos lancé avec la charge se termine avant que les files de
+l'AP ne se remplissent. `LatencyProbe` sonde donc à haute fréquence (20 Hz par
+défaut) pendant toute la durée: d'abord à vide (`baseline`), puis sous charge
+jusqu'à `finish`. La sonde vise le réflecteur d'écho de `loadtester-receiver`
+(port 5203); le temps passé dans le récepteur est retranché, la charge qu'il
+traite ne gonfle donc pas la mesure. Sans réponse d'écho, elle retombe sur
+ICMP (`ping`, une requête à la fois).
+
+`Responsiveness` donne l'inflation (médiane en charge - médiane à vide) et un
+score en allers-retours par minute (RPM): 60 000 / moyenne des RTT en charge,
+les 5 % les plus lents écartés.
+
+`loadtester-rpm` charge la cible en TCP et UDP simultanément; les paliers de
+la config et le mode stress utilisent la même sonde.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import logging
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import eventloop
+from .config import DEFAULT_ECHO_PORT, DEFAULT_TCP_PORT, DEFAULT_UDP_PORT
+from .histogram import Log2Histogram
+from .wire import pack_echo, unpack_echo
+
+DEFAULT_PROBE_INTERVAL_S = 0.05
+# Écho sans réponse après ce délai = perdu
+PROBE_TIMEOUT_S = 2.0
+# Aucune réponse d'écho après ce délai: réflecteur absent, repli ICMP
+ECHO_FALLBACK_S = 1.0
+RPM_TRIM = 0.05
+
+
+@dataclass
+class LatencyStats:
+    samples: int
+    avg_ms: float
+    median_ms: float
+    p90_ms: float
+    jitter_ms: float
+    loss_pct: float
+    rpm: float
+
+    @classmethod
+    def from_rtts(cls, rtts: List[float], sent: int, lost: int) -> "LatencyStats":
+        loss = lost / sent * 100 if sent else 0.0
+        if not rtts:
+            nan = float("nan")
+            return cls(0, nan, nan, nan, nan, loss, 0.0)
+        ordered = sorted(rtts)
+        n = len(ordered)
+        kept = ordered[: max(n - int(n * RPM_TRIM), 1)]
+        trimmed = sum(kept) / len(kept)
+        # Gigue: variation moyenne entre échos successifs (RFC 3550, sans lissage)
+        jitter = sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (n - 1) if n > 1 else 0.0
+        return cls(
+            samples=n,
+            avg_ms=sum(rtts) / n,
+            median_ms=statistics.median(ordered),
+            p90_ms=ordered[min(int(n * 0.9), n - 1)],
+            jitter_ms=jitter,
+            loss_pct=loss,
+            rpm=60_000 / trimmed if trimmed > 0 else 0.0,
+        )
+
+
+@dataclass
+class Responsiveness:
+    idle: LatencyStats
+    loaded: LatencyStats
+
+    @property
+    def inflation_ms(self) -> float:
+        return self.loaded.median_ms - self.idle.median_ms
+
+    @property
+    def inflation_ratio(self) -> float:
+        if math.isnan(self.idle.median_ms) or self.idle.median_ms <= 0:
+            return float("nan")
+        return self.loaded.median_ms / self.idle.median_ms
+
+
+class _EchoClient(asyncio.DatagramProtocol):
+    def __init__(self, probe: "LatencyProbe"):
+        self.probe = probe
+
+    def datagram_received(self, data: bytes, addr):
+        echo = unpack_echo(data)
+        if echo is not None:
+            self.probe._on_echo(*echo, time.monotonic_ns())
+
+
+class LatencyProbe:
+    """Sonde de latence continue (écho UDP du récepteur, ICMP à défaut).
+
+    Expose `latency_ms` et `loss_pct` comme `metrics.PingMonitor` (affichage en
+    direct) et accumule les RTT depuis le démarrage ou le dernier `reset()`.
+    `hist` (RTT en µs) n'est jamais remis à zéro (exposition, voir `exporter`).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_ECHO_PORT,
+        interval: float = DEFAULT_PROBE_INTERVAL_S,
+        icmp_host: Optional[str] = None,
+        timeout: float = PROBE_TIMEOUT_S,
+    ):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.icmp_host = icmp_host or host
+        self.timeout = timeout
+        self.mode = "udp"
+        self.latency_ms = float("nan")
+        self.rtts: List[float] = []
+        # RTT écartés par les `reset()` précédents: `rtts[i]` est le RTT n° `rtt_base + i` de la sonde
+        self.rtt_base = 0
+        self.hist = Log2Histogram()
+        self.sent = 0
+        self.lost = 0
+        # Idem pour les échos émis et perdus (fenêtres glissantes, voir guard)
+        self.sent_base = self.lost_base = 0
+        self._replies = 0
+        self._outstanding: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loss_pct(self) -> float:
+        return self.lost / self.sent * 100 if self.sent else 0.0
+
+    @property
+    def rtt_total(self) -> int:
+        """RTT reçus depuis le démarrage, `reset()` compris (repères stables, voir steady)."""
+        return self.rtt_base + len(self.rtts)
+
+    @property
+    def sent_total(self) -> int:
+        return self.sent_base + self.sent
+
+    @property
+    def lost_total(self) -> int:
+        return self.lost_base + self.lost
+
+    def reset(self):
+        self.rtt_base += len(self.rtts)
+        self.sent_base += self.sent
+        self.lost_base += self.lost
+        self.rtts = []
+        self.sent = self.lost = 0
+        self._outstanding.clear()
+
+    def stats(self) -> LatencyStats:
+        # Les échos encore en vol au moment du relevé ne sont comptés ni reçus ni perdus
+        return LatencyStats.from_rtts(self.rtts, self.sent - len(self._outstanding), self.lost)
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def baseline(self, seconds: float) -> LatencyStats:
+        """Mesure à vide pendant `seconds` (sonde démarrée), puis repart de zéro."""
+        await asyncio.sleep(seconds)
+        idle = self.stats()
+        self.reset()
+        return idle
+
+    async def finish(self, idle: LatencyStats) -> Responsiveness:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        return Responsiveness(idle, self.stats())
+
+    def _on_echo(self, seq: int, send_ns: int, hold_ns: int, now_ns: int):
+        if self._outstanding.pop(seq, None) is None:
+            return  # réponse tardive (déjà comptée perdue) ou d'avant le reset
+        self._replies += 1
+        rtt = max(now_ns - send_ns - hold_ns, 0) / 1e6
+        self.latency_ms = rtt
+        self.rtts.append(rtt)
+        self.hist.add(int(rtt * 1000))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _EchoClient(self), remote_addr=(self.host, self.port)
+            )
+        except OSError as e:
+            logging.warning("Sonde d'écho %s:%s indisponible (%s): repli ICMP", self.host, self.port, e)
+            await self._run_icmp()
+            return
+        try:
+            started = loop.time()
+            seq = 0
+            timeout_ns = int(self.timeout * 1e9)
+            while True:
+                now_ns = time.monotonic_ns()
+                for s, sent_ns in list(self._outstanding.items()):
+                    if now_ns - sent_ns > timeout_ns:
+                        del self._outstanding[s]
+                        self.lost += 1
+                if not self._replies and loop.time() - started > ECHO_FALLBACK_S:
+                    logging.warning(
+                        "Pas d'écho de %s:%s (loadtester-receiver --echo-port): repli ICMP sur %s",
+                        self.host, self.port, self.icmp_host,
+                    )
+                    self.reset()
+                    break
+                seq += 1
+                self._outstanding[seq] = now_ns
+                self.sent += 1
+                try:
+                    transport.sendto(pack_echo(seq, now_ns))
+                except OSError:
+                    pass
+                await asyncio.sleep(self.interval)
+        finally:
+            transport.close()
+        await self._run_icmp()
+
+    async def _run_icmp(self):
+        from .metrics import run_ping
+
+        self.mode = "icmp"
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            res = await run_ping(self.icmp_host, count=1, timeout=max(int(self.timeout), 1))
+            self.sent += 1
+            if math.isnan(res.avg_latency_ms):
+                self.lost += 1
+            else:
+                self.latency_ms = res.avg_latency_ms
+                self.rtts.append(res.avg_latency_ms)
+                self.hist.add(int(res.avg_latency_ms * 1000))
+            await asyncio.sleep(max(self.interval - (loop.time() - start), 0.0))
+
+
+async def measure(
+    host: str,
+    idle_s: float,
+    duration_s: float,
+    tcp_mbps: float,
+    udp_mbps: float,
+    tcp_connections: int = 4,
+    packet_size: int = 1472,
+    tcp_port: int = DEFAULT_TCP_PORT,
+    udp_port: int = DEFAULT_UDP_PORT,
+    echo_port: int = DEFAULT_ECHO_PORT,
+    interval: float = DEFAULT_PROBE_INTERVAL_S,
+    ping_host: Optional[str] = None,
+) -> Responsiveness:
+    """Latence à vide pendant `idle_s`, puis sous charge TCP + UDP pendant `duration_s`."""
+    from .generator import Destination, generate_fanout
+
+    probe = LatencyProbe(host, echo_port, interval, icmp_host=ping_host)
+    probe.start()
+    idle = await probe.baseline(idle_s)
+    logging.info("À vide: médiane %.1f ms (%s, %d échos)", idle.median_ms, probe.mode, idle.samples)
+    loads = []
+    if tcp_mbps > 0:
+        loads.append(generate_fanout(
+            "TCP", [Destination(host, tcp_port)], 65536, tcp_mbps, tcp_connections, duration_s
+        ))
+    if udp_mbps > 0:
+        loads.append(generate_fanout("UDP", [Destination(host, udp_port)], packet_size, udp_mbps, 1, duration_s))
+    try:
+        await asyncio.gather(*loads)
+    finally:
+        result = await probe.finish(idle)
+    return result
+
+
+def write_report(result: Responsiveness, output_dir: str) -> Path:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / ("responsiveness_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S") + ".csv")
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["phase", "samples", "avg_ms", "median_ms", "p90_ms", "jitter_ms", "loss_pct", "rpm"])
+        for phase, s in (("idle", result.idle), ("loaded", result.loaded)):
+            w.writerow([
+                phase,
+                s.samples,
+                f"{s.avg_ms:.2f}",
+                f"{s.median_ms:.2f}",
+                f"{s.p90_ms:.2f}",
+                f"{s.jitter_ms:.2f}",
+                f"{s.loss_pct:.2f}",
+                f"{s.rpm:.0f}",
+            ])
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Réactivité sous charge: latence à vide vs en charge TCP + UDP (RPM)")
+    p.add_argument("--host", required=True, help="Hôte cible (loadtester-receiver --tcp-port 5201)")
+    p.add_argument("--ping-host", help="Hôte du repli ICMP (défaut = host)")
+    p.add_argument("--idle", type=float, default=5.0, help="Durée de la mesure à vide (s)")
+    p.add_argument("--duration", type=float, default=20.0, help="Durée sous charge (s)")
+    p.add_argument("--tcp-mbps", type=float, default=100.0, help="Charge TCP (0 = aucune)")
+    p.add_argument("--tcp-connections", type=int, default=4)
+    p.add_argument("--udp-mbps", type=float, default=50.0, help="Charge UDP (0 = aucune)")
+    p.add_argument("--packet-size", type=int, default=1472, help="Taille des paquets UDP")
+    p.add_argument("--max-mbps", type=float, default=200.0, help="Plafond de sécurité (TCP + UDP)")
+    p.add_argument("--tcp-port", type=int, default=DEFAULT_TCP_PORT)
+    p.add_argument("--udp-port", type=int, default=DEFAULT_UDP_PORT)
+    p.add_argument("--echo-port", type=int, default=DEFAULT_ECHO_PORT)
+    p.add_argument("--interval-ms", type=float, default=DEFAULT_PROBE_INTERVAL_S * 1000, help="Période de la sonde")
+    p.add_argument("--output-dir", default="reports")
+    p.add_argument("--log-level", default="INFO")
+    eventloop.add_loop_argument(p)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="[%(levelname)s] %(message)s")
+    if args.tcp_mbps + args.udp_mbps > args.max_mbps:
+        raise SystemExit(f"Charge {args.tcp_mbps + args.udp_mbps} Mbps > --max-mbps {args.max_mbps}")
+    result = eventloop.run(
+        measure(
+            args.host, args.idle, args.duration, args.tcp_mbps, args.udp_mbps,
+            args.tcp_connections, args.packet_size, args.tcp_port, args.udp_port, args.echo_port,
+            args.interval_ms / 1000, args.ping_host,
+        ),
+        args.loop,
+    )
+    path = write_report(result, args.output_dir)
+    print(f"Rapport réactivité écrit: {path}")
+    print(f"  À vide    : médiane {result.idle.median_ms:6.1f} ms  p90 {result.idle.p90_ms:6.1f} ms  {result.idle.rpm:6.0f} RPM")
+    print(f"  En charge : médiane {result.loaded.median_ms:6.1f} ms  p90 {result.loaded.p90_ms:6.1f} ms  {result.loaded.rpm:6.0f} RPM")
+    print(f"  Inflation : {result.inflation_ms:+.1f} ms (x{result.inflation_ratio:.1f})")
+
+
+__all__ = ["LatencyStats", "Responsiveness", "LatencyProbe", "measure", "write_report"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
+
@@ -0,0 +1,122 @@
+"""Tampons à taille fixe pour les séries temporelles longues (graphes, échantillons)."""
+from __future__ import annotations
+
+from array import array
+from typing import List, Sequence, Tuple
+
+
+class DecimatingBuffer:
+    """Série (t, valeur) de taille bornée qui se décime au lieu de déborder.
+
+    Tant que la capacité n'est pas atteinte, chaque point est conservé. Une fois
+    pleine, les points sont moyennés deux à deux et le pas double: les points
+    suivants sont accumulés par paquets de `stride` avant d'être stockés. Une
+    course de 30 min reste ainsi affichable entièrement avec `capacity` points.
+    """
+
+    def __init__(self, capacity: int = 600):
+        if capacity < 2:
+            raise ValueError("capacity doit être >= 2")
+        self.capacity = capacity
+        self.stride = 1
+        self.xs: List[float] = []
+        self.ys: List[float] = []
+        self._acc_x = 0.0
+        self._acc_y = 0.0
+        self._acc_n = 0
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def append(self, x: float, y: float):
+        self._acc_x += x
+        self._acc_y += y
+        self._acc_n += 1
+        if self._acc_n < self.stride:
+            return
+        self.xs.append(self._acc_x / self._acc_n)
+        self.ys.append(self._acc_y / self._acc_n)
+        self._acc_x = self._acc_y = 0.0
+        self._acc_n = 0
+        if len(self.xs) >= self.capacity:
+            self._decimate()
+
+    def _decimate(self):
+        n = len(self.xs) // 2 * 2
+        xs = [(self.xs[i] + self.xs[i + 1]) / 2 for i in range(0, n, 2)]
+        ys = [(self.ys[i] + self.ys[i + 1]) / 2 for i in range(0, n, 2)]
+        if n < len(self.xs):
+            xs.append(self.xs[-1])
+            ys.append(self.ys[-1])
+        self.xs, self.ys = xs, ys
+        self.stride *= 2
+
+    def points(self) -> List[Tuple[float, float]]:
+        return list(zip(self.xs, self.ys))
+
+    def clear(self):
+        self.stride = 1
+        self.xs = []
+        self.ys = []
+        self._acc_x = self._acc_y = 0.0
+        self._acc_n = 0
+
+
+class RingBuffer:
+    """Lignes de `width` flottants dans un seul `array('d')` préalloué.
+
+    Une fois plein, chaque ajout écrase la ligne la plus ancienne
+    (`overwritten` les compte). Aucune allocation par ajout: un
+    échantillonnage à 10 Hz pendant des heures garde une empreinte fixe
+    (`capacity * width * 8` octets).
+    """
+
+    def __init__(self, capacity: int, width: int):
+        if capacity < 1 or width < 1:
+            raise ValueError("capacity et width doivent être >= 1")
+        self.capacity = capacity
+        self.width = width
+        self._data = array("d", bytes(8 * capacity * width))
+        self._head = 0  # prochaine ligne écrite
+        self._count = 0
+        self.overwritten = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row: Sequence[float]):
+        if len(row) != self.width:
+            raise ValueError(f"ligne de {len(row)} valeurs, {self.width} attendues")
+        base = self._head * self.width
+        data = self._data
+        for i, value in enumerate(row):
+            data[base + i] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self.overwritten += 1
+
+    def _offset(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("index hors du tampon")
+        return (self._head - self._count + index) % self.capacity * self.width
+
+    def row(self, index: int) -> Tuple[float, ...]:
+        """Ligne `index` dans l'ordre chronologique (0 = la plus ancienne, -1 = la dernière)."""
+        base = self._offset(index)
+        return tuple(self._data[base:base + self.width])
+
+    def rows(self) -> List[Tuple[float, ...]]:
+        return [self.row(i) for i in range(self._count)]
+
+    def column(self, col: int) -> List[float]:
+        return [self._data[self._offset(i) + col] for i in range(self._count)]
+
+    def clear(self):
+        self._head = self._count = self.overwritten = 0
+
+
+__all__ = ["DecimatingBuffer", "RingBuffer"]
@@ -1,23 +1,68 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
+import math
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 from rich.progress import Progress, TimeElapsedColumn, BarColumn, TextColumn
 
-from .config import FullConfig, TierConfig
-from .generator import generate_traffic, TrafficStats
-from .iperf import run_iperf
-from .metrics import run_ping, sample_resources
-from .report import CsvReporter, TierReportRow
+from .config import DEFAULT_TCP_PORT, DEFAULT_UDP_PORT, FullConfig, TierConfig
+from .envelope import follow
+from .exporter import RunMetrics
+from .guard import LiveGuard
+from .generator import Destination, FanoutStats, RateControl, SocketPool, generate_fanout
+from .instrument import LiveSample, SenderProbe, attach_live
+from .iperf import IperfResult, run_iperf
+from .metrics import ResourceSampler, interface_for, interface_with_address
+from .report import CsvReporter, TierReportRow, TimelineRow
+from .responsiveness import LatencyProbe, Responsiveness
+from .scheduler import TierScheduler
+from .session import PersistentSession
+from .steady import FeedbackTotals, SteadyResult, SteadyStateMonitor, watch
+from .wire import EXT_HEADER, wmm_category
+
+
+TOTAL_LABEL = "TOTAL"
+# Écart toléré entre le débit annoncé par le générateur et celui vu par l'interface
+NIC_MISMATCH_RATIO = 1.1
+
+
+def class_label(dscp: int) -> str:
+    return f"DSCP{dscp}/{wmm_category(dscp)}" if dscp else ""
 
 
 class LoadTestRunner:
-    def __init__(self, cfg: FullConfig, dry_run: bool = False, internal_only: bool = False):
+    def __init__(
+        self,
+        cfg: FullConfig,
+        internal_only: bool = False,
+        pool: Optional[SocketPool] = None,
+        on_sample: Optional[Callable[[LiveSample], None]] = None,
+        metrics: Optional[RunMetrics] = None,
+        session: Optional[PersistentSession] = None,
+    ):
         self.cfg = cfg
-        self.dry_run = dry_run
         self.internal_only = internal_only
+        # Sockets UDP réutilisés entre paliers (moteur GUI) et publication par seconde
+        self.pool = pool
+        self.on_sample = on_sample
+        # Exposition OpenMetrics (voir exporter): le palier en cours y attache ses sondes
+        self.metrics = metrics
+        # Session persistante (voir session): ouverte par `run` si `global.session`
+        self.session = session
+
+    def destinations(self, tier: TierConfig, protocol: str | None = None) -> list[Destination]:
+        """Cibles du palier: `tier.targets`, sinon `global.target_host` sur les ports par défaut."""
+        tcp = (protocol or tier.protocol) == "TCP"
+        if not tier.targets:
+            host = self.cfg.global_.target_host
+            return [Destination(host, DEFAULT_TCP_PORT if tcp else DEFAULT_UDP_PORT)]
+        return [
+            Destination(t.host, t.tcp_port if tcp else t.udp_port, t.share, t.name)
+            for t in tier.targets
+        ]
 
     async def run(self) -> CsvReporter:
         report_path = Path(self.cfg.global_.output_dir) / (
@@ -25,94 +70,337 @@ class LoadTestRunner:
         )
         reporter = CsvReporter(report_path)
 
+        if self.cfg.global_.session and self.session is None:
+            async with PersistentSession.from_config(self.cfg.global_, self.pool) as self.session:
+                try:
+                    await self._run_tiers(reporter)
+                finally:
+                    self.session = None
+        else:
+            await self._run_tiers(reporter)
+
+        reporter.write()
+        return reporter
+
+    async def _run_tiers(self, reporter: CsvReporter):
         with Progress(
             TextColumn("{task.description}"),
             BarColumn(),
             TimeElapsedColumn(),
         ) as progress:
             for tier in self.cfg.tiers:
-                task_id = progress.add_task(f"[cyan]Tier {tier.name}", total=tier.duration_s)
-                if self.dry_run:
-                    progress.advance(task_id, tier.duration_s)
-                    reporter.add(
-                        TierReportRow(
-                            timestamp_start=datetime.utcnow().isoformat(),
-                            tier_name=tier.name,
-                            protocol=tier.protocol,
-                            target_mbps=tier.target_bandwidth_mbps,
-                            achieved_mbps=0.0,
-                            latency_ms_avg=0.0,
-                            jitter_ms=0.0,
-                            packet_loss_pct=0.0,
-                            cpu_pct_avg=0.0,
-                            mem_pct_avg=0.0,
-                        )
-                    )
-                    continue
-                # run ping concurrently with traffic and resource sampling
-                ping_task = asyncio.create_task(run_ping(self.cfg.global_.ping_host, count=4))
-                res_task = asyncio.create_task(sample_resources(interval=1.0, duration=tier.duration_s))
-
-                # Try iperf
-                achieved_mbps = 0.0
-                jitter_ms = 0.0
-                packet_loss_pct = 0.0
-                if self.cfg.global_.use_iperf_if_available and not self.internal_only:
-                    iperf_result = await run_iperf(
-                        self.cfg.global_.target_host, tier.duration_s, tier.protocol, tier.connections
-                    )
-                    if iperf_result:
-                        achieved_mbps = iperf_result.mbps
-                        jitter_ms = iperf_result.jitter_ms or 0.0
-                        packet_loss_pct = iperf_result.packet_loss_pct or 0.0
-                if achieved_mbps == 0.0:  # fallback internal
-                    traffic_task = asyncio.create_task(
-                        generate_traffic(
-                            tier.protocol,
-                            self.cfg.global_.target_host,
-                            5201 if tier.protocol == "TCP" else 5202,
-                            tier.packet_size,
-                            tier.target_bandwidth_mbps,
-                            tier.connections,
-                            tier.duration_s,
-                        )
-                    )
-                else:
-                    traffic_task = asyncio.create_task(asyncio.sleep(tier.duration_s))
-
-                start_time = datetime.utcnow().isoformat()
-                # progress update loop
-                for _ in range(tier.duration_s):
-                    await asyncio.sleep(1)
-                    progress.advance(task_id, 1)
-
-                traffic_stats: TrafficStats | None = None
-                if achieved_mbps == 0.0:
-                    traffic_stats = await traffic_task
-                    if traffic_stats:
-                        achieved_mbps = traffic_stats.mbps
-                else:
-                    await traffic_task
-                ping_res = await ping_task
-                res_sample = await res_task
-
-                reporter.add(
-                    TierReportRow(
-                        timestamp_start=start_time,
-                        tier_name=tier.name,
-                        protocol=tier.protocol,
-                        target_mbps=tier.target_bandwidth_mbps,
-                        achieved_mbps=achieved_mbps,
-                        latency_ms_avg=ping_res.avg_latency_ms,
-                        jitter_ms=jitter_ms or ping_res.jitter_ms,
-                        packet_loss_pct=packet_loss_pct or ping_res.packet_loss_pct,
-                        cpu_pct_avg=res_sample.cpu_pct,
-                        mem_pct_avg=res_sample.mem_pct,
+                for row in await self.run_tier(tier, progress, reporter.timeline):
+                    reporter.add(row)
+
+    async def run_tier(
+        self, tier: TierConfig, progress: Progress, timeline: Optional[List[TimelineRow]] = None
+    ) -> List[TierReportRow]:
+        """Exécute un palier et retourne ses lignes de rapport (TOTAL + une par cible).
+
+        `timeline` reçoit la cible et le débit émis de chaque seconde. Le runner
+        n'en garde rien: le mode soak enchaîne les paliers pendant des heures.
+        """
+        task_id = progress.add_task(f"[cyan]Tier {tier.name}", total=tier.duration_s)
+        destinations = self.destinations(tier)
+        # Sonde de latence pendant tout le palier, précédée d'une mesure à vide
+        g = self.cfg.global_
+        # Régime établi: durée entre min et max, arrêt dès que les IC sont assez serrés
+        steady_cfg = g.steady if tier.envelope is None else None
+        interval_ms = steady_cfg.probe_interval_ms if steady_cfg is not None else g.probe_interval_ms
+        session = self.session
+        if session is not None:
+            # Sonde déjà en marche, mesure à vide faite au premier palier vers cet hôte
+            latency, idle = await session.latency(destinations[0].host)
+            latency_task = None
+        else:
+            latency = LatencyProbe(destinations[0].host, g.echo_port, interval_ms / 1000, icmp_host=g.ping_host)
+            latency_task = latency.start()
+            idle = await latency.baseline(g.idle_probe_s)
+        duration_s: float = tier.duration_s
+        if steady_cfg is not None:
+            min_s, duration_s = steady_cfg.bounds(tier.duration_s)
+            progress.update(task_id, total=duration_s)
+        # Une seule échéance pour le trafic, les sondes, les ressources et la progression
+        sched = TierScheduler(duration_s)
+        sched.start()
+        if latency_task is not None:
+            sched.background(latency_task)
+        resources = ResourceSampler(g.resource_interval_ms / 1000, duration_s=duration_s)
+        sched.background(resources.run())
+        probe = SenderProbe()
+        sched.background(probe.run(interval=1.0))
+        target_mbps = tier.mean_target_mbps
+        target_at = tier.envelope.rate_mbps if tier.envelope else None
+        if self.on_sample is not None:
+            attach_live(probe, tier.name, tier.target_bandwidth_mbps, self.on_sample, latency, target_at=target_at)
+        if self.metrics is not None:
+            self.metrics.attach(tier.name, target_mbps, probe, latency)
+        guard = LiveGuard(g.guard) if g.guard is not None else None
+        # Débit utile et perte par le retour du récepteur (UDP seulement)
+        feedback = None
+        wants_loss = steady_cfg is not None or (guard is not None and g.guard.max_loss_pct is not None)
+        if wants_loss and tier.protocol == "UDP" and tier.packet_size >= EXT_HEADER.size:
+            feedback = FeedbackTotals()
+        monitor = None
+        if steady_cfg is not None:
+            monitor = SteadyStateMonitor(steady_cfg, latency)
+            sched.background(watch(monitor, sched, probe, min_s, feedback, tier.packet_size))
+
+        # Flux par classe: horodatés pour que le récepteur ventile délai et perte par DSCP
+        classed = bool(tier.streams or tier.dscp)
+        stream_tasks = [
+            sched.traffic(
+                generate_fanout(
+                    st.protocol,
+                    self.destinations(tier, st.protocol),
+                    st.packet_size,
+                    st.target_bandwidth_mbps,
+                    st.connections,
+                    duration_s,
+                    dscp=st.dscp,
+                    timestamps=True,
+                    stop=sched.stopped,
+                    pool=self._pool,
+                    sources=st.sources,
+                )
+            )
+            for st in tier.streams
+        ]
+        # iperf seulement pour une cible unique, sans marquage, enveloppe, durée automatique, session ni sources
+        use_iperf = (
+            self.cfg.global_.use_iperf_if_available
+            and not self.internal_only
+            and session is None
+            and not tier.sources
+            and len(destinations) == 1
+            and not classed
+            and tier.envelope is None
+            and steady_cfg is None
+        )
+        # Débit pilotable: enveloppe, ou plafond du garde-fou en mode throttle
+        rate = None
+        if tier.envelope is not None or (guard is not None and g.guard.action == "throttle"):
+            rate = RateControl(tier.peak_mbps * 1_000_000)
+        if guard is not None:
+            sched.background(guard.run(sched, probe, latency, feedback, None if use_iperf else rate))
+        traffic_task = sched.traffic(
+            self._main_traffic(tier, destinations, probe, classed, use_iperf, sched, feedback, rate)
+        )
+        window = await sched.run(on_tick=lambda elapsed: progress.update(task_id, completed=elapsed))
+        progress.update(task_id, total=window.duration_s, completed=window.duration_s)
+
+        iperf_result, traffic_stats = sched.result(traffic_task, (None, None))
+        achieved_mbps = 0.0
+        jitter_ms = 0.0
+        packet_loss_pct = 0.0
+        if iperf_result is not None:
+            achieved_mbps = iperf_result.mbps
+            jitter_ms = iperf_result.jitter_ms or 0.0
+            packet_loss_pct = iperf_result.packet_loss_pct or 0.0
+        elif traffic_stats is not None:
+            achieved_mbps = traffic_stats.total.mbps
+        stream_stats = [sched.result(t) for t in stream_tasks]
+        if latency_task is not None:
+            responsiveness = await latency.finish(idle)
+        else:
+            responsiveness = Responsiveness(idle, latency.stats())
+        steady = monitor.evaluate() if monitor is not None else SteadyResult()
+        if monitor is not None:
+            # Mise en route écartée des moyennes
+            achieved_mbps = steady.sent_mbps if not math.isnan(steady.sent_mbps) else achieved_mbps
+            if steady.loss_pct is not None:
+                packet_loss_pct = steady.loss_pct
+            responsiveness = Responsiveness(idle, steady.latency(responsiveness.loaded))
+        loaded = responsiveness.loaded
+        res_sample = resources.summary(interface_for(destinations[0].host))
+        nic = res_sample.nic
+        # Le noyau compte en-têtes compris: un émetteur qui annonce plus que l'interface perd en local.
+        # Avec des sources, le contrôle se fait par interface (`_source_rows`)
+        if traffic_stats is not None and not tier.sources and nic is not None and nic.tx_mbps > 0 and achieved_mbps > nic.tx_mbps * NIC_MISMATCH_RATIO:
+            progress.console.print(
+                f"[yellow]Tier {tier.name}: {achieved_mbps:.1f} Mbps émis selon le générateur, "
+                f"{nic.tx_mbps:.1f} Mbps sur {nic.name} (pertes dans la pile locale?)"
+            )
+        if self.metrics is not None:
+            self.metrics.detach()
+        overhead = probe.summary(target_mbps, achieved_mbps, tier.protocol)
+        if timeline is not None:
+            timeline.extend(self._timeline(tier, probe))
+        if window.stop_reason.startswith("guard"):
+            progress.console.print(f"[red]Tier {tier.name}: {window.stop_reason}")
+        if overhead.sender_bound:
+            progress.console.print(
+                f"[yellow]Tier {tier.name}: émetteur saturé (sender-bound) - "
+                f"CPU {overhead.proc_cpu_pct:.0f}%, lag boucle {overhead.loop_lag_ms_avg:.1f} ms, "
+                f"retard pacing {overhead.pacing_error_ms_avg:.1f} ms"
+            )
+
+        row = TierReportRow(
+            timestamp_start=window.start,
+            tier_name=tier.name,
+            protocol=tier.protocol,
+            target_mbps=target_mbps,
+            achieved_mbps=achieved_mbps,
+            latency_ms_avg=loaded.avg_ms,
+            jitter_ms=jitter_ms or loaded.jitter_ms,
+            packet_loss_pct=packet_loss_pct or loaded.loss_pct,
+            cpu_pct_avg=res_sample.cpu_pct,
+            mem_pct_avg=res_sample.mem_pct,
+            loop_lag_ms_avg=overhead.loop_lag_ms_avg,
+            loop_lag_ms_max=overhead.loop_lag_ms_max,
+            syscalls_per_s=overhead.syscalls_per_s,
+            pacing_error_ms_avg=overhead.pacing_error_ms_avg,
+            sendto_pct=overhead.sendto_pct,
+            proc_cpu_pct=overhead.proc_cpu_pct,
+            sender_bound=overhead.sender_bound,
+            target=destinations[0].label if len(destinations) == 1 else TOTAL_LABEL,
+            traffic_class=class_label(tier.dscp),
+            latency_idle_ms=idle.median_ms,
+            latency_loaded_p90_ms=loaded.p90_ms,
+            latency_inflation_ms=responsiveness.inflation_ms,
+            rpm=loaded.rpm,
+            timestamp_end=window.end,
+            warmup_s=steady.warmup_s,
+            steady=steady.converged,
+            goodput_mbps=steady.goodput_mbps,
+            goodput_ci_mbps=steady.goodput_ci_mbps,
+            loss_ci_pct=steady.loss_ci_pct,
+            latency_p99_ms=steady.latency_p99_ms,
+            latency_p99_ci_ms=steady.latency_p99_ci_ms,
+            stop_reason=window.stop_reason,
+            guard_throttles=guard.throttles if guard is not None else 0,
+            nic=nic.name if nic is not None else "",
+            nic_tx_mbps=nic.tx_mbps if nic is not None else float("nan"),
+            nic_rx_mbps=nic.rx_mbps if nic is not None else float("nan"),
+            nic_errors=nic.errors if nic is not None else 0,
+            nic_drops=nic.drops if nic is not None else 0,
+            cpu_core_max_pct=res_sample.cpu_core_max_pct,
+            proc_cpu_max_pct=res_sample.proc_cpu_max_pct,
+        )
+        rows = [row]
+        if traffic_stats and len(destinations) > 1:
+            total_share = sum(d.share for d in destinations) or 1.0
+            for d in destinations:
+                per = traffic_stats.per_target[d.label]
+                rows.append(
+                    dataclasses.replace(
+                        row,
+                        target=d.label,
+                        target_mbps=target_mbps * d.share / total_share,
+                        achieved_mbps=per.mbps,
+                        sender_bound=False,
                     )
                 )
+        if traffic_stats and tier.sources:
+            rows.extend(self._source_rows(tier, row, traffic_stats, resources, progress))
+        # Flux additionnels: débit émis seulement, perte/délai par classe côté récepteur (.classes.csv)
+        for st, stats in zip(tier.streams, stream_stats):
+            rows.append(
+                dataclasses.replace(
+                    row,
+                    protocol=st.protocol,
+                    target_mbps=st.target_bandwidth_mbps,
+                    achieved_mbps=stats.total.mbps if isinstance(stats, FanoutStats) else 0.0,
+                    sender_bound=False,
+                    traffic_class=f"{st.name} {class_label(st.dscp) or 'BE'}",
+                )
+            )
+        return rows
 
-        reporter.write()
-        return reporter
+    async def _main_traffic(
+        self,
+        tier: TierConfig,
+        destinations: List[Destination],
+        probe: SenderProbe,
+        classed: bool,
+        use_iperf: bool,
+        sched: TierScheduler,
+        feedback: Optional[FeedbackTotals] = None,
+        rate: Optional[RateControl] = None,
+    ) -> Tuple[Optional[IperfResult], Optional[FanoutStats]]:
+        """Trafic principal: iperf si possible, sinon générateur interne jusqu'à l'échéance."""
+        if use_iperf:
+            result = await run_iperf(destinations[0].host, tier.duration_s, tier.protocol, tier.connections)
+            if result and result.mbps > 0:
+                return result, None
+        remaining = sched.remaining
+        if remaining <= 0:
+            return None, None
+        # Avec `rate`, le générateur part de la crête (parts des flux) et suit la consigne
+        send = generate_fanout(
+            tier.protocol,
+            destinations,
+            tier.packet_size,
+            tier.peak_mbps,
+            tier.connections,
+            remaining,
+            probe=probe,
+            pool=self._pool,
+            rate=rate,
+            on_feedback=feedback,
+            dscp=tier.dscp,
+            timestamps=classed,
+            stop=sched.stopped,
+            sources=tier.sources,
+        )
+        if tier.envelope is None:
+            return None, await send
+        rate.set(tier.envelope.rate_mbps(0.0) * 1_000_000)
+        follower = asyncio.create_task(follow(tier.envelope, rate, remaining))
+        try:
+            return None, await send
+        finally:
+            follower.cancel()
+
+    def _source_rows(
+        self,
+        tier: TierConfig,
+        row: TierReportRow,
+        stats: FanoutStats,
+        resources: ResourceSampler,
+        progress: Progress,
+    ) -> List[TierReportRow]:
+        """Une ligne par interface d'émission: débit du générateur et compteurs de l'interface."""
+        rows = []
+        parts = []
+        total_share = sum(s.share for s in tier.sources) or 1.0
+        for src in tier.sources:
+            per = stats.per_source[src.label]
+            nic = resources.nic_summary(src.interface or interface_with_address(src.address) or "")
+            rows.append(
+                dataclasses.replace(
+                    row,
+                    target_mbps=row.target_mbps * src.share / total_share,
+                    achieved_mbps=per.mbps,
+                    sender_bound=False,
+                    source=src.label,
+                    nic=nic.name if nic is not None else "",
+                    nic_tx_mbps=nic.tx_mbps if nic is not None else float("nan"),
+                    nic_rx_mbps=nic.rx_mbps if nic is not None else float("nan"),
+                    nic_errors=nic.errors if nic is not None else 0,
+                    nic_drops=nic.drops if nic is not None else 0,
+                )
+            )
+            parts.append(f"{src.label} {per.mbps:.1f} Mbps" + (f" (interface {nic.tx_mbps:.1f})" if nic is not None else ""))
+        progress.console.print(f"Tier {tier.name}: " + ", ".join(parts))
+        return rows
+
+    @property
+    def _pool(self) -> Optional[SocketPool]:
+        return self.session.pool if self.session is not None else self.pool
+
+    @staticmethod
+    def _timeline(tier: TierConfig, probe: SenderProbe) -> List[TimelineRow]:
+        rows = []
+        prev = 0.0
+        for s in probe.samples:
+            if tier.envelope:
+                target = tier.envelope.mean_mbps(prev, min(s.t_s, tier.duration_s))
+            else:
+                target = tier.target_bandwidth_mbps
+            rows.append(TimelineRow(tier.name, s.t_s, target, s.mbps))
+            prev = s.t_s
+        return rows
 
 
-__all__ = ["LoadTestRunner"]
+__all__ = ["LoadTestRunner", "TOTAL_LABEL"]
@@ -0,0 +1,128 @@
+"""Ordonnancement d'un palier sous une échéance unique.
+
+Trafic (iperf ou générateur interne), sondes, échantillonnage des ressources
+et progression démarrent ensemble et partagent une échéance monotone,
+`début + duration_s`:
+- à l'échéance, les tâches de fond (`background`) sont annulées;
+- le trafic (`traffic`) dispose encore de `grace_s` pour rendre son résultat
+  (fin d'iperf, dernier retour du récepteur), puis il est annulé.
+
+`stop(raison)` avance l'échéance à l'instant présent (régime établi atteint,
+garde-fou): `stopped` est l'évènement que surveillent les générateurs pour
+rendre la main proprement. Toutes les mesures du palier portent ainsi sur la
+même fenêtre (`TierWindow`). Un palier iperf ne dure plus deux fois `duration_s`, et un
+repli sur le générateur interne n'utilise que le temps restant.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional
+
+# Délai laissé au trafic après l'échéance (démarrage/arrêt d'iperf, dernier retour)
+DEFAULT_GRACE_S = 3.0
+
+
+@dataclass
+class TierWindow:
+    start: str  # ISO, UTC
+    end: str
+    duration_s: float  # durée effective mesurée sur l'horloge monotone
+    stop_reason: str = ""  # vide = échéance atteinte
+
+
+class TierScheduler:
+    def __init__(self, duration_s: float, grace_s: float = DEFAULT_GRACE_S):
+        self.duration_s = duration_s
+        self.grace_s = grace_s
+        self._traffic: List[asyncio.Future] = []
+        self._background: List[asyncio.Future] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._t0 = 0.0
+        self._start_wall = ""
+        self.stopped: Optional[asyncio.Event] = None
+        self.stop_reason = ""
+
+    def start(self):
+        """Fixe l'origine de la fenêtre (à appeler juste avant de lancer les tâches)."""
+        self._loop = asyncio.get_running_loop()
+        self._t0 = self._loop.time()
+        self._start_wall = datetime.utcnow().isoformat()
+        self.stopped = asyncio.Event()
+
+    def stop(self, reason: str):
+        """Termine le palier avant l'échéance (le premier motif est conservé)."""
+        if not self.stopped.is_set():
+            self.stop_reason = reason
+            self.stopped.set()
+
+    @property
+    def deadline(self) -> float:
+        return self._t0 + self.duration_s
+
+    @property
+    def remaining(self) -> float:
+        if self.stopped.is_set():
+            return 0.0
+        return max(self.deadline - self._loop.time(), 0.0)
+
+    @property
+    def elapsed(self) -> float:
+        return self._loop.time() - self._t0
+
+    def traffic(self, aw: Awaitable[Any]) -> asyncio.Future:
+        task = asyncio.ensure_future(aw)
+        self._traffic.append(task)
+        return task
+
+    def background(self, aw: Awaitable[Any]) -> asyncio.Future:
+        task = asyncio.ensure_future(aw)
+        self._background.append(task)
+        return task
+
+    async def run(self, on_tick: Optional[Callable[[float], None]] = None, tick_s: float = 1.0) -> TierWindow:
+        """Attend l'échéance (appel de `on_tick(écoulé)` chaque seconde), puis arrête tout."""
+        try:
+            while True:
+                remaining = self.remaining
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self.stopped.wait(), min(tick_s, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                if on_tick is not None:
+                    on_tick(min(self.elapsed, self.duration_s))
+            self.stopped.set()  # les générateurs qui surveillent l'évènement s'arrêtent aussi à l'échéance
+            window = TierWindow(self._start_wall, datetime.utcnow().isoformat(), self.elapsed, self.stop_reason)
+            await self._cancel(self._background)
+            pending = [t for t in self._traffic if not t.done()]
+            if pending:
+                _, late = await asyncio.wait(pending, timeout=self.grace_s)
+                if late:
+                    logging.warning("%d tâche(s) de trafic encore actives %.1f s après l'échéance: annulées", len(late), self.grace_s)
+            return window
+        finally:
+            await self._cancel(self._traffic + self._background)
+
+    @staticmethod
+    async def _cancel(tasks: List[asyncio.Future]):
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def result(task: asyncio.Future, default: Any = None) -> Any:
+        """Résultat d'une tâche terminée; `default` si annulée ou en échec (journalisé)."""
+        if task.cancelled() or not task.done():
+            return default
+        exc = task.exception()
+        if exc is not None:
+            logging.warning("Tâche de trafic en échec: %s", exc)
+            return default
+        return task.result()
+
+
+__all__ = ["TierScheduler", "TierWindow", "DEFAULT_GRACE_S"]
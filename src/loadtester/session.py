@@ -0,0 +1,106 @@
+"""Session de test persistante: sockets, connexions TCP et sondes partagés par les paliers.
+
+    global:
+      session: true          # ou: loadtester --session / loadtester-stress --session
+
+Sans session, chaque palier (runner, niveau de stress) repart de zéro:
+- il ouvre ses sockets UDP et ses connexions TCP, et lance sa sonde de latence
+  (et iperf3);
+- il mesure la latence à vide (`idle_probe_s`) avant d'envoyer;
+- une connexion TCP neuve repart du slow-start, donc un palier court mesure
+  surtout la montée de la fenêtre de congestion.
+
+`PersistentSession` garde, pour toute l'exécution:
+- un `SocketPool` (sockets UDP, connexions TCP par cible). Le palier suivant
+  reprend les mêmes connexions à son propre débit, sans poignée de main;
+- une `LatencyProbe` par hôte, démarrée une seule fois. La mesure à vide est
+  faite à la première utilisation et sert de référence à tous les paliers vers
+  cet hôte.
+
+Un changement de palier ne coûte alors que quelques millisecondes. Les paliers
+d'une session utilisent le générateur interne: iperf3 ne change pas de débit
+sans nouvelle connexion.
+
+Linux ramène la fenêtre de congestion à sa valeur initiale après une pause
+plus longue que le RTO (`net.ipv4.tcp_slow_start_after_idle`, 1 par défaut).
+Entre deux paliers d'une session, la pause reste normalement plus courte.
+La session signale tout de même ce réglage à l'ouverture.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import DEFAULT_ECHO_PORT, GlobalConfig
+from .generator import SocketPool
+from .responsiveness import DEFAULT_PROBE_INTERVAL_S, LatencyProbe, LatencyStats
+
+SLOW_START_SYSCTL = Path("/proc/sys/net/ipv4/tcp_slow_start_after_idle")
+
+
+class PersistentSession:
+    """Pool de sockets et sondes de latence d'une exécution (`async with`, puis `latency(hôte)` par palier)."""
+
+    def __init__(
+        self,
+        echo_port: int = DEFAULT_ECHO_PORT,
+        interval: float = DEFAULT_PROBE_INTERVAL_S,
+        idle_s: float = 3.0,
+        ping_host: Optional[str] = None,
+        pool: Optional[SocketPool] = None,
+    ):
+        self.echo_port = echo_port
+        self.interval = interval
+        self.idle_s = idle_s
+        self.ping_host = ping_host
+        # Pool fourni (moteur GUI, soak): il survit à la session
+        self.pool = pool if pool is not None else SocketPool()
+        self._own_pool = pool is None
+        self._probes: Dict[str, Tuple[LatencyProbe, LatencyStats]] = {}
+
+    @classmethod
+    def from_config(cls, g: GlobalConfig, pool: Optional[SocketPool] = None) -> "PersistentSession":
+        interval_ms = g.steady.probe_interval_ms if g.steady is not None else g.probe_interval_ms
+        return cls(g.echo_port, interval_ms / 1000, g.idle_probe_s, g.ping_host, pool)
+
+    async def latency(self, host: str) -> Tuple[LatencyProbe, LatencyStats]:
+        """Sonde de `host` remise à zéro pour un nouveau palier, et sa mesure à vide."""
+        entry = self._probes.get(host)
+        if entry is None:
+            probe = LatencyProbe(host, self.echo_port, self.interval, icmp_host=self.ping_host or host)
+            probe.start()
+            entry = self._probes[host] = (probe, await probe.baseline(self.idle_s))
+        else:
+            entry[0].reset()
+        return entry
+
+    async def close(self):
+        for probe, idle in self._probes.values():
+            await probe.finish(idle)
+        self._probes.clear()
+        if self._own_pool:
+            self.pool.close()
+
+    async def __aenter__(self) -> "PersistentSession":
+        _check_slow_start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _check_slow_start():
+    try:
+        enabled = SLOW_START_SYSCTL.read_text().strip() == "1"
+    except OSError:
+        return  # hors Linux
+    if enabled:
+        logging.info(
+            "net.ipv4.tcp_slow_start_after_idle=1: une pause entre paliers plus longue que le RTO "
+            "ramène les connexions TCP de la session au slow-start (sysctl -w %s=0 pour l'éviter)",
+            "net.ipv4.tcp_slow_start_after_idle",
+        )
+
+
+__all__ = ["PersistentSession"]
@@ -0,0 +1,338 @@
+"""Mode soak: enchaîne les paliers de la config en boucle pendant des heures.
+
+    loadtester-soak --config config/example.yaml --hours 12 --output reports/soak_atelier
+    loadtester-soak --resume reports/soak_atelier
+
+La mémoire reste constante sur toute la durée:
+- seuls des agrégats glissants 1 min / 15 min / 1 h sont gardés en mémoire
+  (`RollingWindow`, nombre de seaux fixe);
+- les échantillons par seconde (`samples.csv`) et les lignes de palier
+  (`rows.csv`) sont écrits sur disque au fil de l'eau;
+- `checkpoint.json` est réécrit atomiquement toutes les `--checkpoint-s`
+  secondes et à chaque fin de palier. `--resume` repart du palier interrompu
+  avec le temps déjà écoulé et les fenêtres glissantes restaurées.
+
+Côté récepteur, lancer `loadtester-receiver --stream --flow-idle-s 300`
+pour que son CSV soit lui aussi écrit au fil de l'eau.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import dataclasses
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import eventloop
+from .config import FullConfig, load_config
+from .exporter import add_metrics_arguments, run_metrics_from_args, serving
+from .instrument import LiveSample
+
+
+# Fenêtres glissantes (nom, durée en s)
+WINDOWS = (("1m", 60), ("15m", 900), ("1h", 3600))
+WINDOW_METRICS = ("mbps", "loss_pct", "latency_ms")
+CHECKPOINT_NAME = "checkpoint.json"
+SAMPLES_NAME = "samples.csv"
+ROWS_NAME = "rows.csv"
+SAMPLE_COLUMNS = ["timestamp", "elapsed_s", "tier", "target_mbps", "mbps", "loss_pct", "latency_ms"]
+
+
+class RollingWindow:
+    """Agrégat glissant (nombre, moyenne, min, max) sur `span_s` secondes.
+
+    La fenêtre est découpée en `buckets` seaux recyclés circulairement: la
+    mémoire ne dépend pas du nombre d'échantillons reçus. Les horodatages sont
+    en temps mural (`time.time()`) pour rester valables après une reprise.
+    """
+
+    def __init__(self, span_s: float, buckets: int = 60):
+        self.span_s = span_s
+        self.buckets = buckets
+        self.width = span_s / buckets
+        self.epoch = [-1] * buckets
+        self.count = [0] * buckets
+        self.total = [0.0] * buckets
+        self.low = [math.inf] * buckets
+        self.high = [-math.inf] * buckets
+
+    def add(self, t: float, value: float):
+        if math.isnan(value):
+            return
+        k = int(t // self.width)
+        i = k % self.buckets
+        if self.epoch[i] != k:
+            self.epoch[i] = k
+            self.count[i] = 0
+            self.total[i] = 0.0
+            self.low[i] = math.inf
+            self.high[i] = -math.inf
+        self.count[i] += 1
+        self.total[i] += value
+        if value < self.low[i]:
+            self.low[i] = value
+        if value > self.high[i]:
+            self.high[i] = value
+
+    def stats(self, now: float) -> Dict[str, float]:
+        oldest = int(now // self.width) - self.buckets
+        live = [i for i in range(self.buckets) if self.epoch[i] > oldest and self.count[i]]
+        n = sum(self.count[i] for i in live)
+        if not n:
+            return {"count": 0, "avg": float("nan"), "min": float("nan"), "max": float("nan")}
+        return {
+            "count": n,
+            "avg": sum(self.total[i] for i in live) / n,
+            "min": min(self.low[i] for i in live),
+            "max": max(self.high[i] for i in live),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "span_s": self.span_s,
+            "buckets": self.buckets,
+            "epoch": self.epoch,
+            "count": self.count,
+            "total": self.total,
+            # JSON n'a pas d'infini: None pour un seau vide
+            "low": [None if math.isinf(v) else v for v in self.low],
+            "high": [None if math.isinf(v) else v for v in self.high],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RollingWindow":
+        w = cls(d["span_s"], d["buckets"])
+        w.epoch = list(d["epoch"])
+        w.count = list(d["count"])
+        w.total = list(d["total"])
+        w.low = [math.inf if v is None else v for v in d["low"]]
+        w.high = [-math.inf if v is None else v for v in d["high"]]
+        return w
+
+
+@dataclass
+class SoakState:
+    config_path: str
+    duration_s: float
+    started_at: str
+    elapsed_s: float = 0.0
+    cycle: int = 0
+    tier_index: int = 0
+    tiers_done: int = 0
+    samples_written: int = 0
+    finished: bool = False
+
+
+class SoakRunner:
+    def __init__(
+        self,
+        cfg: FullConfig,
+        out_dir: Path,
+        state: SoakState,
+        windows: Optional[Dict[str, Dict[str, RollingWindow]]] = None,
+        checkpoint_s: float = 60.0,
+        internal_only: bool = False,
+        metrics=None,
+    ):
+        if not cfg.tiers:
+            raise ValueError("Aucun palier dans la configuration")
+        self.cfg = cfg
+        self.out_dir = out_dir
+        self.state = state
+        self.checkpoint_s = checkpoint_s
+        self.internal_only = internal_only
+        self.metrics = metrics  # exporter.RunMetrics (exposition OpenMetrics)
+        self.windows = windows or {
+            m: {name: RollingWindow(span) for name, span in WINDOWS} for m in WINDOW_METRICS
+        }
+        self._samples_writer = None
+        self._run_start = 0.0
+        self._elapsed_base = state.elapsed_s
+
+    @classmethod
+    def resume(cls, out_dir: Path, **kwargs) -> "SoakRunner":
+        doc = json.loads((out_dir / CHECKPOINT_NAME).read_text(encoding="utf-8"))
+        state = SoakState(**doc["state"])
+        windows = {
+            m: {name: RollingWindow.from_dict(w) for name, w in per.items()}
+            for m, per in doc["windows"].items()
+        }
+        return cls(load_config(state.config_path), out_dir, state, windows, **kwargs)
+
+    def _elapsed(self) -> float:
+        return self._elapsed_base + (time.monotonic() - self._run_start)
+
+    def _on_sample(self, s: LiveSample):
+        now = time.time()
+        for m in WINDOW_METRICS:
+            value = getattr(s, m)
+            for w in self.windows[m].values():
+                w.add(now, value)
+        self._samples_writer.writerow([
+            datetime.utcfromtimestamp(now).isoformat(), f"{self._elapsed():.1f}", s.label,
+            f"{s.target_mbps:.2f}", f"{s.mbps:.2f}", f"{s.loss_pct:.2f}", f"{s.latency_ms:.2f}",
+        ])
+        self.state.samples_written += 1
+
+    def window_summary(self) -> dict:
+        now = time.time()
+        return {
+            m: {name: w.stats(now) for name, w in per.items()} for m, per in self.windows.items()
+        }
+
+    def checkpoint(self):
+        """Réécrit `checkpoint.json` atomiquement (fichier temporaire + rename)."""
+        self.state.elapsed_s = self._elapsed()
+        doc = {
+            "state": dataclasses.asdict(self.state),
+            "windows": {m: {n: w.to_dict() for n, w in per.items()} for m, per in self.windows.items()},
+            "summary": self.window_summary(),
+        }
+        path = self.out_dir / CHECKPOINT_NAME
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(doc, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    async def _checkpoint_loop(self, files):
+        while True:
+            await asyncio.sleep(self.checkpoint_s)
+            for f in files:
+                f.flush()
+            self.checkpoint()
+
+    async def run(self) -> SoakState:
+        from rich.progress import BarColumn, Progress, TextColumn, TimeElapsedColumn
+
+        from .generator import SocketPool
+        from .report import TierReportRow, format_row, row_columns
+        from .runner import LoadTestRunner
+        from .session import PersistentSession
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        samples_path = self.out_dir / SAMPLES_NAME
+        rows_path = self.out_dir / ROWS_NAME
+        new_samples = not samples_path.exists()
+        new_rows = not rows_path.exists()
+        samples_file = samples_path.open("a", newline="", encoding="utf-8")
+        rows_file = rows_path.open("a", newline="", encoding="utf-8")
+        self._samples_writer = csv.writer(samples_file)
+        rows_writer = csv.writer(rows_file)
+        if new_samples:
+            self._samples_writer.writerow(SAMPLE_COLUMNS)
+        if new_rows:
+            rows_writer.writerow(["cycle"] + row_columns(TierReportRow))
+
+        pool = SocketPool()
+        session = PersistentSession.from_config(self.cfg.global_, pool) if self.cfg.global_.session else None
+        runner = LoadTestRunner(
+            self.cfg, internal_only=self.internal_only, pool=pool, on_sample=self._on_sample, metrics=self.metrics,
+            session=session,
+        )
+        self._run_start = time.monotonic()
+        self._elapsed_base = self.state.elapsed_s
+        ckpt_task = asyncio.create_task(self._checkpoint_loop((samples_file, rows_file)))
+        try:
+            with Progress(TextColumn("{task.description}"), BarColumn(), TimeElapsedColumn()) as progress:
+                while self._elapsed() < self.state.duration_s:
+                    tier = self.cfg.tiers[self.state.tier_index]
+                    for row in await runner.run_tier(tier, progress):
+                        rows_writer.writerow([self.state.cycle] + format_row(row))
+                    rows_file.flush()
+                    # Les tâches rich terminées s'accumuleraient sur 24 h
+                    for t in list(progress.tasks):
+                        if t.finished:
+                            progress.remove_task(t.id)
+                    self.state.tiers_done += 1
+                    self.state.tier_index += 1
+                    if self.state.tier_index >= len(self.cfg.tiers):
+                        self.state.tier_index = 0
+                        self.state.cycle += 1
+                    self.checkpoint()
+                    progress.console.print(self._status_line())
+            self.state.finished = True
+        finally:
+            ckpt_task.cancel()
+            await asyncio.gather(ckpt_task, return_exceptions=True)
+            samples_file.close()
+            rows_file.close()
+            if session is not None:
+                await session.close()
+            pool.close()
+            self.checkpoint()
+        return self.state
+
+    def _status_line(self) -> str:
+        summary = self.window_summary()
+        elapsed = int(self._elapsed())
+        parts = [f"[soak] {elapsed // 3600}h{elapsed % 3600 // 60:02d} cycle {self.state.cycle}"]
+        for name, _ in WINDOWS:
+            mbps = summary["mbps"][name]["avg"]
+            loss = summary["loss_pct"][name]["avg"]
+            lat = summary["latency_ms"][name]["avg"]
+            parts.append(f"{name}: {mbps:.1f} Mbps perte {loss:.1f}% lat {lat:.1f} ms")
+        return " | ".join(parts)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Essai d'endurance (soak): paliers en boucle pendant des heures")
+    p.add_argument("--config", help="Configuration YAML (paliers joués en boucle)")
+    p.add_argument("--hours", type=float, default=8.0, help="Durée totale de l'essai")
+    p.add_argument("--output", help="Répertoire de l'essai (défaut: <output_dir>/soak_<date>)")
+    p.add_argument("--resume", metavar="DIR", help="Reprend l'essai enregistré dans DIR")
+    p.add_argument("--checkpoint-s", type=float, default=60.0, help="Période d'écriture du checkpoint")
+    p.add_argument("--internal-only", action="store_true", help="Ignore iperf3 même s'il est disponible")
+    p.add_argument("--log-level", default="INFO")
+    add_metrics_arguments(p)
+    eventloop.add_loop_argument(p)
+    args = p.parse_args()
+    if not args.config and not args.resume:
+        p.error("--config ou --resume requis")
+    return args
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="[%(levelname)s] %(message)s")
+    metrics, server = run_metrics_from_args(args)
+    options = {"checkpoint_s": args.checkpoint_s, "internal_only": args.internal_only, "metrics": metrics}
+    if args.resume:
+        soak = SoakRunner.resume(Path(args.resume), **options)
+        if soak.state.finished:
+            print(f"Essai déjà terminé: {args.resume}")
+            return
+        logging.info(
+            "Reprise: cycle %s palier %s, %.0f s déjà écoulées",
+            soak.state.cycle, soak.state.tier_index, soak.state.elapsed_s,
+        )
+    else:
+        cfg = load_config(args.config)
+        out_dir = Path(args.output or Path(cfg.global_.output_dir) / f"soak_{datetime.utcnow():%Y%m%d_%H%M%S}")
+        state = SoakState(
+            config_path=str(Path(args.config).resolve()),
+            duration_s=args.hours * 3600,
+            started_at=datetime.utcnow().isoformat(),
+        )
+        soak = SoakRunner(cfg, out_dir, state, **options)
+    loop_backend = eventloop.resolve_backend(args.loop or soak.cfg.global_.loop_backend)
+    logging.info("Boucle d'événements: %s", loop_backend)
+    try:
+        eventloop.run(serving(server, soak.run()), loop_backend)
+    except KeyboardInterrupt:
+        print(f"\nInterrompu: reprendre avec loadtester-soak --resume {soak.out_dir}")
+        return
+    print(f"Soak terminé: {soak.out_dir}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
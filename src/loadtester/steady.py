@@ -0,0 +1,263 @@
+"""Régime établi: mise en route écartée et durée de palier automatique.
+
+    global:
+      steady: {min_s: 10, max_s: 120, ci_pct: 5}
+
+ou `loadtester-stress --steady --min-duration 10 --max-duration 120`.
+
+Chaque seconde, le palier enregistre le débit émis, le débit utile et la perte
+(retour du récepteur en UDP, débit émis en TCP), ainsi que le nombre d'échos de
+la sonde de latence. Ensuite:
+- la mise en route est détectée par MSER (troncature qui minimise l'erreur
+  standard de la moyenne restante, au plus la moitié de la série) et écartée;
+- chaque seconde de régime établi compte comme une moyenne de lot;
+- les intervalles de confiance portent sur le débit utile et la perte
+  (Student) et sur le p99 de latence (statistiques d'ordre, sans hypothèse
+  de loi);
+- le palier s'arrête dès que les trois demi-largeurs passent sous `ci_pct` %
+  de leur valeur, ou sous un plancher absolu pour la perte et la latence
+  (une perte proche de 0 n'a pas d'IC relatif utile). La durée reste
+  comprise entre `min_s` et `max_s`.
+
+Un p99 demande environ 600 échos pour être borné. En régime établi, la sonde
+de latence émet donc toutes les `probe_interval_ms` (10 ms, soit environ
+32 kbit/s) au lieu de l'intervalle global: le p99 converge en 6 s au lieu de
+30 s.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Secondes de régime établi minimales pour un IC de Student
+MIN_STEADY_SAMPLES = 5
+
+
+@dataclass
+class SteadyConfig:
+    min_s: float = 10.0
+    max_s: Optional[float] = None  # None = duration_s du palier
+    ci_pct: float = 5.0  # demi-largeur visée, en % de la valeur
+    confidence: float = 0.95
+    loss_abs_pct: float = 0.5  # plancher absolu de la demi-largeur de perte (points de %)
+    latency_abs_ms: float = 2.0  # plancher absolu de la demi-largeur du p99
+    latency_quantile: float = 0.99
+    probe_interval_ms: float = 10.0  # sonde de latence resserrée: p99 borné en quelques secondes
+
+    def bounds(self, duration_s: float) -> Tuple[float, float]:
+        """(durée min, durée max) d'un palier de `duration_s` nominale."""
+        max_s = self.max_s if self.max_s is not None else duration_s
+        return min(self.min_s, max_s), max_s
+
+
+def parse_steady(raw: Dict[str, Any]) -> SteadyConfig:
+    cfg = SteadyConfig(
+        min_s=float(raw.get("min_s", 10.0)),
+        max_s=float(raw["max_s"]) if raw.get("max_s") is not None else None,
+        ci_pct=float(raw.get("ci_pct", 5.0)),
+        confidence=float(raw.get("confidence", 0.95)),
+        loss_abs_pct=float(raw.get("loss_abs_pct", 0.5)),
+        latency_abs_ms=float(raw.get("latency_abs_ms", 2.0)),
+        latency_quantile=float(raw.get("latency_quantile", 0.99)),
+        probe_interval_ms=float(raw.get("probe_interval_ms", 10.0)),
+    )
+    if not 0 < cfg.confidence < 1 or not 0 < cfg.latency_quantile < 1 or cfg.ci_pct <= 0:
+        raise ValueError("steady: 0 < confidence < 1, 0 < latency_quantile < 1 et ci_pct > 0 requis")
+    return cfg
+
+
+def t_quantile(p: float, df: int) -> float:
+    """Quantile de Student (développement de Cornish-Fisher, < 1 % d'erreur dès 3 ddl)."""
+    z = NormalDist().inv_cdf(p)
+    if df <= 0:
+        return math.inf
+    z3, z5, z7 = z ** 3, z ** 5, z ** 7
+    return (
+        z
+        + (z3 + z) / (4 * df)
+        + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+        + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3)
+    )
+
+
+def mean_ci(values: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """(moyenne, demi-largeur de l'IC de Student); demi-largeur infinie sous 2 valeurs."""
+    n = len(values)
+    if n == 0:
+        return math.nan, math.inf
+    mean = sum(values) / n
+    if n < 2:
+        return mean, math.inf
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, t_quantile(0.5 + confidence / 2, n - 1) * math.sqrt(var / n)
+
+
+def quantile_ci(values: Sequence[float], q: float, confidence: float = 0.95) -> Tuple[float, float, float]:
+    """(quantile `q`, borne basse, borne haute) par statistiques d'ordre; bornes NaN si trop peu de valeurs."""
+    n = len(values)
+    if n == 0:
+        return math.nan, math.nan, math.nan
+    xs = sorted(values)
+    point = xs[min(max(math.ceil(n * q) - 1, 0), n - 1)]
+    half = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(n * q * (1 - q))
+    lo, hi = math.floor(n * q - half) - 1, math.ceil(n * q + half) - 1
+    if lo < 0 or hi >= n:
+        return point, math.nan, math.nan
+    return point, xs[lo], xs[hi]
+
+
+def mser(values: Sequence[float]) -> int:
+    """Nombre de valeurs initiales à écarter (règle MSER, au plus la moitié de la série)."""
+    n = len(values)
+    best, best_d = math.inf, 0
+    suffix_sum = suffix_sq = 0.0
+    stats = [(0.0, 0.0)] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum += values[i]
+        suffix_sq += values[i] * values[i]
+        stats[i] = (suffix_sum, suffix_sq)
+    for d in range(n // 2 + 1):
+        m = n - d
+        s, sq = stats[d]
+        score = max(sq - s * s / m, 0.0) / (m * m)
+        if score < best - 1e-12:
+            best, best_d = score, d
+    return best_d
+
+
+@dataclass
+class SecondSample:
+    t_s: float
+    sent_mbps: float
+    goodput_mbps: float
+    loss_pct: Optional[float]  # None: pas de retour du récepteur (TCP, récepteur ancien)
+    rtt_mark: int  # échos reçus depuis le démarrage de la sonde à la fin de la seconde (`rtt_total`)
+
+
+@dataclass
+class SteadyResult:
+    warmup_s: float = 0.0
+    converged: bool = False
+    sent_mbps: float = math.nan
+    goodput_mbps: float = math.nan
+    goodput_ci_mbps: float = math.nan
+    loss_pct: Optional[float] = None
+    loss_ci_pct: float = math.nan
+    latency_p99_ms: float = math.nan
+    latency_p99_ci_ms: float = math.nan  # demi-largeur
+    rtts: Optional[List[float]] = None  # échos du régime établi
+
+    def latency(self, loaded):
+        """`LatencyStats` du régime établi; la perte d'échos reste celle du palier entier."""
+        from .responsiveness import LatencyStats
+
+        if not self.rtts:
+            return loaded
+        return dataclasses.replace(LatencyStats.from_rtts(self.rtts, len(self.rtts), 0), loss_pct=loaded.loss_pct)
+
+
+class FeedbackTotals:
+    """Cumuls du retour récepteur, tous flux confondus (rappel `on_feedback` du générateur)."""
+
+    def __init__(self):
+        self.latest: Dict[tuple, Any] = {}
+
+    def __call__(self, local: tuple, fb):
+        self.latest[local] = fb
+
+    def totals(self) -> Tuple[int, int]:
+        return sum(fb.received for fb in self.latest.values()), sum(fb.lost for fb in self.latest.values())
+
+
+class SteadyStateMonitor:
+    """Séries par seconde d'un palier, détection de la mise en route et critère d'arrêt."""
+
+    def __init__(self, cfg: SteadyConfig, latency):
+        self.cfg = cfg
+        # `LatencyProbe`: `rtts` relu à chaque fois (vidé au repli ICMP, repères re-basés sur `rtt_base`)
+        self.latency = latency
+        self.samples: List[SecondSample] = []
+
+    def add(self, sample: SecondSample):
+        self.samples.append(sample)
+
+    def evaluate(self) -> SteadyResult:
+        cfg = self.cfg
+        if not self.samples:
+            return SteadyResult()
+        warm = mser([s.goodput_mbps for s in self.samples])
+        steady = self.samples[warm:]
+        start_t = self.samples[warm - 1].t_s if warm else 0.0
+        sent = sum(s.sent_mbps for s in steady) / len(steady)
+        goodput, goodput_hw = mean_ci([s.goodput_mbps for s in steady], cfg.confidence)
+        rel = cfg.ci_pct / 100
+        ok = len(steady) >= MIN_STEADY_SAMPLES and goodput_hw <= rel * abs(goodput)
+        loss = loss_hw = None
+        if all(s.loss_pct is not None for s in steady):
+            loss, loss_hw = mean_ci([s.loss_pct for s in steady], cfg.confidence)
+            ok = ok and loss_hw <= max(rel * loss, cfg.loss_abs_pct)
+        # Repère absolu; après un `reset()` en cours de palier, la liste courante commence après lui
+        mark = self.samples[warm - 1].rtt_mark - self.latency.rtt_base if warm else 0
+        rtts = self.latency.rtts[max(mark, 0):]
+        p99, lo, hi = quantile_ci(rtts, cfg.latency_quantile, cfg.confidence)
+        p99_hw = (hi - lo) / 2
+        if rtts:  # sans aucun écho (ni UDP ni ICMP), la latence n'est pas un critère
+            ok = ok and not math.isnan(p99_hw) and p99_hw <= max(rel * p99, cfg.latency_abs_ms)
+        return SteadyResult(
+            warmup_s=start_t,
+            converged=ok,
+            sent_mbps=sent,
+            goodput_mbps=goodput,
+            goodput_ci_mbps=goodput_hw,
+            loss_pct=loss,
+            loss_ci_pct=loss_hw if loss_hw is not None else math.nan,
+            latency_p99_ms=p99,
+            latency_p99_ci_ms=p99_hw,
+            rtts=rtts,
+        )
+
+
+async def watch(
+    monitor: SteadyStateMonitor,
+    sched,
+    probe,
+    min_s: float,
+    feedback: Optional[FeedbackTotals] = None,
+    packet_size: int = 0,
+):
+    """Tâche de fond d'un palier (`TierScheduler`): une seconde par échantillon, arrêt à convergence.
+
+    Le débit utile et la perte viennent de `feedback` s'il a répondu, sinon
+    le débit émis mesuré par `probe` en tient lieu (perte inconnue).
+    """
+    loop = asyncio.get_running_loop()
+    last = loop.time()
+    prev_bytes = probe.bytes_sent
+    prev_recv = prev_lost = 0
+    while True:
+        await asyncio.sleep(1.0)
+        now = loop.time()
+        dt, last = now - last, now
+        sent = (probe.bytes_sent - prev_bytes) * 8 / 1_000_000 / dt
+        prev_bytes = probe.bytes_sent
+        goodput, loss = sent, None
+        if feedback is not None and feedback.latest:
+            recv, lost = feedback.totals()
+            d_recv, d_lost = recv - prev_recv, lost - prev_lost
+            prev_recv, prev_lost = recv, lost
+            goodput = d_recv * packet_size * 8 / 1_000_000 / dt
+            loss = d_lost / (d_recv + d_lost) * 100 if d_recv + d_lost > 0 else 0.0
+        monitor.add(SecondSample(sched.elapsed, sent, goodput, loss, monitor.latency.rtt_total))
+        if sched.elapsed >= min_s and monitor.evaluate().converged:
+            sched.stop("steady")
+            return
+
+
+__all__ = [
+    "SteadyConfig", "SteadyResult", "SteadyStateMonitor", "SecondSample", "FeedbackTotals",
+    "parse_steady", "watch", "mean_ci", "quantile_ci", "mser", "t_quantile",
+]
@@ -1,21 +1,25 @@
 """Mode stress: escalade automatique jusqu'à critères d'arrêt.
 
 Usage principal via script d'entrée `loadtester-stress`.
+
+Avec `--closed-loop aimd|delay`, l'échelle de paliers est remplacée par un
+seul palier UDP où le débit est piloté en continu par le retour du récepteur
+(voir `goodput`) jusqu'au maximum respectant les seuils de perte et de délai.
 """
 from __future__ import annotations
 
 import argparse
-import asyncio
 import csv
 import logging
+import math
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from .metrics import run_ping, sample_resources
-from .generator import generate_traffic
-from .iperf import run_iperf
+from . import eventloop
+from .config import DEFAULT_ECHO_PORT, DEFAULT_TCP_PORT, DEFAULT_UDP_PORT
+from .exporter import add_metrics_arguments, run_metrics_from_args, serving
 
 
 @dataclass
@@ -30,6 +34,29 @@ class StressResult:
     cpu_pct: float
     mem_pct: float
     status: str  # OK | WARN | FAIL
+    # Réactivité (voir responsiveness): latence_ms = moyenne en charge
+    latency_idle_ms: float = float("nan")
+    inflation_ms: float = float("nan")
+    rpm: float = 0.0
+    # Fenêtre de mesure commune au trafic, aux sondes et aux ressources (voir scheduler)
+    window_start: str = ""
+    window_end: str = ""
+    # Régime établi (--steady, voir steady): mise en route écartée, demi-largeurs des IC
+    warmup_s: float = 0.0
+    steady: bool = False
+    goodput_ci_mbps: float = float("nan")
+    loss_ci_pct: float = float("nan")
+    latency_p99_ms: float = float("nan")
+    latency_p99_ci_ms: float = float("nan")
+    # Fin anticipée: "steady", "guard: <dépassement>" (voir guard)
+    stop_reason: str = ""
+    guard_throttles: int = 0
+    # Interface vers la cible (voir metrics.ResourceSampler): contrôle indépendant du débit émis
+    nic: str = ""
+    nic_tx_mbps: float = float("nan")
+    nic_rx_mbps: float = float("nan")
+    nic_drops: int = 0
+    cpu_core_max_pct: float = 0.0
 
 
 def parse_args() -> argparse.Namespace:
@@ -40,6 +67,10 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--step-mbps", type=float, default=10)
     p.add_argument("--max-mbps", type=float, default=200)
     p.add_argument("--duration", type=int, default=15, help="Durée par palier (s)")
+    p.add_argument("--steady", action="store_true", help="Durée automatique: arrêt dès que les IC sont assez serrés")
+    p.add_argument("--min-duration", type=float, default=10.0, help="Durée minimale d'un palier avec --steady (s)")
+    p.add_argument("--max-duration", type=float, help="Durée maximale avec --steady (défaut: --duration)")
+    p.add_argument("--ci-pct", type=float, default=5.0, help="Demi-largeur d'IC visée avec --steady (%% de la valeur)")
     p.add_argument("--protocol", choices=["UDP", "TCP", "BOTH"], default="UDP")
     p.add_argument("--connections", type=int, default=4)
     p.add_argument("--packet-size", type=int, default=1024)
@@ -48,76 +79,358 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--min-ratio", type=float, default=0.6, help="Achieved/Target minimal acceptable avant FAIL")
     p.add_argument("--output-dir", default="reports")
     p.add_argument("--no-iperf", action="store_true")
+    p.add_argument(
+        "--source", action="append", default=[],
+        help="Interface ou adresse d'émission, répétable: la charge est répartie entre les radios (générateur interne)",
+    )
+    p.add_argument(
+        "--session", action="store_true",
+        help="Sockets, connexions TCP et sonde de latence gardés d'un palier à l'autre (générateur interne)",
+    )
+    p.add_argument("--repeat", type=int, default=1, help="Mesures par cible (intervalles de confiance du modèle de capacité)")
+    p.add_argument("--past-fail", type=int, default=0, help="Cibles supplémentaires après le premier FAIL (plateau de saturation)")
+    p.add_argument("--site", default="", help="Site (historique de capacité)")
+    p.add_argument("--ap", default="", help="Point d'accès (historique de capacité)")
+    p.add_argument("--history", help="Historique de capacité JSONL (défaut: <output-dir>/capacity_history.jsonl)")
+    p.add_argument(
+        "--sample-interval-ms", type=float, default=100.0,
+        help="Période d'échantillonnage CPU par cœur et compteurs d'interface (ms)",
+    )
+    p.add_argument("--guard-max-mbps", type=float, help="Garde-fou: débit émis maximal (Mbps, mesuré chaque seconde)")
+    p.add_argument("--guard-loss", type=float, help="Garde-fou: perte maximale (%%) avant arrêt du palier")
+    p.add_argument("--guard-latency", type=float, help="Garde-fou: latence moyenne maximale (ms) avant arrêt")
+    p.add_argument(
+        "--guard-action", choices=["abort", "throttle"], default="abort",
+        help="Réaction du garde-fou (throttle: débit plafonné, nécessite le générateur interne)",
+    )
+    p.add_argument("--echo-port", type=int, default=DEFAULT_ECHO_PORT, help="Réflecteur d'écho du récepteur (sonde de latence)")
+    p.add_argument("--idle-probe", type=float, default=2.0, help="Mesure de latence à vide avant chaque palier (s)")
+    p.add_argument(
+        "--closed-loop",
+        choices=["aimd", "delay"],
+        help="Un seul palier UDP à débit piloté par le retour du récepteur (remplace l'échelle)",
+    )
     p.add_argument("--log-level", default="INFO")
+    eventloop.add_loop_argument(p)
+    add_metrics_arguments(p)
     return p.parse_args()
 
 
-async def run_level(idx: int, proto: str, target: float, args) -> StressResult:
+async def run_level(idx: int, proto: str, target: float, args, session=None) -> StressResult:
+    """Un palier de l'escalade; avec `session` (voir session), sockets et sonde restent ouverts ensuite."""
+    from .instrument import SenderProbe, attach_live
+    from .metrics import ResourceSampler, interface_for
+    from .responsiveness import Responsiveness
+    from .generator import RateControl
+    from .guard import LiveGuard
+    from .scheduler import TierScheduler
+    from .steady import FeedbackTotals, SteadyResult, SteadyStateMonitor, watch
+    from .wire import EXT_HEADER
+
+    steady_cfg = _steady_config(args)
+    if session is not None:
+        (latency, idle), latency_task = await session.latency(args.host), None
+    else:
+        latency, latency_task, idle = await _start_latency(args, steady_cfg.probe_interval_ms / 1000 if steady_cfg else None)
     duration = args.duration
-    ping_task = asyncio.create_task(run_ping(args.ping_host or args.host, count=4))
-    res_task = asyncio.create_task(sample_resources(1.0, duration))
-    achieved = 0.0
-    jitter = 0.0
-    loss = 0.0
-    if proto == "UDP" or proto == "TCP":
-        if not args.no_iperf:
-            iperf_res = await run_iperf(args.host, duration, proto, args.connections)
-            if iperf_res:
-                achieved = iperf_res.mbps
-                if proto == "UDP":
-                    jitter = iperf_res.jitter_ms or 0.0
-                    loss = iperf_res.packet_loss_pct or 0.0
-        if achieved == 0.0:
-            # fallback interne
-            stats = await generate_traffic(
-                proto,
-                args.host,
-                5201 if proto == "TCP" else 5202,
-                args.packet_size,
-                target,
-                args.connections,
-                duration,
-            )
-            achieved = stats.mbps
-    ping_res = await ping_task
-    res_sample = await res_task
-    jitter = jitter or ping_res.jitter_ms
-    # Décision statut
+    if steady_cfg is not None:
+        min_s, duration = steady_cfg.bounds(args.duration)
+    # Trafic, sondes et ressources sous la même échéance (voir scheduler)
+    sched = TierScheduler(duration)
+    sched.start()
+    if latency_task is not None:
+        sched.background(latency_task)
+    resources = ResourceSampler(getattr(args, "sample_interval_ms", 100.0) / 1000, duration_s=duration)
+    sched.background(resources.run())
+    # Affichage en direct (GUI): `args.on_sample` reçoit un LiveSample par seconde
+    on_sample = getattr(args, "on_sample", None)
+    probe = SenderProbe()
+    sched.background(probe.run(interval=1.0))
+    if on_sample is not None:
+        attach_live(probe, f"Lvl{idx} {proto}", target, on_sample, latency)
+    metrics = getattr(args, "metrics", None)
+    if metrics is not None:
+        metrics.attach(f"Lvl{idx} {proto}", target, probe, latency)
+    limits = _guard_limits(args)
+    guard = LiveGuard(limits) if limits is not None else None
+    feedback = None
+    wants_loss = steady_cfg is not None or (limits is not None and limits.max_loss_pct is not None)
+    if wants_loss and proto == "UDP" and args.packet_size >= EXT_HEADER.size:
+        feedback = FeedbackTotals()
+    monitor = None
+    if steady_cfg is not None:
+        monitor = SteadyStateMonitor(steady_cfg, latency)
+        sched.background(watch(monitor, sched, probe, min_s, feedback, args.packet_size))
+    rate = RateControl(target * 1_000_000) if limits is not None and limits.action == "throttle" else None
+    if guard is not None:
+        # iperf3 ne se plafonne pas: le garde-fou ne peut alors qu'arrêter le palier
+        sched.background(guard.run(sched, probe, latency, feedback, rate if _internal_only(args, session) else None))
+    traffic_task = sched.traffic(_level_traffic(proto, target, args, probe, sched, feedback, rate, session))
+    window = await sched.run()
+    achieved, jitter, loss = sched.result(traffic_task, (0.0, 0.0, 0.0))
+    if latency_task is not None:
+        responsiveness = await latency.finish(idle)
+    else:
+        responsiveness = Responsiveness(idle, latency.stats())
+    steady = monitor.evaluate() if monitor is not None else SteadyResult()
+    if monitor is not None:
+        # Mise en route écartée; la perte vient du récepteur quand il répond
+        if not math.isnan(steady.sent_mbps):
+            achieved = steady.sent_mbps
+        if steady.loss_pct is not None:
+            loss = steady.loss_pct
+        responsiveness = Responsiveness(idle, steady.latency(responsiveness.loaded))
+    loaded = responsiveness.loaded
+    if metrics is not None:
+        metrics.detach()
+    res_sample = resources.summary(interface_for(args.host))
+    jitter = jitter or loaded.jitter_ms
     ratio = achieved / target if target > 0 else 0
-    status = "OK"
-    if (loss > args.loss_threshold or ping_res.avg_latency_ms > args.latency_threshold or ratio < args.min_ratio):
+    status = _status(args, loss, loaded.avg_ms, ratio)
+    if window.stop_reason.startswith("guard"):
+        logging.warning("Palier %s interrompu par le garde-fou: %s", idx, window.stop_reason)
         status = "FAIL"
-    elif (loss > args.loss_threshold * 0.5 or ping_res.avg_latency_ms > args.latency_threshold * 0.6 or ratio < (args.min_ratio + 0.15)):
-        status = "WARN"
     return StressResult(
         level=idx,
         protocol=proto,
         target_mbps=target,
         achieved_mbps=achieved,
-        latency_ms=ping_res.avg_latency_ms,
+        latency_ms=loaded.avg_ms,
         jitter_ms=jitter,
-        loss_pct=loss or ping_res.packet_loss_pct,
+        loss_pct=loss or loaded.loss_pct,
         cpu_pct=res_sample.cpu_pct,
         mem_pct=res_sample.mem_pct,
         status=status,
+        latency_idle_ms=idle.median_ms,
+        inflation_ms=responsiveness.inflation_ms,
+        rpm=loaded.rpm,
+        window_start=window.start,
+        window_end=window.end,
+        warmup_s=steady.warmup_s,
+        steady=steady.converged,
+        goodput_ci_mbps=steady.goodput_ci_mbps,
+        loss_ci_pct=steady.loss_ci_pct,
+        latency_p99_ms=steady.latency_p99_ms,
+        latency_p99_ci_ms=steady.latency_p99_ci_ms,
+        stop_reason=window.stop_reason,
+        guard_throttles=guard.throttles if guard is not None else 0,
+        **_nic_fields(res_sample),
+    )
+
+
+def _nic_fields(res_sample) -> dict:
+    """Colonnes `StressResult` de l'interface vers la cible et du cœur le plus chargé."""
+    nic = res_sample.nic
+    fields = {"cpu_core_max_pct": res_sample.cpu_core_max_pct}
+    if nic is not None:
+        fields.update(nic=nic.name, nic_tx_mbps=nic.tx_mbps, nic_rx_mbps=nic.rx_mbps, nic_drops=nic.drops)
+    return fields
+
+
+def _internal_only(args, session=None) -> bool:
+    return args.no_iperf or getattr(args, "steady", False) or session is not None or bool(getattr(args, "source", None))
+
+
+def _sources(args) -> list:
+    """`--source` (interface ou adresse) en `generator.Source`, parts égales."""
+    from .config import parse_sources
+
+    return parse_sources(getattr(args, "source", None) or [], "--source")
+
+
+def _guard_limits(args):
+    """`GuardLimits` si une limite `--guard-*` est donnée, sinon None."""
+    from .guard import GuardLimits
+
+    limits = GuardLimits(
+        max_mbps=getattr(args, "guard_max_mbps", None),
+        max_loss_pct=getattr(args, "guard_loss", None),
+        max_latency_ms=getattr(args, "guard_latency", None),
+        action=getattr(args, "guard_action", "abort"),
+    )
+    if limits.max_mbps is None and limits.max_loss_pct is None and limits.max_latency_ms is None:
+        return None
+    return limits
+
+
+def _steady_config(args):
+    """`SteadyConfig` si `--steady`, sinon None (durée fixe `--duration`)."""
+    if not getattr(args, "steady", False):
+        return None
+    from .steady import SteadyConfig
+
+    return SteadyConfig(min_s=args.min_duration, max_s=args.max_duration, ci_pct=args.ci_pct)
+
+
+async def _level_traffic(proto: str, target: float, args, probe, sched, feedback=None, rate=None, session=None) -> tuple:
+    """(débit, gigue, perte): iperf si possible, sinon générateur interne jusqu'à l'échéance."""
+    from .generator import Destination, generate_fanout
+    from .iperf import run_iperf
+
+    if proto not in ("UDP", "TCP"):
+        return 0.0, 0.0, 0.0
+    # iperf3 a une durée fixe et sa propre connexion: ni régime établi ni session
+    if not _internal_only(args, session):
+        iperf_res = await run_iperf(args.host, args.duration, proto, args.connections)
+        if iperf_res and iperf_res.mbps > 0:
+            if proto == "UDP":
+                return iperf_res.mbps, iperf_res.jitter_ms or 0.0, iperf_res.packet_loss_pct or 0.0
+            return iperf_res.mbps, 0.0, 0.0
+    remaining = sched.remaining
+    if remaining <= 0:
+        return 0.0, 0.0, 0.0
+    sources = _sources(args)
+    stats = await generate_fanout(
+        proto,
+        [Destination(args.host, DEFAULT_TCP_PORT if proto == "TCP" else DEFAULT_UDP_PORT)],
+        args.packet_size,
+        target,
+        args.connections,
+        remaining,
+        probe=probe,
+        pool=session.pool if session is not None else getattr(args, "pool", None),
+        rate=rate,
+        on_feedback=feedback,
+        stop=sched.stopped,
+        sources=sources,
+    )
+    if sources:
+        logging.info("Par source: %s", ", ".join(f"{k} {v.mbps:.1f} Mbps" for k, v in stats.per_source.items()))
+    return stats.total.mbps, 0.0, 0.0
+
+
+async def _start_latency(args, interval: Optional[float] = None):
+    """Sonde de latence démarrée et mesure à vide (le palier suit immédiatement)."""
+    from .responsiveness import DEFAULT_PROBE_INTERVAL_S, LatencyProbe
+
+    latency = LatencyProbe(
+        args.host,
+        getattr(args, "echo_port", DEFAULT_ECHO_PORT),
+        interval or DEFAULT_PROBE_INTERVAL_S,
+        icmp_host=args.ping_host or args.host,
+    )
+    task = latency.start()
+    idle = await latency.baseline(getattr(args, "idle_probe", 2.0))
+    return latency, task, idle
+
+
+def _status(args, loss: float, latency_ms: float, ratio: float) -> str:
+    if (loss > args.loss_threshold or latency_ms > args.latency_threshold or ratio < args.min_ratio):
+        return "FAIL"
+    if (loss > args.loss_threshold * 0.5 or latency_ms > args.latency_threshold * 0.6 or ratio < (args.min_ratio + 0.15)):
+        return "WARN"
+    return "OK"
+
+
+async def run_closed_loop(idx: int, args) -> StressResult:
+    """Palier UDP unique piloté par `goodput`; cible rapportée = débit d'envoi convergé."""
+    from .goodput import find_goodput, make_controller, write_trace
+    from .instrument import SenderProbe
+    from .metrics import ResourceSampler, interface_for
+    from .scheduler import TierScheduler
+
+    duration = args.duration
+    latency, latency_task, idle = await _start_latency(args)
+    controller = make_controller(
+        args.closed_loop, args.start_mbps, args.max_mbps, args.loss_threshold, args.latency_threshold
+    )
+    sched = TierScheduler(duration)
+    sched.start()
+    sched.background(latency_task)
+    resources = ResourceSampler(getattr(args, "sample_interval_ms", 100.0) / 1000, duration_s=duration)
+    sched.background(resources.run())
+    probe = SenderProbe()
+    sched.background(probe.run(interval=1.0))
+    metrics = getattr(args, "metrics", None)
+    if metrics is not None:
+        metrics.attach(f"Lvl{idx} {args.closed_loop}", args.max_mbps, probe, latency)
+    traffic_task = sched.traffic(
+        find_goodput(args.host, DEFAULT_UDP_PORT, args.packet_size, controller, duration, args.connections, probe)
+    )
+    try:
+        window = await sched.run()
+    finally:
+        if metrics is not None:
+            metrics.detach()
+    result = traffic_task.result()  # une boucle fermée sans résultat est une erreur: on la propage
+    write_trace(result, args.output_dir)
+    responsiveness = await latency.finish(idle)
+    loaded = responsiveness.loaded
+    res_sample = resources.summary(interface_for(args.host))
+    ratio = result.goodput_mbps / result.rate_mbps if result.rate_mbps > 0 else 0
+    return StressResult(
+        level=idx,
+        protocol="UDP",
+        target_mbps=result.rate_mbps,
+        achieved_mbps=result.goodput_mbps,
+        latency_ms=loaded.avg_ms,
+        jitter_ms=loaded.jitter_ms,
+        loss_pct=result.loss_pct,
+        cpu_pct=res_sample.cpu_pct,
+        mem_pct=res_sample.mem_pct,
+        status=_status(args, result.loss_pct, loaded.avg_ms, ratio),
+        latency_idle_ms=idle.median_ms,
+        inflation_ms=responsiveness.inflation_ms,
+        rpm=loaded.rpm,
+        window_start=window.start,
+        window_end=window.end,
+        **_nic_fields(res_sample),
     )
 
 
 async def stress(args) -> list[StressResult]:
+    if getattr(args, "closed_loop", None):
+        if args.protocol != "UDP":
+            logging.warning("Boucle fermée: UDP uniquement (le retour du récepteur n'existe pas en TCP)")
+        r = await run_closed_loop(1, args)
+        logging.info(
+            "Boucle fermée %s: débit utile %.1f Mbps (envoi %.1f Mbps) loss=%.2f%% status=%s",
+            args.closed_loop, r.achieved_mbps, r.target_mbps, r.loss_pct, r.status,
+        )
+        return [r]
+    if getattr(args, "session", False):
+        from .responsiveness import DEFAULT_PROBE_INTERVAL_S
+        from .session import PersistentSession
+
+        steady_cfg = _steady_config(args)
+        session = PersistentSession(
+            getattr(args, "echo_port", DEFAULT_ECHO_PORT),
+            steady_cfg.probe_interval_ms / 1000 if steady_cfg else DEFAULT_PROBE_INTERVAL_S,
+            getattr(args, "idle_probe", 2.0),
+            args.ping_host or args.host,
+            getattr(args, "pool", None),
+        )
+        async with session:
+            return await _escalate(args, session)
+    return await _escalate(args)
+
+
+async def _escalate(args, session=None) -> list[StressResult]:
     results: list[StressResult] = []
     level = 0
     current = args.start_mbps
     protocols = [args.protocol] if args.protocol != "BOTH" else ["UDP", "TCP"]
+    # Répétitions (IC du modèle de capacité) et paliers au-delà du premier FAIL (plateau de saturation)
+    repeat = max(getattr(args, "repeat", 1), 1)
+    past_fail = getattr(args, "past_fail", 0)
+    failed = 0
     while current <= args.max_mbps:
         for proto in protocols:
-            level += 1
-            logging.info("Palier %s %s %.1f Mbps", level, proto, current)
-            r = await run_level(level, proto, current, args)
-            results.append(r)
-            logging.info("Résultat: %.1f/%.1f Mbps latency=%.1fms loss=%.2f%% status=%s", r.achieved_mbps, r.target_mbps, r.latency_ms, r.loss_pct, r.status)
-            if r.status == "FAIL":
+            for _ in range(repeat):
+                level += 1
+                logging.info("Palier %s %s %.1f Mbps", level, proto, current)
+                r = await run_level(level, proto, current, args, session)
+                results.append(r)
+                logging.info(
+                    "Résultat: %.1f/%.1f Mbps latency=%.1fms (%+.1f ms vs vide, %.0f RPM) loss=%.2f%% status=%s",
+                    r.achieved_mbps, r.target_mbps, r.latency_ms, r.inflation_ms, r.rpm, r.loss_pct, r.status,
+                )
+        if any(r.status == "FAIL" and r.target_mbps == current for r in results):
+            failed += 1
+            if failed > past_fail:
                 logging.warning("Critère d'arrêt atteint (status FAIL). Fin.")
                 return results
+            logging.info("FAIL: encore %s cible(s) pour le modèle de capacité", past_fail - failed + 1)
         current += args.step_mbps
     return results
 
@@ -128,7 +441,10 @@ def write_report(results: list[StressResult], output_dir: str) -> Path:
     path = output / ("stress_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S") + ".csv")
     with path.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-        w.writerow(["level", "protocol", "target_mbps", "achieved_mbps", "latency_ms", "jitter_ms", "loss_pct", "cpu_pct", "mem_pct", "status"])
+        w.writerow(["level", "protocol", "target_mbps", "achieved_mbps", "latency_ms", "jitter_ms", "loss_pct", "cpu_pct", "mem_pct", "status",
+                    "latency_idle_ms", "inflation_ms", "rpm", "window_start", "window_end",
+                    "warmup_s", "steady", "goodput_ci_mbps", "loss_ci_pct", "latency_p99_ms", "latency_p99_ci_ms",
+                    "stop_reason", "guard_throttles", "nic", "nic_tx_mbps", "nic_rx_mbps", "nic_drops", "cpu_core_max_pct"])
         for r in results:
             w.writerow([
                 r.level,
@@ -141,6 +457,24 @@ def write_report(results: list[StressResult], output_dir: str) -> Path:
                 f"{r.cpu_pct:.2f}",
                 f"{r.mem_pct:.2f}",
                 r.status,
+                f"{r.latency_idle_ms:.2f}",
+                f"{r.inflation_ms:.2f}",
+                f"{r.rpm:.0f}",
+                r.window_start,
+                r.window_end,
+                f"{r.warmup_s:.1f}",
+                int(r.steady),
+                f"{r.goodput_ci_mbps:.2f}",
+                f"{r.loss_ci_pct:.2f}",
+                f"{r.latency_p99_ms:.2f}",
+                f"{r.latency_p99_ci_ms:.2f}",
+                r.stop_reason,
+                r.guard_throttles,
+                r.nic,
+                f"{r.nic_tx_mbps:.2f}",
+                f"{r.nic_rx_mbps:.2f}",
+                r.nic_drops,
+                f"{r.cpu_core_max_pct:.2f}",
             ])
     return path
 
@@ -149,7 +483,14 @@ def main():
     args = parse_args()
     logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="[%(levelname)s] %(message)s")
     args.ping_host = args.ping_host or args.host
-    results = asyncio.run(stress(args))
+    try:
+        _sources(args)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    backend = eventloop.resolve_backend(args.loop)
+    logging.info("Boucle d'événements: %s", backend)
+    args.metrics, server = run_metrics_from_args(args)
+    results = eventloop.run(serving(server, stress(args)), backend)
     path = write_report(results, args.output_dir)
     print(f"Rapport stress écrit: {path}")
     # Résumé console
@@ -158,6 +499,21 @@ def main():
         print(f"Arrêt sur FAIL niveau {worst.level} ({worst.protocol}) à {worst.target_mbps} Mbps")
     else:
         print("Aucun FAIL atteint (max atteint).")
+    _capacity_summary(results, args, path)
+
+
+def _capacity_summary(results: list[StressResult], args, report: Path):
+    """Modèle de capacité par protocole (voir capacity), affiché et ajouté à l'historique."""
+    from .capacity import HISTORY_FILE, append_history, fit_capacity
+
+    models = fit_capacity(results)
+    if not models:
+        return
+    for m in models:
+        print("Capacité " + m.describe())
+    history = Path(args.history or Path(args.output_dir) / HISTORY_FILE)
+    append_history(models, history, site=args.site, ap=args.ap, report=str(report))
+    print(f"Historique de capacité: {history}")
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,227 @@
+"""Balayage de tailles de paquet: l'AP ou l'émetteur plafonne-t-il en pps ou en Mbps?
+
+    loadtester-sweep --host 192.168.1.10 --rate-mbps 50
+    loadtester-sweep --host 192.168.1.10 --max-mbps 300          # au maximum
+
+Pour chaque taille (64 -> 1472 octets par défaut), un palier UDP au débit fixe
+`--rate-mbps` (ou à `--max-mbps` sans `--rate-mbps`) mesure débits émis et reçu,
+pps, perte, latence et CPU de l'émetteur. La perte et le débit reçu viennent
+du retour de `loadtester-receiver` (voir `wire`); sans récepteur à jour, seuls
+les chiffres côté émetteur sont disponibles.
+
+Chaque palier est classé selon sa limite:
+- `none` : cible atteinte (>= 95 %) avec une perte <= `--max-loss`;
+- `pps` / `bps` : sinon, la limite dont le palier est le plus proche: pps
+  rapportés au meilleur pps du balayage contre Mbps rapportés au meilleur Mbps.
+Le coude est la plus petite taille qui n'est plus limitée en pps.
+
+Boucle d'événements, sockets (`SocketPool`), sonde émetteur et ping continu
+sont créés une fois pour tout le balayage.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import eventloop
+from .config import DEFAULT_UDP_PORT
+
+DEFAULT_SIZES = [64, 128, 256, 512, 768, 1024, 1280, 1472]
+TARGET_RATIO = 0.95
+
+
+@dataclass
+class SweepStep:
+    packet_size: int
+    target_mbps: float
+    sent_mbps: float
+    recv_mbps: float
+    pps: float  # paquets reçus par seconde (émis si pas de retour récepteur)
+    loss_pct: float
+    latency_ms: float
+    queue_delay_ms: float
+    cpu_pct: float
+    limit: str = ""
+
+    @property
+    def cpu_pct_per_mbps(self) -> float:
+        mbps = self.recv_mbps if not math.isnan(self.recv_mbps) else self.sent_mbps
+        return self.cpu_pct / mbps if mbps > 0 else 0.0
+
+
+def classify(steps: List[SweepStep], max_loss_pct: float) -> Optional[int]:
+    """Renseigne `limit` sur chaque palier et retourne la taille du coude (ou None)."""
+    def mbps(s: SweepStep) -> float:
+        return s.recv_mbps if not math.isnan(s.recv_mbps) else s.sent_mbps
+
+    pps_max = max((s.pps for s in steps), default=0.0) or 1.0
+    mbps_max = max((mbps(s) for s in steps), default=0.0) or 1.0
+    for s in steps:
+        loss = 0.0 if math.isnan(s.loss_pct) else s.loss_pct
+        if mbps(s) >= s.target_mbps * TARGET_RATIO and loss <= max_loss_pct:
+            s.limit = "none"
+        elif s.pps / pps_max >= mbps(s) / mbps_max:
+            s.limit = "pps"
+        else:
+            s.limit = "bps"
+    seen_pps = False
+    for s in sorted(steps, key=lambda s: s.packet_size):
+        if s.limit == "pps":
+            seen_pps = True
+        elif seen_pps:
+            return s.packet_size
+    return None
+
+
+async def run_sweep(
+    host: str,
+    sizes: List[int],
+    rate_mbps: Optional[float],
+    max_mbps: float,
+    duration_s: float,
+    connections: int = 1,
+    port: int = DEFAULT_UDP_PORT,
+    ping_host: Optional[str] = None,
+) -> List[SweepStep]:
+    from .generator import Destination, SocketPool, generate_fanout
+    from .instrument import SenderProbe
+    from .metrics import PingMonitor
+    from .wire import Feedback
+
+    target = min(rate_mbps, max_mbps) if rate_mbps else max_mbps
+    pool = SocketPool()
+    probe = SenderProbe()
+    monitor = PingMonitor(ping_host or host)
+    background = [asyncio.create_task(probe.run(interval=1.0)), asyncio.create_task(monitor.run())]
+    steps: List[SweepStep] = []
+    warned = False
+    try:
+        for size in sizes:
+            latest: Dict[tuple, Feedback] = {}
+            probe.samples.clear()
+            monitor.reset()
+            stats = await generate_fanout(
+                "UDP", [Destination(host, port)], size, target, connections, duration_s,
+                probe=probe, pool=pool, on_feedback=lambda local, fb: latest.__setitem__(local, fb),
+            )
+            duration = stats.total.duration_s or duration_s
+            sent_mbps = stats.total.mbps
+            if latest:
+                received = sum(fb.received for fb in latest.values())
+                lost = sum(fb.lost for fb in latest.values())
+                recv_mbps = received * size * 8 / 1_000_000 / duration
+                pps = received / duration
+                loss_pct = lost / (received + lost) * 100 if received + lost else 0.0
+                queue_delay = max(fb.queuing_delay_ms for fb in latest.values())
+            else:
+                if not warned:
+                    logging.warning("Aucun retour de %s:%s: perte et débit reçu inconnus", host, port)
+                    warned = True
+                recv_mbps = loss_pct = queue_delay = float("nan")
+                pps = stats.total.bytes_sent / size / duration
+            overhead = probe.summary(target, sent_mbps, "UDP")
+            step = SweepStep(
+                packet_size=size,
+                target_mbps=target,
+                sent_mbps=sent_mbps,
+                recv_mbps=recv_mbps,
+                pps=pps,
+                loss_pct=loss_pct,
+                latency_ms=monitor.avg_latency_ms,
+                queue_delay_ms=queue_delay,
+                cpu_pct=overhead.proc_cpu_pct,
+            )
+            logging.info(
+                "size=%-5d sent=%7.1f Mbps recv=%7.1f Mbps pps=%8.0f loss=%5.2f%% lat=%6.1f ms cpu=%5.1f%%",
+                size, step.sent_mbps, step.recv_mbps, step.pps, step.loss_pct, step.latency_ms, step.cpu_pct,
+            )
+            steps.append(step)
+    finally:
+        for t in background:
+            t.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        pool.close()
+    return steps
+
+
+def write_report(steps: List[SweepStep], output_dir: str) -> Path:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / ("sweep_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S") + ".csv")
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow([
+            "packet_size", "target_mbps", "sent_mbps", "recv_mbps", "pps", "loss_pct",
+            "latency_ms", "queue_delay_ms", "cpu_pct", "cpu_pct_per_mbps", "limit",
+        ])
+        for s in steps:
+            w.writerow([
+                s.packet_size,
+                f"{s.target_mbps:.2f}",
+                f"{s.sent_mbps:.2f}",
+                f"{s.recv_mbps:.2f}",
+                f"{s.pps:.0f}",
+                f"{s.loss_pct:.2f}",
+                f"{s.latency_ms:.2f}",
+                f"{s.queue_delay_ms:.2f}",
+                f"{s.cpu_pct:.2f}",
+                f"{s.cpu_pct_per_mbps:.3f}",
+                s.limit,
+            ])
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Balayage de tailles de paquet UDP (pps vs Mbps)")
+    p.add_argument("--host", required=True, help="Hôte cible (loadtester-receiver)")
+    p.add_argument("--port", type=int, default=DEFAULT_UDP_PORT)
+    p.add_argument("--ping-host", help="Hôte ping (défaut = host)")
+    p.add_argument(
+        "--sizes",
+        type=lambda t: [int(x) for x in t.split(",") if x.strip()],
+        default=DEFAULT_SIZES,
+        help="Tailles de paquet (octets), ex: 64,256,1472",
+    )
+    p.add_argument("--rate-mbps", type=float, help="Débit fixe par palier (défaut: au maximum, plafonné à --max-mbps)")
+    p.add_argument("--max-mbps", type=float, default=200.0, help="Plafond de sécurité")
+    p.add_argument("--duration", type=float, default=5.0, help="Durée par taille (s)")
+    p.add_argument("--connections", type=int, default=1)
+    p.add_argument("--max-loss", type=float, default=1.0, help="Perte max (%%) pour considérer la cible atteinte")
+    p.add_argument("--output-dir", default="reports")
+    p.add_argument("--log-level", default="INFO")
+    eventloop.add_loop_argument(p)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO), format="[%(levelname)s] %(message)s")
+    steps = eventloop.run(
+        run_sweep(
+            args.host, args.sizes, args.rate_mbps, args.max_mbps, args.duration,
+            args.connections, args.port, args.ping_host,
+        ),
+        args.loop,
+    )
+    knee = classify(steps, args.max_loss)
+    path = write_report(steps, args.output_dir)
+    print(f"Rapport balayage écrit: {path}")
+    for s in steps:
+        print(f"  {s.packet_size:>5} o  {s.recv_mbps:8.1f} Mbps  {s.pps:9.0f} pps  limite={s.limit}")
+    if knee is not None:
+        print(f"Coude: à partir de {knee} octets le plafond n'est plus en pps")
+    elif any(s.limit == "pps" for s in steps):
+        print("Limité en pps sur toutes les tailles balayées")
+    else:
+        print("Aucune limite en pps observée")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,127 @@
+"""Format des datagrammes UDP échangés entre générateur et récepteur.
+
+En-tête de base (historique): numéro de séquence 8 octets big-endian.
+
+En-tête étendu: le bit de poids fort de la séquence (`EXT_FLAG`) annonce
+l'heure d'envoi en ns (horloge murale de l'émetteur), un octet de drapeaux et
+la classe de trafic (valeur DSCP du flux, 0-63).
+Les horloges des deux machines n'étant pas synchronisées, seul le délai
+aller relatif au minimum observé (mise en file d'attente) est exploitable.
+
+Retour récepteur (`FLAG_FEEDBACK`): le récepteur renvoie périodiquement à la
+source un datagramme `FEEDBACK` (compteurs cumulés du flux + délais).
+
+Écho (`ECHO`, port dédié du récepteur): la sonde de latence envoie séquence et
+heure d'envoi (horloge monotone de la sonde); le réflecteur renvoie le
+datagramme en y inscrivant le temps passé chez lui (arrivée noyau -> renvoi),
+que la sonde retranche du temps d'aller-retour.
+"""
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+SEQ = struct.Struct("!Q")
+EXT_FLAG = 1 << 63
+SEQ_MASK = EXT_FLAG - 1
+# séquence | EXT_FLAG, heure d'envoi (ns), drapeaux, classe (DSCP)
+EXT_HEADER = struct.Struct("!QQBB")
+FLAG_FEEDBACK = 0x01
+
+# Noms usuels -> DSCP. Les catégories WMM suivent le mappage de la RFC 8325.
+DSCP_NAMES = {
+    "BE": 0, "CS0": 0, "CS1": 8, "AF11": 10, "AF21": 18, "CS2": 16, "AF31": 26, "CS3": 24,
+    "AF41": 34, "CS4": 32, "CS5": 40, "VA": 44, "EF": 46, "CS6": 48, "CS7": 56,
+    # Raccourcis par catégorie d'accès WMM
+    "BK": 8, "VI": 34, "VO": 46,
+}
+
+
+def parse_dscp(value: int | str) -> int:
+    """Valeur DSCP depuis un entier (0-63) ou un nom (`EF`, `AF41`, `VO`...)."""
+    if isinstance(value, str) and not value.strip().isdigit():
+        try:
+            return DSCP_NAMES[value.strip().upper()]
+        except KeyError:
+            raise ValueError(f"DSCP inconnu {value!r} (ex: BE, CS1, AF41, EF, VO, VI, BK)") from None
+    dscp = int(value)
+    if not 0 <= dscp <= 63:
+        raise ValueError(f"DSCP hors plage: {dscp} (0-63)")
+    return dscp
+
+
+def wmm_category(dscp: int) -> str:
+    """Catégorie d'accès WMM (VO/VI/BE/BK) d'une valeur DSCP selon la RFC 8325."""
+    if dscp in (46, 44, 48, 56):
+        return "VO"
+    if dscp in (32, 34, 36, 38, 40, 24, 26, 28, 30):
+        return "VI"
+    if dscp in (8, 2):
+        return "BK"
+    return "BE"
+
+
+FEEDBACK_MAGIC = b"LTFB"
+# magic, plus haute séquence, reçus, perdus (cumulés), délai aller moyen et minimal (ns, -1 si inconnu)
+FEEDBACK = struct.Struct("!4sQQQqq")
+
+
+@dataclass
+class Feedback:
+    highest_seq: int
+    received: int
+    lost: int
+    owd_avg_ns: int
+    owd_min_ns: int
+
+    @property
+    def queuing_delay_ms(self) -> float:
+        """Délai aller au-dessus du minimum du flux (indépendant du décalage d'horloge)."""
+        if self.owd_avg_ns < 0 or self.owd_min_ns < 0:
+            return 0.0
+        return max(self.owd_avg_ns - self.owd_min_ns, 0) / 1e6
+
+
+def pack_feedback(fb: Feedback) -> bytes:
+    return FEEDBACK.pack(FEEDBACK_MAGIC, fb.highest_seq, fb.received, fb.lost, fb.owd_avg_ns, fb.owd_min_ns)
+
+
+def unpack_feedback(data: bytes) -> Optional[Feedback]:
+    if len(data) < FEEDBACK.size or data[:4] != FEEDBACK_MAGIC:
+        return None
+    _, seq, received, lost, owd_avg, owd_min = FEEDBACK.unpack_from(data)
+    return Feedback(seq, received, lost, owd_avg, owd_min)
+
+
+ECHO_MAGIC = b"LTEC"
+# magic, séquence, heure d'envoi (ns, horloge de la sonde), temps de rétention du réflecteur (ns)
+ECHO = struct.Struct("!4sQQQ")
+_ECHO_HOLD_OFFSET = 20
+
+
+def pack_echo(seq: int, send_ns: int) -> bytes:
+    return ECHO.pack(ECHO_MAGIC, seq, send_ns, 0)
+
+
+def echo_reply(data: bytes, hold_ns: int) -> Optional[bytes]:
+    """Réponse du réflecteur (None si `data` n'est pas une requête d'écho)."""
+    if len(data) < ECHO.size or data[:4] != ECHO_MAGIC:
+        return None
+    reply = bytearray(data[:ECHO.size])
+    struct.pack_into("!Q", reply, _ECHO_HOLD_OFFSET, max(hold_ns, 0))
+    return bytes(reply)
+
+
+def unpack_echo(data: bytes) -> Optional[tuple]:
+    """(séquence, heure d'envoi ns, rétention ns) d'une réponse d'écho, sinon None."""
+    if len(data) < ECHO.size or data[:4] != ECHO_MAGIC:
+        return None
+    return ECHO.unpack_from(data)[1:]
+
+
+__all__ = [
+    "SEQ", "EXT_FLAG", "SEQ_MASK", "EXT_HEADER", "FLAG_FEEDBACK", "DSCP_NAMES", "parse_dscp", "wmm_category",
+    "FEEDBACK", "Feedback", "pack_feedback", "unpack_feedback",
+    "ECHO", "pack_echo", "echo_reply", "unpack_echo",
+]
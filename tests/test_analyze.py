@@ -0,0 +1,53 @@
+import csv
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loadtester.analyze import analyze, load_receiver, load_sender, write_analysis
+from loadtester.report import CsvReporter, TierReportRow
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _row(name: str, start: float, end: float, mbps: float, **kw) -> TierReportRow:
+    return TierReportRow(
+        timestamp_start=(T0 + timedelta(seconds=start)).isoformat(), tier_name=name, protocol="UDP",
+        target_mbps=mbps, achieved_mbps=mbps, latency_ms_avg=1.0, jitter_ms=0.1, packet_loss_pct=0.0,
+        cpu_pct_avg=10.0, mem_pct_avg=10.0, timestamp_end=(T0 + timedelta(seconds=end)).isoformat(), **kw,
+    )
+
+
+def test_join_recovers_clock_offset_and_delivery(tmp_path: Path):
+    report = tmp_path / "report.csv"
+    rep = CsvReporter(report)
+    rep.add(_row("bas", 5, 15, 8.0))
+    rep.add(_row("haut", 20, 30, 16.0, target="TOTAL"))
+    rep.add(_row("haut", 20, 30, 6.0, target="a:5202"))  # ligne par cible: ignorée par défaut
+    rep.add(_row("haut", 20, 30, 0.8, traffic_class="voix DSCP46/VO"))
+    rep.write()
+
+    # Récepteur en avance de 7,3 s, un intervalle par seconde; 10 % de perte sur "haut"
+    offset, pkt = 7.3, 1000
+    with (tmp_path / "recv.csv").open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["timestamp", "udp_packets", "udp_bytes", "udp_loss_est", "tcp_bytes"])
+        for k in range(1, 45):
+            lo, hi = k - 1 - offset, k - offset  # intervalle en horloge émetteur
+            sent = 1e6 * (max(min(hi, 15) - max(lo, 5), 0) + 2.1 * max(min(hi, 30) - max(lo, 20), 0))
+            lost = 0.1 * 1e6 * 2.1 * max(min(hi, 30) - max(lo, 20), 0)
+            got = sent - lost
+            w.writerow([(T0 + timedelta(seconds=k)).isoformat(), round(got / pkt), round(got), round(lost / pkt), 0])
+
+    result = analyze(load_sender(report), load_receiver(tmp_path / "recv.csv"))
+    assert abs(result.offset_s - offset) < 0.06 and result.correlation > 0.99
+    low, high = result.tiers
+    assert abs(low.recv_mbps - 8.0) < 0.2 and abs(low.delivery_pct - 100) < 2 and low.loss_pct < 0.5
+    assert high.sent_mbps == pytest.approx(16.8)
+    assert abs(high.delivery_pct - 90) < 2 and abs(high.loss_pct - 10) < 0.5 and high.coverage_pct == 100
+    tiers_csv, seconds_csv = write_analysis(result, report)
+    seconds = list(csv.DictReader(seconds_csv.open()))
+    assert {r["tier_name"] for r in seconds} == {"bas", "haut", ""}
+    assert len(list(csv.DictReader(tiers_csv.open()))) == 2
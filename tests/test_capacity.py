@@ -0,0 +1,60 @@
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+from loadtester.capacity import CapacityModel, append_history, fit_capacity, fit_knee, fit_saturation, format_history, load_history, loss_onset
+
+
+def _wifi(target: float, rng: random.Random) -> SimpleNamespace:
+    """Cellule saturant à 50 Mbps, latence qui monte dès 40 Mbps, pertes au-delà de 50."""
+    return SimpleNamespace(
+        protocol="UDP",
+        target_mbps=target,
+        achieved_mbps=min(target, 50.0) + rng.gauss(0, 0.5),
+        latency_ms=5 + max(0.0, target - 40) * 1.5 + rng.gauss(0, 0.3),
+        loss_pct=max(0.0, (target - 50) / target * 100) + abs(rng.gauss(0, 0.1)),
+    )
+
+
+def test_fits_on_clean_shapes():
+    assert fit_saturation([(10, 10), (20, 20), (30, 30)]) == (30, False)  # pas de plateau: borne basse
+    sat, saturated = fit_saturation([(10, 10), (20, 20), (30, 25), (40, 25), (50, 25)])
+    assert saturated and sat == 25
+    knee, base, slope = fit_knee([(x, 5 + max(0, x - 30) * 2) for x in range(10, 70, 10)])
+    assert knee == 30 and abs(base - 5) < 1e-9 and abs(slope - 2) < 1e-9
+    assert fit_knee([(x, 5.0 + x * 0.001) for x in range(10, 70, 10)])[0] is None  # latence plate
+    assert loss_onset([(10, 0), (20, 0.5), (30, 2.5)]) == 22.5
+    assert loss_onset([(10, 0), (20, 0.2)]) is None
+
+
+def test_repeated_levels_give_confidence_bounds(tmp_path: Path):
+    rng = random.Random(3)
+    results = [_wifi(t, rng) for t in range(10, 90, 10) for _ in range(3)]
+    (model,) = fit_capacity(results)
+    assert model.saturated and model.runs == 24 and model.levels == 8
+    lo, hi = model.saturation_ci
+    assert lo <= model.saturation_mbps <= hi and 48 < lo and hi < 52
+    assert 35 <= model.knee_mbps <= 45 and model.knee_ci[0] <= model.knee_mbps <= model.knee_ci[1]
+    assert 50 <= model.loss_onset_mbps <= 60
+    history = tmp_path / "capacity_history.jsonl"
+    append_history([model], history, site="nord", ap="AP-12")
+    append_history([model], history, site="nord", ap="AP-12")
+    entries = load_history(history)
+    assert len(entries) == 2 and entries[0]["ap"] == "AP-12"
+    assert json.loads(history.read_text().splitlines()[0])["saturation_ci"][0] == lo
+    assert format_history(entries).startswith("nord / AP-12 / UDP")
+
+
+def test_history_writes_strict_json(tmp_path: Path):
+    # Un seul passage par niveau, ni coude ni pertes: bornes de confiance absentes
+    model = CapacityModel("TCP", 3, 3, 42.0, False, None, 4.0, 0.0, None)
+    history = tmp_path / "capacity_history.jsonl"
+    append_history([model], history, site="sud")
+
+    def reject(constant):
+        raise ValueError(constant)
+
+    entry = json.loads(history.read_text(encoding="utf-8"), parse_constant=reject)
+    assert entry["saturation_ci"] == [None, None] and entry["knee_mbps"] is None
+    assert format_history(load_history(history)).splitlines()[-1].endswith("      -       -")
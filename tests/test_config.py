@@ -1,6 +1,8 @@
-from loadtester.config import load_config, FullConfig
+from loadtester.config import load_config, parse_sources, FullConfig
 from pathlib import Path
 
+import pytest
+
 
 def test_load_config_example(tmp_path: Path):
     sample = tmp_path / "example.yaml"
@@ -23,3 +25,75 @@ tiers:
     assert cfg.global_.safety_max_mbps == 50
     assert cfg.tiers[0].protocol == "UDP"
     assert cfg.tiers[0].target_bandwidth_mbps == 10
+    assert cfg.global_.loop_backend == "auto"
+
+
+def test_load_config_targets(tmp_path: Path):
+    sample = tmp_path / "cell.yaml"
+    sample.write_text(
+        """
+global:
+  target_host: 1.2.3.4
+  safety_max_mbps: 100
+tiers:
+  - name: cellule
+    protocol: UDP
+    target_bandwidth_mbps: 60
+    connections: 1
+    duration_s: 5
+    targets:
+      - 10.0.0.11
+      - host: 10.0.0.12
+        share: 2
+        udp_port: 5302
+""",
+        encoding="utf-8",
+    )
+    tier = load_config(sample).tiers[0]
+    assert [t.host for t in tier.targets] == ["10.0.0.11", "10.0.0.12"]
+    assert tier.targets[0].udp_port == 5202
+    assert tier.targets[1].share == 2 and tier.targets[1].udp_port == 5302
+
+    # Même hôte et même port UDP sans `name`: une seule ligne de rapport pour deux cibles
+    sample.write_text(sample.read_text(encoding="utf-8").replace("udp_port: 5302", "udp_port: 5202").replace(
+        "10.0.0.12", "10.0.0.11"), encoding="utf-8")
+    with pytest.raises(ValueError, match="10.0.0.11:5202"):
+        load_config(sample)
+
+
+def test_load_config_sources(tmp_path: Path):
+    sample = tmp_path / "radios.yaml"
+    sample.write_text(
+        """
+global:
+  target_host: 1.2.3.4
+  safety_max_mbps: 100
+tiers:
+  - name: deux_radios
+    protocol: UDP
+    target_bandwidth_mbps: 60
+    connections: 1
+    duration_s: 5
+    sources:
+      - wlan0
+      - {interface: wlan1, share: 2}
+      - 192.168.2.50
+    streams:
+      - {name: voix, target_bandwidth_mbps: 1, sources: [wlan1]}
+""",
+        encoding="utf-8",
+    )
+    tier = load_config(sample).tiers[0]
+    assert [(s.interface, s.address, s.share) for s in tier.sources] == [
+        ("wlan0", "", 1.0), ("wlan1", "", 2.0), ("", "192.168.2.50", 1.0),
+    ]
+    assert tier.streams[0].sources[0].interface == "wlan1"
+
+    # wlan1 en chaîne puis en dictionnaire: une seule ligne par source, refusé
+    sample.write_text(sample.read_text(encoding="utf-8").replace("- wlan0", "- wlan1"), encoding="utf-8")
+    with pytest.raises(ValueError, match="sources en double \\(wlan1\\)"):
+        load_config(sample)
+    # Même contrôle pour `loadtester-stress --source`
+    assert [s.label for s in parse_sources(["wlan0", "10.0.0.2"], "--source")] == ["wlan0", "10.0.0.2"]
+    with pytest.raises(ValueError, match="--source: sources en double \\(wlan0\\)"):
+        parse_sources(["wlan0", {"interface": "wlan0", "share": 2}], "--source")
@@ -0,0 +1,46 @@
+import asyncio
+
+from loadtester.engine import BackgroundEngine
+from loadtester.instrument import LiveSample
+from loadtester.ring import DecimatingBuffer, RingBuffer
+
+
+def _sample(i: int) -> LiveSample:
+    return LiveSample("t", float(i), 10.0, float(i), 0.0, 1.0)
+
+
+def test_engine_persistent_loop_and_bounded_queue():
+    engine = BackgroundEngine("asyncio", max_samples=4)
+    engine.start()
+    try:
+        async def loop_id():
+            await asyncio.sleep(0)
+            return id(asyncio.get_running_loop())
+
+        # Même boucle d'un test à l'autre
+        assert engine.submit(loop_id()).result(2) == engine.submit(loop_id()).result(2)
+        for i in range(10):
+            engine.publish(_sample(i))
+        # File pleine: les plus anciens sont écartés
+        assert [s.t_s for s in engine.drain()] == [6.0, 7.0, 8.0, 9.0]
+    finally:
+        engine.stop()
+    assert not engine.running
+
+
+def test_decimating_buffer_stays_bounded():
+    buf = DecimatingBuffer(capacity=100)
+    for i in range(30 * 60):
+        buf.append(float(i), 1.0)
+    assert len(buf) <= 100
+    xs = [x for x, _ in buf.points()]
+    assert xs == sorted(xs) and xs[0] < 20 and xs[-1] > 1700
+
+
+def test_ring_buffer_overwrites_oldest():
+    ring = RingBuffer(capacity=3, width=2)
+    for i in range(5):
+        ring.append((float(i), i * 10.0))
+    assert len(ring) == 3 and ring.overwritten == 2
+    assert ring.rows() == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0)]
+    assert ring.row(-1) == (4.0, 40.0) and ring.column(1) == [20.0, 30.0, 40.0]
@@ -0,0 +1,79 @@
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+
+from loadtester.config import load_config
+from loadtester.envelope import follow, parse_envelope
+from loadtester.generator import Destination, RateControl, generate_fanout
+from loadtester.instrument import SenderProbe
+
+
+def test_shapes():
+    ramp = parse_envelope({"kind": "ramp", "from_mbps": 10}, 10, 50)
+    assert ramp.rate_mbps(0) == 10 and ramp.rate_mbps(5) == 30 and ramp.rate_mbps(12) == 50
+    steps = parse_envelope({"kind": "steps", "levels_mbps": [5, 20, 40]}, 30, 50)
+    assert [steps.rate_mbps(t) for t in (0, 9.9, 10, 25, 99)] == [5, 5, 20, 40, 40]
+    sine = parse_envelope({"kind": "sine", "low_mbps": 10, "high_mbps": 30, "period_s": 4}, 20, 50)
+    assert sine.rate_mbps(0) == 10 and sine.rate_mbps(2) == 30 and abs(sine.mean_mbps(0, 4) - 20) < 1e-9
+    square = parse_envelope({"kind": "square", "period_s": 2, "duty": 0.25}, 20, 40)
+    assert [square.rate_mbps(t) for t in (0, 0.4, 0.5, 1.9, 2.1)] == [40, 40, 0, 0, 40]
+    assert square.mean_mbps(0, 2) == 10 and square.peak_mbps == 40
+    pw = parse_envelope({"kind": "piecewise", "points": [[0, 5], [10, 25], [20, 25]]}, 30, 50)
+    assert pw.rate_mbps(5) == 15 and pw.rate_mbps(30) == 25
+    with pytest.raises(ValueError):
+        parse_envelope({"kind": "piecewise", "points": [[5, 1], [5, 2]]}, 30, 50)
+    with pytest.raises(ValueError):
+        parse_envelope({"kind": "triangle"}, 30, 50)
+
+
+def test_config_uses_envelope_peak_for_safety(tmp_path: Path):
+    sample = tmp_path / "env.yaml"
+    sample.write_text(
+        """
+global:
+  target_host: 1.2.3.4
+  safety_max_mbps: 40
+tiers:
+  - name: rampe
+    protocol: UDP
+    target_bandwidth_mbps: 20
+    connections: 1
+    duration_s: 10
+    envelope: {kind: ramp, from_mbps: 0, to_mbps: 60}
+""",
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError, match="60"):
+        load_config(sample)
+    sample.write_text(sample.read_text().replace("to_mbps: 60", "to_mbps: 40"))
+    tier = load_config(sample).tiers[0]
+    assert tier.peak_mbps == 40
+    assert abs(tier.mean_target_mbps - 20) < 0.2
+
+
+def test_udp_pacer_follows_envelope():
+    env = parse_envelope({"kind": "steps", "levels_mbps": [2, 0, 8], "step_s": 0.4}, 1.2, 8)
+
+    async def scenario():
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        probe = SenderProbe()
+        probe_task = asyncio.create_task(probe.run(interval=0.4))
+        rate = RateControl(env.peak_mbps * 1_000_000)
+        rate.set(env.rate_mbps(0) * 1_000_000)
+        await asyncio.gather(
+            generate_fanout("UDP", [Destination(*sink.getsockname())], 1000, env.peak_mbps, 2, 1.2, probe=probe, rate=rate),
+            follow(env, rate, 1.2),
+        )
+        probe_task.cancel()
+        await asyncio.gather(probe_task, return_exceptions=True)
+        sink.close()
+        return [s.mbps for s in probe.samples]
+
+    mbps = asyncio.run(scenario())
+    # Une seule paire de sockets: 2 Mbps, quasi-arrêt (1 paquet/s par flux), puis 8 Mbps
+    assert 1.6 < mbps[0] < 2.4
+    assert mbps[1] < 0.2
+    assert len(mbps) < 3 or 6.4 < mbps[2] < 9.6
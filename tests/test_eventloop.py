@@ -0,0 +1,37 @@
+import asyncio
+import logging
+import sys
+
+import pytest
+
+from loadtester import eventloop
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        eventloop.resolve_backend("trio")
+    assert eventloop.resolve_backend("ASYNCIO") == "asyncio"
+
+
+def test_uvloop_missing_falls_back_with_warning(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "uvloop", None)  # import uvloop -> ImportError
+    with caplog.at_level(logging.WARNING):
+        assert eventloop.resolve_backend("uvloop") == "asyncio"
+    assert "uvloop" in caplog.text
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        assert eventloop.resolve_backend("auto") == "asyncio"
+    assert caplog.text == ""  # auto: repli silencieux
+    assert eventloop.loop_factory("uvloop") is asyncio.new_event_loop
+
+
+def test_run_returns_result_and_closes_loop():
+    loops = []
+
+    async def main():
+        loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0)
+        return 42
+
+    assert eventloop.run(main(), "asyncio") == 42
+    assert loops[0].is_closed()
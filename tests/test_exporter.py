@@ -0,0 +1,81 @@
+import asyncio
+import socket
+
+from loadtester.exporter import MetricFamily, RunMetrics, render
+from loadtester.receiver import Receiver
+
+
+def test_render_openmetrics():
+    text = render([
+        MetricFamily("x_packets", "counter", "Paquets").add(12),
+        MetricFamily("x_rate", "gauge", 'Débit "courant"').add(1.5, flow="10.0.0.2:4000"),
+        MetricFamily("x_iat_seconds", "histogram", "Inter-arrivées").add_log2([1, 2, 0, 3], 1e6),
+        MetricFamily("x_empty", "gauge", "Jamais exposée"),
+    ])
+    lines = text.splitlines()
+    assert "x_packets_total 12" in lines
+    assert 'x_rate{flow="10.0.0.2:4000"} 1.5' in lines
+    assert '# HELP x_rate Débit \\"courant\\"' in lines
+    buckets = [l for l in lines if l.startswith("x_iat_seconds_bucket")]
+    assert buckets == [
+        'x_iat_seconds_bucket{le="0.0"} 1',
+        'x_iat_seconds_bucket{le="1e-06"} 3',
+        'x_iat_seconds_bucket{le="3e-06"} 3',
+        'x_iat_seconds_bucket{le="+Inf"} 6',
+    ]
+    assert "x_empty" not in text
+    assert lines[-1] == "# EOF"
+
+
+def test_receiver_scrape_over_http():
+    async def scenario():
+        recv = Receiver(0, None, 60, None, kernel_timestamps=False, verbose=False, metrics_port=0)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for seq in (0, 1, 2, 5):
+            sock.sendto(seq.to_bytes(8, "big") + b"X" * 92, ("127.0.0.1", recv.udp_port))
+        sock.close()
+        await asyncio.sleep(0.05)
+        reader, writer = await asyncio.open_connection("127.0.0.1", recv.metrics_port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        task.cancel()
+        await task
+        return response
+
+    response = asyncio.run(scenario())
+    head, body = response.split("\r\n\r\n", 1)
+    assert head.startswith("HTTP/1.1 200")
+    assert "application/openmetrics-text" in head
+    assert "loadtester_receiver_udp_packets_total 4" in body
+    assert "loadtester_receiver_udp_bytes_total 400" in body
+    assert "loadtester_receiver_udp_lost_total 2" in body
+    assert 'loadtester_receiver_flow_loss_ratio{flow="127.0.0.1:' in body
+    assert body.endswith("# EOF\n")
+
+
+def test_session_probe_rtts_counted_once():
+    from types import SimpleNamespace
+
+    from loadtester.responsiveness import LatencyProbe
+
+    # Une sonde de session sert deux paliers: son histogramme n'est jamais remis à zéro
+    latency = LatencyProbe("127.0.0.1")
+    metrics = RunMetrics()
+
+    def tier(name: str, rtts_us):
+        latency.reset()
+        metrics.attach(name, 10.0, SimpleNamespace(bytes_sent=0, sendto_calls=0, samples=[]), latency)
+        for us in rtts_us:
+            latency.hist.add(us)
+        live = metrics.collect()[-1].samples[-1][2]
+        metrics.detach()
+        return live
+
+    assert tier("t1", [1000] * 3) == 3
+    assert tier("t2", [1000] * 2 + [100_000]) == 6
+    family = metrics.collect()[-1]
+    counts = [c for _, labels, c in family.samples if labels["le"] in ("0.001023", "0.131071", "+Inf")]
+    assert counts == [5, 6, 6]
@@ -0,0 +1,78 @@
+import asyncio
+
+from loadtester.generator import Destination, generate_fanout
+from loadtester.receiver import Receiver
+
+
+def test_fanout_splits_rate_by_share():
+    async def scenario():
+        recvs = [Receiver(0, None, 3600, None, host="127.0.0.1", verbose=False) for _ in range(3)]
+        tasks = [asyncio.create_task(r.start()) for r in recvs]
+        await asyncio.sleep(0.05)
+        dests = [Destination("127.0.0.1", r.udp_port, share=s) for r, s in zip(recvs, (1, 1, 2))]
+        stats = await generate_fanout("UDP", dests, 512, 8, 2, 1.0)
+        await asyncio.sleep(0.05)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks)
+        return dests, stats, recvs
+
+    dests, stats, recvs = asyncio.run(scenario())
+    per = [stats.per_target[d.label].bytes_sent for d in dests]
+    assert stats.total.bytes_sent == sum(per)
+    assert 1.7 < per[2] / per[0] < 2.3
+    assert [r.udp_packets * 512 for r in recvs] == per
+    assert all(r.udp_loss == 0 for r in recvs)
+
+
+def test_session_reuses_tcp_connections_and_probe():
+    from loadtester.session import PersistentSession
+
+    async def scenario():
+        recv = Receiver(0, 0, 3600, None, host="127.0.0.1", verbose=False, echo_port=0)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        dest = [Destination("127.0.0.1", recv.tcp_port)]
+        async with PersistentSession(recv.echo_port, 0.01, idle_s=0.2) as session:
+            loop = asyncio.get_running_loop()
+            probe, idle = await session.latency("127.0.0.1")
+            first = await generate_fanout("TCP", dest, 1000, 8, 2, 0.3, pool=session.pool)
+            t0 = loop.time()
+            probe2, idle2 = await session.latency("127.0.0.1")
+            # Pas de nouvelle mesure à vide au palier suivant
+            transition_s = loop.time() - t0
+            second = await generate_fanout("TCP", dest, 1000, 16, 2, 0.3, pool=session.pool)
+            await asyncio.sleep(0.05)
+            opened, reused = session.pool.tcp_opened, session.pool.tcp_reused
+        task.cancel()
+        await task
+        return recv, first, second, (probe, idle), (probe2, idle2), transition_s, opened, reused
+
+    recv, first, second, a, b, transition_s, opened, reused = asyncio.run(scenario())
+    assert (opened, reused) == (2, 2)
+    assert a == b and transition_s < 0.05 and a[1].samples > 5
+    assert 1.6 < second.total.bytes_sent / first.total.bytes_sent < 2.4
+    assert recv.totals["tcp_bytes"] + recv.tcp_bytes == first.total.bytes_sent + second.total.bytes_sent
+
+
+def test_sources_split_rate_and_bind():
+    from loadtester.generator import Source
+
+    async def scenario():
+        recv = Receiver(0, 0, 3600, None, host="127.0.0.1", verbose=False)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        # SO_BINDTODEVICE sur lo, ou repli sur son adresse sans CAP_NET_RAW
+        sources = [Source(address="127.0.0.1"), Source(interface="lo", share=3)]
+        udp = await generate_fanout("UDP", [Destination("127.0.0.1", recv.udp_port)], 500, 8, 1, 0.5, sources=sources)
+        tcp = await generate_fanout("TCP", [Destination("127.0.0.1", recv.tcp_port)], 1000, 8, 1, 0.5, sources=sources)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await task
+        return udp, tcp
+
+    for stats in asyncio.run(scenario()):
+        per = stats.per_source
+        assert set(per) == {"127.0.0.1", "lo"}
+        assert per["127.0.0.1"].bytes_sent + per["lo"].bytes_sent == stats.total.bytes_sent
+        assert 2.4 < per["lo"].bytes_sent / per["127.0.0.1"].bytes_sent < 3.6
@@ -0,0 +1,57 @@
+import pytest
+
+from loadtester.goodput import FeedbackSample, make_controller, summarize
+
+
+def _simulate(controller, capacity_mbps=50.0, periods=300, dt=0.1):
+    """Goulot à file bornée: au-delà de la capacité la file grossit puis déborde."""
+    queue_mb = 0.0
+    trace = []
+    for k in range(periods):
+        rate = controller.rate_mbps
+        queue_mb = max(queue_mb + (rate - capacity_mbps) * dt, 0.0)
+        overflow = max(queue_mb - 2.0, 0.0)  # 2 Mbit de tampon
+        queue_mb -= overflow
+        sent = rate * dt
+        loss = overflow / sent * 100 if sent else 0.0
+        s = FeedbackSample(
+            t_s=k * dt,
+            rate_mbps=rate,
+            recv_mbps=min(rate, capacity_mbps),
+            loss_pct=loss,
+            delay_ms=queue_mb / capacity_mbps * 1000,
+        )
+        trace.append(s)
+        controller.update(s)
+    return summarize(controller, trace)
+
+
+@pytest.mark.parametrize("name", ["aimd", "delay"])
+def test_controllers_converge_under_capacity(name):
+    controller = make_controller(name, start_mbps=5, max_mbps=200, loss_threshold_pct=1.0, delay_threshold_ms=20.0)
+    result = _simulate(controller)
+    assert 30 <= result.goodput_mbps <= 50
+    assert result.loss_pct < 1.0
+    assert result.max_ok_mbps <= 50
+
+
+def test_receiver_feedback_drives_rate_over_loopback():
+    import asyncio
+
+    from loadtester.goodput import find_goodput
+    from loadtester.receiver import Receiver
+
+    async def scenario():
+        recv = Receiver(0, None, 3600, None, host="127.0.0.1", verbose=False)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        controller = make_controller("aimd", 2, 20, 5.0, 200.0)
+        result = await find_goodput("127.0.0.1", recv.udp_port, 1000, controller, 1.5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return result
+
+    result = asyncio.run(scenario())
+    assert len(result.trace) >= 5
+    assert result.trace[-1].rate_mbps > 2  # le débit a monté sur retour du récepteur
+    assert result.goodput_mbps > 0
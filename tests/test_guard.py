@@ -0,0 +1,84 @@
+import asyncio
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from loadtester.generator import Destination, RateControl, generate_fanout
+from loadtester.guard import GuardLimits, LiveGuard, _Mark, parse_guard
+from loadtester.instrument import SenderProbe
+from loadtester.responsiveness import LatencyProbe
+from loadtester.scheduler import TierScheduler
+
+
+def test_parse_and_check():
+    limits = parse_guard({"max_loss_pct": 10}, safety_max_mbps=50)
+    assert limits.max_mbps == 50 and limits.max_latency_ms is None and limits.action == "abort"
+    with pytest.raises(ValueError):
+        parse_guard({"action": "ignore"}, 50)
+    guard = LiveGuard(GuardLimits(max_mbps=10, max_loss_pct=5, max_latency_ms=100))
+    assert guard.check(1, 10.4, 4.0, 99) is None  # tolérance de rafale sur le débit
+    assert guard.check(1, 11, None, None).metric == "mbps"
+    assert guard.check(1, 5, 6.0, None).metric == "loss"
+    assert guard.check(1, 5, None, float("inf")).metric == "latency"
+
+
+def test_throttle_caps_rate():
+    async def scenario():
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        probe = SenderProbe()
+        rate = RateControl(8_000_000)
+        sched = TierScheduler(4.0, grace_s=0.5)
+        sched.start()
+        guard = LiveGuard(GuardLimits(max_mbps=3, action="throttle"))
+        sched.background(guard.run(sched, probe, rate=rate))
+        sched.traffic(generate_fanout(
+            "UDP", [Destination(*sink.getsockname())], 1000, 8, 1, 4.0,
+            probe=probe, rate=rate, stop=sched.stopped,
+        ))
+        window = await sched.run()
+        sink.close()
+        return guard, rate, window
+
+    guard, rate, window = asyncio.run(scenario())
+    # Premier dépassement: plafond à la limite, le palier continue
+    assert guard.throttles == 1 and guard.events[0].metric == "mbps"
+    assert rate.effective == 3_000_000
+    assert window.stop_reason == "" and window.duration_s >= 3.9
+
+
+def test_abort_when_echoes_stop():
+    async def scenario():
+        sched = TierScheduler(5.0, grace_s=0.1)
+        sched.start()
+        probe = SimpleNamespace(bytes_sent=0)
+        latency = LatencyProbe("127.0.0.1", 9)  # pas démarrée: compteurs pilotés par le test
+
+        async def silent_network():
+            while True:
+                await asyncio.sleep(0.05)
+                latency.sent += 1  # échos émis, aucune réponse
+
+        sched.background(silent_network())
+        guard = LiveGuard(GuardLimits(max_latency_ms=200))
+        sched.background(guard.run(sched, probe, latency))
+        return guard, await sched.run()
+
+    guard, window = asyncio.run(scenario())
+    assert window.stop_reason.startswith("guard: latency")
+    assert window.duration_s < 2.0 and guard.reason == window.stop_reason
+
+
+def test_window_survives_probe_reset():
+    latency = LatencyProbe("127.0.0.1", 9)
+    latency.rtts, latency.sent = [10.0] * 100, 100
+
+    def mark(t):
+        return _Mark(t, 0, 0, 0, latency.sent_total, latency.lost_total, latency.rtt_total)
+
+    first = mark(0.0)
+    latency.reset()  # repli ICMP en cours de fenêtre: liste et compteurs repartent de zéro
+    latency.rtts, latency.sent, latency.lost = [50.0] * 10, 20, 10
+    _, loss, latency_ms = LiveGuard._window(first, mark(2.0), 2.0, latency, None)
+    assert latency_ms == 50.0 and loss == 50.0
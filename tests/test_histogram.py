@@ -0,0 +1,16 @@
+from loadtester.histogram import Log2Histogram
+
+
+def test_log2_histogram_quantiles():
+    h = Log2Histogram(8)
+    for v in [0, 1, 2, 3, 100, 100, 100, 10_000]:
+        h.add(v)
+    assert h.total == 8
+    assert h.counts[0] == 1 and h.counts[1] == 1 and h.counts[2] == 2
+    assert h.counts[7] == 4  # 100 -> seau [64, 127], 10_000 saturé dans le dernier seau
+    assert h.quantile(0.5) == 3
+    assert h.quantile(0.75) == 127
+    assert h.quantile(0.25) == 1
+    prev = list(h.counts)
+    h.add(5)
+    assert h.diff(prev).total == 1
@@ -0,0 +1,103 @@
+import asyncio
+import socket
+
+from loadtester.impair import GilbertElliott, ImpairParams, ImpairRelay, Impairment, TimerWheel
+
+
+def test_timer_wheel_order_and_horizon():
+    wheel = TimerWheel(tick_s=0.001, slots=8)
+    wheel.schedule(0.0035, "b")
+    wheel.schedule(0.0010, "a")
+    wheel.schedule(0.0200, "far")  # au-delà d'un tour de roue (8 ms)
+    wheel.schedule(0.0035, "c")
+    assert wheel.pop_due(0.0005) == []
+    assert wheel.pop_due(0.004) == ["a", "b", "c"]
+    assert wheel.pop_due(0.012) == []  # même cran que "far", tour suivant
+    assert len(wheel) == 1
+    assert wheel.pop_due(0.5) == ["far"]  # rattrapage de plusieurs tours
+    assert len(wheel) == 0
+
+
+def test_rate_limit_and_queue_overflow():
+    # 1000 octets à 8 Mbps = 1 ms de sérialisation; file de 5 ms
+    imp = Impairment(ImpairParams(rate_mbps=8, queue_ms=5))
+    departures = [imp.admit(1000, 0.0) for _ in range(10)]
+    kept = [d for d in departures if d is not None]
+    assert len(kept) == 6  # 1 en cours + 5 ms de file
+    assert imp.stats.dropped_queue == 4
+    assert [round(d, 6) for d in kept] == [0.001, 0.002, 0.003, 0.004, 0.005, 0.006]
+
+
+def test_jitter_keeps_order_and_reorder_is_counted():
+    imp = Impairment(ImpairParams(delay_ms=20, jitter_ms=5, reorder_pct=10, reorder_ms=30, seed=1))
+    out = []
+    for i in range(5000):
+        at = imp.admit(100, i * 0.001)
+        out.append(at)
+    reordered = sum(1 for a, b in zip(out, out[1:]) if b < a)
+    assert imp.stats.reordered > 350
+    # Chaque paquet retenu est doublé par au moins son successeur; la gigue seule ne réordonne pas
+    assert reordered <= imp.stats.reordered
+    assert all(at >= i * 0.001 + 0.0 for i, at in enumerate(out))
+
+
+def test_random_and_burst_loss_rates():
+    imp = Impairment(ImpairParams(loss_pct=2.0, seed=7))
+    for i in range(50_000):
+        imp.admit(100, i * 1e-4)
+    assert 1.7 < imp.stats.lost_random / 500 < 2.3
+
+    ge = GilbertElliott(0.01, 0.25)
+    assert abs(ge.mean_loss_pct - 100 * 0.01 / 0.26) < 1e-9
+    imp = Impairment(ImpairParams(burst_p=0.01, burst_r=0.25, seed=3))
+    lost_runs, run = [], 0
+    for i in range(100_000):
+        if imp.admit(100, i * 1e-4) is None:
+            run += 1
+        elif run:
+            lost_runs.append(run)
+            run = 0
+    loss_pct = imp.stats.lost_burst / 1000
+    assert abs(loss_pct - ge.mean_loss_pct) < 0.8
+    assert 3.0 < sum(lost_runs) / len(lost_runs) < 5.0  # rafale moyenne ~ 1/r
+
+
+def test_relay_delays_and_counts():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        sink.setblocking(False)
+        relay = ImpairRelay(
+            ImpairParams(delay_ms=30, loss_pct=50, seed=5),
+            [(0, "127.0.0.1", sink.getsockname()[1])],
+            host="127.0.0.1",
+            verbose=False,
+        )
+        task = asyncio.create_task(relay.run())
+        await asyncio.sleep(0.05)
+        src = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        start = loop.time()
+        for seq in range(200):
+            src.sendto(seq.to_bytes(8, "big"), ("127.0.0.1", relay.ports[0]))
+        got = []
+        first = None
+        while loop.time() - start < 0.5:
+            try:
+                data = sink.recv(64)
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+                continue
+            first = first or loop.time() - start
+            got.append(int.from_bytes(data, "big"))
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        src.close()
+        sink.close()
+        return relay.impairment.stats, got, first
+
+    stats, got, first = asyncio.run(scenario())
+    assert stats.received == 200
+    assert stats.forwarded == len(got) == 200 - stats.lost_random
+    assert got == sorted(got)
+    assert first >= 0.029
@@ -0,0 +1,34 @@
+from loadtester.instrument import InstrumentSample, SenderOverhead, SenderProbe
+
+
+def sample(t_s, cpu=20.0, lag=0.5, pacing=0.2):
+    return InstrumentSample(t_s, 8.0, lag, lag * 2, 1000.0, pacing, 5.0, cpu)
+
+
+def probe_with(*samples):
+    probe = SenderProbe()
+    probe.samples = list(samples)
+    return probe
+
+
+def test_summary_averages_and_empty_probe():
+    assert SenderProbe().summary(10, 2) == SenderOverhead()
+    ov = probe_with(sample(1, cpu=10, lag=1.0), sample(2, cpu=30, lag=3.0)).summary(10, 10)
+    assert ov.proc_cpu_pct == 20 and ov.loop_lag_ms_avg == 2.0 and ov.loop_lag_ms_max == 6.0
+    assert ov.syscalls_per_s == 1000 and ov.sendto_pct == 5 and not ov.sender_bound
+
+
+def test_sender_bound_needs_short_rate_and_saturation():
+    cpu = probe_with(sample(1, cpu=95), sample(2, cpu=92))
+    assert cpu.summary(100, 80).sender_bound
+    assert not cpu.summary(100, 95).sender_bound  # cible atteinte (>= 90 %): pas de drapeau
+    assert not cpu.summary(0, 0).sender_bound  # sans cible
+    assert probe_with(sample(1, lag=6.0)).summary(100, 50).sender_bound
+    assert not probe_with(sample(1)).summary(100, 50).sender_bound  # débit court, émetteur au repos: le réseau
+
+
+def test_pacing_delay_counts_for_udp_only():
+    late = probe_with(sample(1, pacing=12.0), sample(2, pacing=11.0))
+    assert late.summary(100, 50, "UDP").sender_bound
+    # En TCP, la fenêtre de congestion retarde aussi l'échéancier
+    assert not late.summary(100, 50, "TCP").sender_bound
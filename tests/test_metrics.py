@@ -0,0 +1,39 @@
+import asyncio
+import socket
+import sys
+
+import pytest
+
+from loadtester.metrics import ResourceSampler, interface_for
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="interface de bouclage nommée lo")
+def test_sampler_sees_loopback_traffic():
+    async def scenario():
+        sampler = ResourceSampler(interval=0.05, capacity=100)
+        task = asyncio.create_task(sampler.run())
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for _ in range(50):
+            for _ in range(20):
+                sender.sendto(b"x" * 1000, sink.getsockname())
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        sender.close()
+        sink.close()
+        return sampler
+
+    sampler = asyncio.run(scenario())
+    assert interface_for("127.0.0.1") == "lo"
+    res = sampler.summary("lo")
+    # ~1000 paquets de 1 ko en ~0,5 s, plus le trafic de fond éventuel
+    assert res.nic is not None and res.nic.tx_pps >= 1000 and res.nic.tx_mbps > 4
+    assert len(sampler.buffer) >= 5 and 0 <= res.cpu_pct <= res.cpu_core_max_pct <= 100
+
+
+def test_sampler_sized_from_tier_duration():
+    assert ResourceSampler(0.1, duration_s=10).buffer.capacity == 126
+    # Palier plus long que la capacité maximale: plafonnée
+    assert ResourceSampler(0.1, capacity=1000, duration_s=3600).buffer.capacity == 1000
@@ -0,0 +1,40 @@
+import asyncio
+from pathlib import Path
+
+from loadtester.config import load_config
+from loadtester.plan import build_plan, write_plan
+
+
+def test_plan_volumes_and_infeasible_tier(tmp_path: Path):
+    sample = tmp_path / "plan.yaml"
+    sample.write_text(
+        """
+global:
+  target_host: 1.2.3.4
+  safety_max_mbps: 100000
+  idle_probe_s: 2
+tiers:
+  - name: leger
+    protocol: UDP
+    target_bandwidth_mbps: 8
+    connections: 1
+    duration_s: 10
+    packet_size: 1000
+  - name: impossible
+    protocol: UDP
+    target_bandwidth_mbps: 50000
+    connections: 1
+    duration_s: 10
+    packet_size: 64
+""",
+        encoding="utf-8",
+    )
+    cfg = load_config(sample)
+    plan = asyncio.run(build_plan(cfg))
+    light, heavy = plan.tiers
+    assert light.pps == 1000 and light.packets == 10_000 and light.bytes == 10_000_000
+    assert light.wall_s == 12.5 and plan.wall_s == 25
+    # ~98 Mpps: hors de portée de n'importe quel pacer Python
+    assert light.feasible and not heavy.feasible and "packet_size=64" in heavy.note
+    assert plan.max_pps > 1000 and len(plan.calibration) == 2
+    assert write_plan(plan, str(tmp_path)).read_text(encoding="utf-8").count("\n") == 3
@@ -0,0 +1,75 @@
+import asyncio
+import socket
+import sys
+
+import pytest
+
+from loadtester.receiver import Receiver
+
+
+def test_kernel_timestamps_loopback():
+    if not sys.platform.startswith("linux"):
+        pytest.skip("SO_TIMESTAMPNS est propre à Linux")
+
+    async def scenario():
+        recv = Receiver(0, None, 60, None)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for seq in range(20):
+            sock.sendto(seq.to_bytes(8, "big") + b"X" * 56, ("127.0.0.1", recv.udp_port))
+        sock.close()
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await task
+        return recv
+
+    recv = asyncio.run(scenario())
+    assert recv.kernel_timestamps
+    assert recv.udp_packets == 20
+    assert recv.udp_loss == 0
+    assert recv.rx_overhead_samples == 20
+    assert recv.rx_overhead_ns_max >= 0
+
+
+def test_bursts_and_long_gaps():
+    recv = Receiver(0, None, 60, None, kernel_timestamps=False, burst_gap_us=200, gap_threshold_ms=100)
+    addr = ("10.0.0.2", 40000)
+    t = 1_000_000_000
+    seq = 0
+    # 3 rafales de 4 paquets espacés de 50 µs, séparées par 150 ms
+    for _burst in range(3):
+        for _ in range(4):
+            recv._on_datagram(seq.to_bytes(8, "big") + b"X" * 56, addr, t)
+            seq += 1
+            t += 50_000
+        t += 150_000_000
+    recv._snapshot()
+    s = recv.stats[-1]
+    assert s.udp_packets == 12
+    assert s.long_gaps == 2
+    assert s.bursts == 2  # la dernière rafale n'est close que par le paquet suivant
+    assert s.burst_len_max == 4
+    assert 150 <= s.max_gap_ms < 151
+    assert s.iat_p50_us == 63  # seau [32, 63] µs
+
+
+def test_per_class_delay_and_loss():
+    from loadtester.wire import EXT_FLAG, EXT_HEADER
+
+    recv = Receiver(0, None, 60, None, kernel_timestamps=False)
+    t = 1_000_000_000
+    for seq in range(100):
+        voice = EXT_HEADER.pack(seq | EXT_FLAG, t - 1_000_000, 0, 46) + b"X" * 100
+        recv._on_datagram(voice, ("10.0.0.2", 40001), t)
+        if seq % 10 != 9:  # 10 % de perte sur le flux best effort
+            bulk = EXT_HEADER.pack(seq | EXT_FLAG, t - 5_000_000, 0, 0) + b"X" * 100
+            recv._on_datagram(bulk, ("10.0.0.2", 40000), t)
+        t += 1_000_000
+    recv._snapshot()
+    by_class = {c.dscp: c for c in recv.class_stats}
+    assert by_class[46].wmm == "VO" and by_class[46].lost == 0
+    assert by_class[0].lost == 9
+    # Délais relatifs au minimum global: la voix à 0, le best effort 4 ms au-dessus
+    assert by_class[46].owd_avg_ms == 0
+    assert by_class[0].owd_avg_ms == 4.0
@@ -0,0 +1,40 @@
+import asyncio
+import math
+
+from loadtester.receiver import Receiver
+from loadtester.responsiveness import LatencyProbe, LatencyStats, Responsiveness
+
+
+def test_stats_inflation_and_rpm():
+    idle = LatencyStats.from_rtts([10.0] * 20, sent=20, lost=0)
+    # 19 échos à 50 ms et un à 1000 ms (écarté par la moyenne tronquée)
+    loaded = LatencyStats.from_rtts([50.0] * 19 + [1000.0], sent=21, lost=1)
+    r = Responsiveness(idle, loaded)
+    assert idle.rpm == 6000
+    assert loaded.rpm == 1200
+    assert r.inflation_ms == 40.0
+    assert r.inflation_ratio == 5.0
+    assert math.isclose(loaded.loss_pct, 100 / 21)
+    assert loaded.p90_ms == 50.0
+
+
+def test_probe_against_receiver_echo():
+    async def scenario():
+        recv = Receiver(0, None, 60, None, echo_port=0, verbose=False)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        probe = LatencyProbe("127.0.0.1", recv.echo_port, interval=0.01)
+        probe.start()
+        idle = await probe.baseline(0.2)
+        await asyncio.sleep(0.2)
+        result = await probe.finish(idle)
+        task.cancel()
+        await task
+        return probe, recv, result
+
+    probe, recv, result = asyncio.run(scenario())
+    assert probe.mode == "udp"
+    assert result.idle.samples > 5 and result.loaded.samples > 5
+    assert result.loaded.loss_pct == 0.0
+    assert result.loaded.median_ms < 50
+    assert recv.echo_replies >= result.idle.samples + result.loaded.samples
@@ -0,0 +1,43 @@
+import asyncio
+
+from loadtester.scheduler import TierScheduler
+
+
+def test_single_deadline_for_traffic_and_background():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        sched = TierScheduler(0.3, grace_s=0.2)
+        t0 = loop.time()
+        sched.start()
+        ticks = []
+
+        async def iperf_like():  # dure exactement le palier, comme `iperf3 -t`
+            await asyncio.sleep(0.3)
+            return "iperf"
+
+        async def fallback():  # échec rapide puis générateur interne sur le temps restant
+            await asyncio.sleep(0.1)
+            remaining = sched.remaining
+            await asyncio.sleep(remaining)
+            return remaining
+
+        async def stuck():
+            await asyncio.sleep(10)
+
+        bg = sched.background(asyncio.sleep(10))
+        a = sched.traffic(iperf_like())
+        b = sched.traffic(fallback())
+        c = sched.traffic(stuck())
+        window = await sched.run(on_tick=ticks.append, tick_s=0.1)
+        return loop.time() - t0, window, ticks, bg, a, b, c
+
+    elapsed, window, ticks, bg, a, b, c = asyncio.run(scenario())
+    # Le trafic et la progression partagent l'échéance: ~durée + grâce max, pas 2 x durée
+    assert 0.29 < elapsed < 0.55
+    assert 0.29 < window.duration_s < 0.35
+    assert window.start < window.end
+    assert ticks == sorted(ticks) and 0.29 < ticks[-1] <= 0.3
+    assert bg.cancelled() and c.cancelled()
+    assert TierScheduler.result(a) == "iperf"
+    assert 0.15 < TierScheduler.result(b) < 0.25
+    assert TierScheduler.result(c, "absent") == "absent"
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import math
+
+from loadtester import runner as runner_mod
+from loadtester.config import load_config
+from loadtester.receiver import Receiver
+from loadtester.soak import RollingWindow, SoakRunner, SoakState
+
+
+def test_rolling_window_expires_and_roundtrips():
+    w = RollingWindow(60, buckets=6)
+    for t in range(0, 120):
+        w.add(1000.0 + t, float(t))
+    s = w.stats(1119.0)
+    # Seuls les ~60 derniers échantillons restent, mémoire fixe
+    assert 55 <= s["count"] <= 60
+    assert s["max"] == 119.0 and s["min"] >= 59.0
+    restored = RollingWindow.from_dict(json.loads(json.dumps(w.to_dict())))
+    assert restored.stats(1119.0) == s
+    assert math.isnan(w.stats(5000.0)["avg"])
+
+
+def test_receiver_streams_and_prunes_idle_flows(tmp_path):
+    out = tmp_path / "recv.csv"
+    recv = Receiver(0, None, 1, str(out), kernel_timestamps=False, verbose=False, stream=True, flow_idle_s=2)
+    t = 1_000_000_000
+    for port in range(40000, 40010):
+        recv._on_datagram((0).to_bytes(8, "big"), ("10.0.0.2", port), t)
+        recv._on_datagram((1).to_bytes(8, "big"), ("10.0.0.2", port), t + 1000)
+    for _ in range(3):
+        recv._snapshot()
+    assert recv.flows == {} and recv.pruned_flows == 10
+    recv._write()
+    lines = out.read_text().splitlines()
+    assert len(lines) == 4  # en-tête + 3 intervalles écrits au fil de l'eau
+    summary = json.loads(out.with_suffix(".flows.json").read_text())
+    assert summary["pruned"]["flows"] == 10
+
+
+def test_soak_runner_keeps_no_per_tier_state(tmp_path, monkeypatch):
+    runners = []
+
+    class Runner(runner_mod.LoadTestRunner):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            runners.append(self)
+
+    async def scenario():
+        recv = Receiver(0, None, 3600, None, host="127.0.0.1", verbose=False, echo_port=0)
+        task = asyncio.create_task(recv.start())
+        await asyncio.sleep(0.05)
+        cfg_path = tmp_path / "soak.yaml"
+        cfg_path.write_text(
+            f"""
+global:
+  target_host: 127.0.0.1
+  safety_max_mbps: 50
+  echo_port: {recv.echo_port}
+  idle_probe_s: 0
+  use_iperf_if_available: false
+tiers:
+  - {{name: a, protocol: UDP, target_bandwidth_mbps: 2, connections: 1, duration_s: 2,
+      targets: [{{host: 127.0.0.1, udp_port: {recv.udp_port}}}]}}
+  - {{name: b, protocol: UDP, target_bandwidth_mbps: 4, connections: 1, duration_s: 2,
+      targets: [{{host: 127.0.0.1, udp_port: {recv.udp_port}}}]}}
+""",
+            encoding="utf-8",
+        )
+        state = SoakState(str(cfg_path), 5, "2026-01-01T00:00:00")
+        soak = SoakRunner(load_config(cfg_path), tmp_path / "soak", state, internal_only=True)
+        await soak.run()
+        task.cancel()
+        await task
+        return state
+
+    monkeypatch.setattr(runner_mod, "LoadTestRunner", Runner)
+    state = asyncio.run(scenario())
+    assert state.finished and state.tiers_done >= 3 and state.samples_written > 0
+    rows = (tmp_path / "soak" / "rows.csv").read_text(encoding="utf-8").splitlines()
+    assert rows[0].startswith("cycle,timestamp_start,tier_name") and len(rows) > state.tiers_done
+    # Rien ne s'accumule d'un palier à l'autre: tout part sur disque
+    grown = {k: v for k, v in vars(runners[0]).items() if isinstance(v, (list, dict, set)) and v}
+    assert grown == {}
@@ -0,0 +1,40 @@
+"""Temps de démarrage des points d'entrée (jusqu'au premier socket en écoute)."""
+import os
+import subprocess
+import sys
+import time
+
+# Budget volontairement large (machines de CI lentes); la valeur mesurée figure dans le message d'échec.
+MAX_STARTUP_S = 3.0
+
+
+def test_receiver_import_is_light():
+    code = (
+        "import sys, loadtester.receiver; "
+        "heavy = [m for m in ('rich', 'psutil', 'yaml', 'loadtester.runner') if m in sys.modules]; "
+        "print(','.join(heavy))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_receiver_time_to_first_bound_socket():
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        # Ports éphémères, écho désactivé: indépendant d'un récepteur déjà lancé sur la machine
+        [sys.executable, "-m", "loadtester.receiver", "--udp-port", "0", "--tcp-port", "0", "--echo-port", "0",
+         "--interval", "60"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        env=env,
+    )
+    try:
+        line = proc.stdout.readline()
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+    assert line.startswith("[Receiver] UDP port"), line
+    assert elapsed < MAX_STARTUP_S, f"receiver: premier socket en écoute après {elapsed * 1000:.0f} ms"
@@ -0,0 +1,57 @@
+import math
+import random
+from types import SimpleNamespace
+
+from loadtester.responsiveness import LatencyProbe
+from loadtester.steady import SecondSample, SteadyConfig, SteadyStateMonitor, mean_ci, mser, quantile_ci, t_quantile
+
+
+def test_statistics():
+    assert abs(t_quantile(0.975, 4) - 2.776) < 0.02
+    assert abs(t_quantile(0.975, 30) - 2.042) < 0.002
+    mean, hw = mean_ci([10, 12, 11, 13, 9], 0.95)
+    assert mean == 11 and abs(hw - 2.776 * math.sqrt(2.5 / 5)) < 0.03
+    assert mean_ci([5.0])[1] == math.inf
+    # p99 de 1..1000: rangs ~ 990 ± 6
+    p99, lo, hi = quantile_ci(list(range(1, 1001)), 0.99)
+    assert p99 == 990 and 980 <= lo < 990 < hi <= 997
+    assert math.isnan(quantile_ci(list(range(100)), 0.99)[2])  # trop peu d'échantillons
+
+
+def test_mser_cuts_ramp_up():
+    rng = random.Random(1)
+    series = [2, 8, 14, 18] + [20 + rng.gauss(0, 0.3) for _ in range(16)]
+    assert 4 <= mser(series) <= 7  # toute la rampe, un peu de bruit au plus
+    assert mser([20 + rng.gauss(0, 0.3) for _ in range(20)]) <= 3
+
+
+def test_monitor_discards_warmup_and_converges():
+    rng = random.Random(2)
+    probe = SimpleNamespace(rtts=[], rtt_base=0)
+    monitor = SteadyStateMonitor(SteadyConfig(ci_pct=5), probe)
+    for t, goodput in enumerate([3, 9, 15] + [20] * 3, start=1):
+        probe.rtts += [40 + rng.random() for _ in range(100)]
+        monitor.add(SecondSample(t, goodput, goodput + rng.gauss(0, 0.2), 0.0, len(probe.rtts)))
+    result = monitor.evaluate()
+    assert result.warmup_s == 3 and not result.converged  # 3 s de régime établi seulement
+    probe.rtts += [40 + rng.random() for _ in range(300)]
+    monitor.add(SecondSample(7, 20, 20 + rng.gauss(0, 0.2), 0.0, len(probe.rtts)))
+    probe.rtts += [40 + rng.random() for _ in range(300)]
+    monitor.add(SecondSample(8, 20, 20 + rng.gauss(0, 0.2), 0.0, len(probe.rtts)))
+    result = monitor.evaluate()
+    assert result.converged
+    assert abs(result.goodput_mbps - 20) < 0.3 and result.sent_mbps == 20
+    assert len(result.rtts) == 900 and 40.9 < result.latency_p99_ms <= 41
+
+
+def test_monitor_rebases_rtt_marks_after_probe_reset():
+    probe = LatencyProbe("127.0.0.1", 9)
+    monitor = SteadyStateMonitor(SteadyConfig(), probe)
+    for t, goodput in enumerate([8, 8, 8, 20, 20, 20], start=1):
+        if t == 5:
+            probe.reset()  # repli ICMP en cours de palier: `rtts` repart de zéro
+        probe.rtts += [10.0 if t <= 3 else 50.0] * 100
+        monitor.add(SecondSample(t, 20, goodput, 0.0, probe.rtt_total))
+    result = monitor.evaluate()
+    assert result.warmup_s == 3
+    assert result.rtts == [50.0] * 200  # repère de fin de chauffe (300) ramené sur la liste courante
@@ -0,0 +1,20 @@
+from loadtester.sweep import SweepStep, classify
+
+
+def _step(size, target, recv_mbps, loss=0.0):
+    pps = recv_mbps * 1_000_000 / 8 / size
+    return SweepStep(size, target, target, recv_mbps, pps, loss, 1.0, 0.0, 50.0)
+
+
+def test_classify_finds_pps_knee():
+    # Plafond de 50 kpps jusqu'à ~500 octets, puis plafond binaire à 200 Mbps
+    steps = [_step(size, 300.0, min(50_000 * size * 8 / 1e6, 200.0)) for size in (64, 128, 256, 512, 1024, 1472)]
+    knee = classify(steps, max_loss_pct=1.0)
+    assert [s.limit for s in steps] == ["pps", "pps", "pps", "bps", "bps", "bps"]
+    assert knee == 512
+
+
+def test_classify_target_reached_above_knee():
+    steps = [_step(1472, 50.0, 49.9), _step(64, 50.0, 20.0)]
+    assert classify(steps, 1.0) == 1472
+    assert steps[0].limit == "none" and steps[1].limit == "pps"